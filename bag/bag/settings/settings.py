@@ -19,6 +19,16 @@ from .checks import check_elasticsearch  # noqa
 from .checks import check_database  # noqa
 
 
+def env_bool(name: str, default: bool) -> bool:
+    """
+    A boolean setting from the environment: 1, true or yes
+    """
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.lower() in ('1', 'true', 'yes')
+
+
 NO_INTEGRATION_TEST = os.getenv('NO_INTEGRATION_TEST', True)
 NO_INTEGATION_TEST = True
 
@@ -94,9 +104,87 @@ ELASTIC_INDICES = {
 }
 
 TESTING = len(sys.argv) > 1 and sys.argv[1] == 'test'
+
+# Added to the elastic index names, `search_benchmark --load-fixture`
+# only fills indices ending in `_benchmark`
+ELASTIC_INDEX_SUFFIX = os.getenv('ELASTIC_INDEX_SUFFIX', 'test' if TESTING else '')
+for k, v in ELASTIC_INDICES.items():
+    ELASTIC_INDICES[k] += ELASTIC_INDEX_SUFFIX
+
+# Expose elastic query timings in a Server-Timing response header
+SEARCH_SERVER_TIMING = env_bool('SEARCH_SERVER_TIMING', False)
+
+# Answer gebieden and bouwblokken typeahead from memory
+SEARCH_LOCAL_GEBIEDEN = env_bool('SEARCH_LOCAL_GEBIEDEN', True)
+
+# Answer postcode + huisnummer typeahead from a sorted file shared by
+# the workers, built from elastic after every import
+SEARCH_LOCAL_ADRESSEN = env_bool('SEARCH_LOCAL_ADRESSEN', True)
+SEARCH_ADRES_INDEX = os.getenv('SEARCH_ADRES_INDEX', '/tmp/bag_adressen.idx')
+
+# Answer straatnaam and pandnaam typeahead with the completion
+# suggester instead of prefix queries, needs a reindex of gebieden and pand
+SEARCH_TYPEAHEAD_SUGGEST = env_bool('SEARCH_TYPEAHEAD_SUGGEST', False)
+
+# Identical typeahead requests in flight share one elastic execution.
+# Set SEARCH_SINGLEFLIGHT_CACHE to a cache shared by the processes to
+# coalesce across uwsgi workers too
+SEARCH_SINGLEFLIGHT = env_bool('SEARCH_SINGLEFLIGHT', True)
+SEARCH_SINGLEFLIGHT_CACHE = os.getenv('SEARCH_SINGLEFLIGHT_CACHE') or None
+
+# Kadastraal subject queries get their own time budget (seconds) and
+# their results are cached per authorization scope for a short time
+SEARCH_SUBJECT_TIMEOUT = float(os.getenv('SEARCH_SUBJECT_TIMEOUT', '0.5'))
+SEARCH_SUBJECT_THREADS = int(os.getenv('SEARCH_SUBJECT_THREADS', '4'))
+SEARCH_SUBJECT_CACHE = os.getenv('SEARCH_SUBJECT_CACHE', 'default')
+SEARCH_SUBJECT_CACHE_TTL = int(os.getenv('SEARCH_SUBJECT_CACHE_TTL', '30'))
+
+# Stream paginated json list responses item by item instead of
+# rendering the whole page in memory first
+API_STREAMING_JSON = env_bool('API_STREAMING_JSON', True)
+
+# Send ETag and Last-Modified derived from the import generation and
+# answer conditional requests with 304
+API_CONDITIONAL = env_bool('API_CONDITIONAL', True)
+
+# Rendered detail responses are cached until the next import, per
+# process up to API_DETAIL_CACHE_BYTES of content and in the django
+# cache API_DETAIL_CACHE when set. Responses over
+# API_DETAIL_CACHE_MAX_ENTRY bytes are not cached
+API_DETAIL_CACHE_BYTES = int(os.getenv('API_DETAIL_CACHE_BYTES', str(16 * 1024 * 1024)))
+API_DETAIL_CACHE_MAX_ENTRY = int(os.getenv('API_DETAIL_CACHE_MAX_ENTRY', str(64 * 1024)))
+API_DETAIL_CACHE = os.getenv('API_DETAIL_CACHE') or None
+API_DETAIL_CACHE_TTL = int(os.getenv('API_DETAIL_CACHE_TTL', '86400'))
+
+# List counts of unfiltered tables with at least this many rows are
+# estimated, other counts are cached until the next import
+API_COUNT_ESTIMATE_THRESHOLD = int(os.getenv('API_COUNT_ESTIMATE_THRESHOLD', '100000'))
+API_COUNT_CACHE = os.getenv('API_COUNT_CACHE', 'default')
+API_COUNT_CACHE_TTL = int(os.getenv('API_COUNT_CACHE_TTL', '86400'))
+
+# Export snapshots written after an import, also copied to the
+# object store container SNAPSHOT_CONTAINER when set
+SNAPSHOT_DIR = os.getenv('SNAPSHOT_DIR', '/tmp/bag_snapshots')
+SNAPSHOT_WORKERS = int(os.getenv('SNAPSHOT_WORKERS', '4'))
+SNAPSHOT_CONTAINER = os.getenv('SNAPSHOT_CONTAINER') or None
+SNAPSHOT_PREFIX = os.getenv('SNAPSHOT_PREFIX', 'bag/snapshots')
+
+# Record query counts and timings per view as metrics, and log the
+# requests over the query or time (ms) budget with their repeated SQL
+API_PROFILING = env_bool('API_PROFILING', True)
+API_BUDGET_QUERIES = int(os.getenv('API_BUDGET_QUERIES', '50'))
+API_BUDGET_MS = int(os.getenv('API_BUDGET_MS', '1000'))
+
+# Directory shared by the uwsgi workers of a host, each writes its
+# metrics there and /status/metrics adds them up
+METRICS_DIR = os.getenv('METRICS_DIR', '/tmp/bag_metrics')
+
 if TESTING:
-    for k, v in ELASTIC_INDICES.items():
-        ELASTIC_INDICES[k] += 'test'
+    # tests change the data without starting a new import generation
+    API_COUNT_CACHE_TTL = 0
+    API_DETAIL_CACHE_BYTES = 0
+    # the metrics of the test process only
+    METRICS_DIR = None
 
 BATCH_SETTINGS = dict(
     batch_size=5000
@@ -62,6 +62,7 @@ if DEBUG:
 
 
 MIDDLEWARE = [
+    'datasets.generic.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.middleware.common.CommonMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
@@ -26,6 +26,7 @@ from django.conf.urls.static import static
 import search.urls
 import datasets.bag.views
 import datasets.brk.views
+from datasets.generic import snapshots
 
 grouped_url_patterns = {
     'base_patterns': [
@@ -33,6 +34,10 @@ grouped_url_patterns = {
     ],
 
     'bag_patterns': [
+        url(r'^bag/snapshots/$', snapshots.manifest_view,
+            name='snapshot-list'),
+        url(r'^bag/snapshots/(?P<name>[\w.-]+)$', snapshots.file_view,
+            name='snapshot-detail'),
         url(r'^bag/', include(search.urls.bag.urls)),
     ],
 
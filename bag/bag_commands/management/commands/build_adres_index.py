@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.management import BaseCommand
+
+from search import adressen
+from search.views import get_elastic_client
+
+
+class Command(BaseCommand):
+    """
+    Build the postcode + huisnummer file of the typeahead from the
+    nummeraanduiding index. Run it after the index is filled, workers
+    pick up the new file within a minute.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            nargs='?',
+            default=settings.SEARCH_ADRES_INDEX,
+            help='File to write the adres index to')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        count = adressen.build(get_elastic_client(), path)
+        self.stdout.write(f'Wrote {count} adressen to {path}')
@@ -0,0 +1,67 @@
+import sys
+
+from django.conf import settings
+from django.core.management import BaseCommand
+
+import search.urls
+from datasets.generic import snapshots
+
+
+def exportable_viewsets():
+    """
+    (name, viewset) of the registered bag and gebieden endpoints
+    """
+    for router in (search.urls.bag, search.urls.gebieden):
+        for prefix, viewset, _basename in router.registry:
+            yield prefix, viewset
+
+
+class Command(BaseCommand):
+    """
+    Write gzipped CSV, NDJSON and GeoJSON snapshots of the exportable
+    datasets. Run it after an import, the tables are exported in
+    parallel.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'dataset',
+            nargs='*',
+            help='Datasets to export, all when none are given')
+
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.SNAPSHOT_WORKERS,
+            help='Number of tables exported at the same time')
+
+        parser.add_argument(
+            '--no-upload',
+            action='store_true',
+            default=False,
+            help='Do not copy the snapshots to the object store')
+
+    def handle(self, *args, **options):
+        available = snapshots.from_viewsets(exportable_viewsets())
+        names = [snapshot.name for snapshot in available]
+
+        for name in options['dataset']:
+            if name not in names:
+                self.stderr.write(
+                    f'Unknown dataset: {name}, choose from {", ".join(names)}')
+                sys.exit(1)
+
+        selected = [
+            snapshot for snapshot in available
+            if not options['dataset'] or snapshot.name in options['dataset']
+        ]
+
+        manifest = snapshots.write(selected, workers=options['workers'])
+        self.stdout.write(
+            f'Wrote {len(manifest["files"])} snapshot files '
+            f'to {settings.SNAPSHOT_DIR}/{manifest["tag"]}')
+
+        if settings.SNAPSHOT_CONTAINER and not options['no_upload']:
+            snapshots.upload(manifest)
+            self.stdout.write(
+                f'Uploaded the snapshots to {settings.SNAPSHOT_CONTAINER}')
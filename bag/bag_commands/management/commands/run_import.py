@@ -4,7 +4,7 @@ Database import commands
 
 import sys
 
-from django.core.management import BaseCommand
+from django.core.management import BaseCommand, call_command
 
 import datasets.bag.batch_gob
 import datasets.brk.batch
@@ -42,6 +42,13 @@ class Command(BaseCommand):
             default=False,
             help='Skip database importing')
 
+        parser.add_argument(
+            '--export-snapshots',
+            action='store_true',
+            dest='export_snapshots',
+            default=False,
+            help='Write export snapshots after the import')
+
     def handle(self, *args, **options):
         dataset = options['dataset']
 
@@ -64,3 +71,6 @@ class Command(BaseCommand):
             for job_class in self.imports[one_ds]:
                 batch.execute(job_class())
 
+        if options['export_snapshots']:
+            call_command('export_snapshots')
+
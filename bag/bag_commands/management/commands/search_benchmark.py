@@ -0,0 +1,128 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from django.test import Client, override_settings
+
+from search import benchmark
+
+DEFAULT_CORPUS = os.path.join(
+    os.path.dirname(benchmark.__file__), 'fixtures', 'benchmark_corpus.json')
+
+
+class Command(BaseCommand):
+    """
+    Replay a corpus of typeahead and search queries in process and
+    report latency, elastic took and result overlap per query kind.
+
+    Run it against a local elastic, loaded with real data or with
+    the test fixture (--load-fixture). The fixture is only loaded into
+    benchmark indices, set ELASTIC_INDEX_SUFFIX=_benchmark for it.
+    The caches of repeated queries are off while measuring.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'corpus',
+            nargs='?',
+            default=DEFAULT_CORPUS,
+            help='Json file with queries: [{"kind", "url", "q"}, ..]')
+
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Number of times the corpus is replayed')
+
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=1,
+            help='Number of unmeasured runs first')
+
+        parser.add_argument(
+            '--baseline',
+            dest='baseline',
+            default=None,
+            help='Json file with the results to compare with')
+
+        parser.add_argument(
+            '--save-baseline',
+            action='store_true',
+            dest='save_baseline',
+            default=False,
+            help='Store the results of this run as baseline')
+
+        parser.add_argument(
+            '--token',
+            dest='token',
+            default=None,
+            help='JWT used for authorized (subject) queries')
+
+        parser.add_argument(
+            '--load-fixture',
+            action='store_true',
+            dest='load_fixture',
+            default=False,
+            help='Fill database and elastic with the search test fixture. '
+                 'ONLY for a local database, needs '
+                 f'ELASTIC_INDEX_SUFFIX={benchmark.INDEX_SUFFIX}')
+
+    def handle(self, *args, **options):
+        corpus = benchmark.load_corpus(options['corpus'])
+
+        if options['load_fixture']:
+            if not benchmark.dedicated_indices(settings.ELASTIC_INDICES):
+                raise CommandError(
+                    'Refusing to load the fixture into '
+                    f'{", ".join(settings.ELASTIC_INDICES.values())}, '
+                    f'set ELASTIC_INDEX_SUFFIX={benchmark.INDEX_SUFFIX}')
+
+            from search.tests.fill_elastic import load_docs
+
+            self.stdout.write('Loading search fixture')
+            load_docs(type('Fixture', (object,), {}))
+
+        headers = {}
+        if options['token']:
+            headers['HTTP_AUTHORIZATION'] = f"Bearer {options['token']}"
+
+        client = Client(HTTP_HOST='localhost')
+
+        with override_settings(**benchmark.UNCACHED):
+            measurements = benchmark.run(
+                client, corpus,
+                repeat=options['repeat'], warmup=options['warmup'],
+                **headers)
+
+        baseline_path = options['baseline']
+        baseline = None
+
+        if baseline_path and options['save_baseline']:
+            with open(baseline_path, 'w') as baseline_file:
+                json.dump(
+                    benchmark.baseline_from(measurements),
+                    baseline_file, indent=4)
+            self.stdout.write(f'Baseline saved in {baseline_path}')
+        elif baseline_path:
+            with open(baseline_path) as baseline_file:
+                baseline = json.load(baseline_file)
+
+        self.report(benchmark.summarize(measurements, baseline))
+
+    def report(self, summary):
+        header = '{:<22} {:>6} {:>6} {:>8} {:>8} {:>8} {:>9} {:>9} {:>8}'
+        row = '{:<22} {:>6} {:>6} {:>8.1f} {:>8.1f} {:>8.1f} {:>9.1f} {:>9.1f} {:>8}'
+
+        self.stdout.write(header.format(
+            'kind', 'n', 'errors', 'p50 ms', 'p95 ms', 'p99 ms',
+            'took p50', 'took p95', 'overlap'))
+
+        for kind, values in summary.items():
+            overlap = values['overlap']
+            self.stdout.write(row.format(
+                kind, values['count'], values['errors'],
+                values['p50'], values['p95'], values['p99'],
+                values['took_p50'], values['took_p95'],
+                '-' if overlap is None else f'{overlap:.2f}'))
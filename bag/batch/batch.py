@@ -4,6 +4,8 @@ import logging
 
 import gc
 
+from batch import generation
+
 log = logging.getLogger(__name__)
 
 
@@ -13,6 +15,9 @@ def execute(job):
     for task in job.tasks():
         _execute_task(task)
 
+    # caches of imported data are no longer valid
+    generation.bump(job.name)
+
     log.info("Finished job: %s", job.name)
 
 
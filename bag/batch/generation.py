@@ -0,0 +1,85 @@
+"""
+The generation of the imported data.
+
+Processes cache things derived from the imported data (in memory
+indexes, counts, responses). They check the generation to know when
+to throw these away. The current generation is looked up at most
+once every CHECK_INTERVAL seconds per process.
+"""
+
+import datetime
+import logging
+import threading
+import time
+
+from django.db import DatabaseError
+
+from batch.models import ImportGeneration
+
+log = logging.getLogger(__name__)
+
+CHECK_INTERVAL = 30  # seconds
+
+_lock = threading.Lock()
+_current = None
+_created = None
+_checked = 0.0
+
+
+def _lookup() -> (int, datetime.datetime):
+    try:
+        latest = (
+            ImportGeneration.objects
+            .order_by('-id')
+            .values_list('id', 'date_created')
+            .first())
+    except DatabaseError:
+        log.exception('Could not determine the import generation')
+        return 0, None
+    return latest or (0, None)
+
+
+def _refresh():
+    global _current, _created, _checked
+
+    now = time.monotonic()
+    if _current is not None and now - _checked < CHECK_INTERVAL:
+        return
+
+    with _lock:
+        if _current is None or now - _checked >= CHECK_INTERVAL:
+            _current, _created = _lookup()
+            _checked = now
+
+
+def current() -> int:
+    """
+    The current import generation, 0 when nothing is imported yet
+    """
+    _refresh()
+    return _current
+
+
+def created() -> datetime.datetime:
+    """
+    When the current import generation started, None when nothing
+    is imported yet
+    """
+    _refresh()
+    return _created
+
+
+def bump(job: str) -> int:
+    """
+    Start a new generation after `job` changed the data
+    """
+    global _current, _created, _checked
+
+    generation = ImportGeneration.objects.create(job=job[:100])
+
+    with _lock:
+        _current = generation.id
+        _created = generation.date_created
+        _checked = time.monotonic()
+
+    return generation.id
@@ -0,0 +1,17 @@
+from django.db import models
+
+
+class ImportGeneration(models.Model):
+    """
+    A new generation is created every time a batch job (import,
+    index build) has finished. Caches of imported data are valid
+    as long as the generation does not change.
+    """
+    job = models.CharField(max_length=100)
+    date_created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ('id',)
+
+    def __str__(self):
+        return f'{self.id} {self.job}'
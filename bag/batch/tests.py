@@ -2,6 +2,8 @@ from django.test import TransactionTestCase, SimpleTestCase
 from django.utils import timezone
 
 import batch.batch
+from batch import generation
+from batch.models import ImportGeneration
 
 
 class EmptyJob(object):
@@ -56,3 +58,15 @@ class JobTest(TransactionTestCase):
 
         batch.batch.execute(SimpleJob("simple", t))
         self.assertEqual(t.executed, True)
+
+
+class GenerationTest(TransactionTestCase):
+
+    def test_job_bumps_generation(self):
+        before = generation.current()
+        batch.batch.execute(EmptyJob())
+        after = generation.current()
+
+        self.assertGreater(after, before)
+        self.assertEqual(
+            ImportGeneration.objects.get(id=after).job, EmptyJob.name)
@@ -1,6 +1,7 @@
 # Python
-# Packages
+import re
 
+# Packages
 import elasticsearch_dsl as es
 from django.conf import settings
 
@@ -21,6 +22,12 @@ postcode_fields = {
 }
 
 
+# completion suggester with the subtype as context, to filter on
+suggest_field = {
+    'analyzer': analyzers.adres,
+    'contexts': [{'name': 'subtype', 'type': 'category'}],
+}
+
 text_fields = {
     'ngram_edge': es.Text(
         analyzer=analyzers.autocomplete, search_analyzer='standard'
@@ -261,6 +268,9 @@ class Gebied(es.DocType):
 
     gsg_type = es.Keyword()
 
+    # only for openbare_ruimte
+    naam_suggest = es.Completion(**suggest_field)
+
     class Index:
         name = settings.ELASTIC_INDICES['BAG_GEBIED']
 
@@ -278,7 +288,10 @@ class Pand(es.DocType):
         analyzer=analyzers.adres,
         fields=naam_fields
     )
+    pandnaam_suggest = es.Completion(**suggest_field)
     _display = es.Keyword()
+    type = es.Keyword()
+    subtype = es.Keyword()
 
     class Index:
         name = settings.ELASTIC_INDICES['BAG_PAND']
@@ -299,6 +312,35 @@ def get_centroid(geom, transform=None):
     return result.coords
 
 
+def suggest_inputs(names: [str], subtype: str,
+                   weight: int = 10, phrase_weight: int = 5) -> [dict]:
+    """
+    Completion suggester inputs for names
+
+    A suggester only matches from the start of an input, so the tails
+    of the names from every next word on are inputs too. They get a
+    lower weight, like phrase_prefix matches score lower than prefix
+    matches in the typeahead queries.
+    """
+    names = [name for name in dict.fromkeys(names) if name]
+
+    tails = []
+    for name in names:
+        words = re.split(r'[\s./-]+', name.strip())
+        tails.extend(' '.join(words[i:]) for i in range(1, len(words)))
+    tails = [tail for tail in dict.fromkeys(tails) if tail not in names]
+
+    contexts = {'subtype': [subtype]}
+
+    inputs = []
+    if names:
+        inputs.append({'input': names, 'weight': weight, 'contexts': contexts})
+    if tails:
+        inputs.append(
+            {'input': tails, 'weight': phrase_weight, 'contexts': contexts})
+    return inputs
+
+
 def add_verblijfsobject(doc, vo: models.Verblijfsobject):
     if vo:
         doc.centroid = get_centroid(vo.geometrie, 'wgs84')
@@ -406,6 +448,8 @@ def from_openbare_ruimte(o: models.OpenbareRuimte):
     d.naam = o.naam
     d.naam_nen = o.naam_nen
     d.naam_ptt = o.naam_ptt
+    d.naam_suggest = suggest_inputs(
+        [o.naam, o.naam_nen, o.naam_ptt], d.subtype)
 
     postcodes = set()
 
@@ -543,5 +587,8 @@ def from_pand(l):
     d.subtype = 'pand'
     d.landelijk_id = l.landelijk_id
     d.pandnaam = l.pandnaam
+    # pandnaam_query only matches phrase prefixes, all inputs weigh the same
+    d.pandnaam_suggest = suggest_inputs(
+        [l.pandnaam], d.subtype, weight=1, phrase_weight=1)
     d._display = '{}'.format(l.pandnaam if l.pandnaam else l.landelijk_id)
     return d
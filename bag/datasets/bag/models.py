@@ -966,13 +966,12 @@ class Verblijfsobject(mixins.GeldigheidMixin, mixins.MutatieGebruikerMixin,
         Geeft het pand van dit verblijfsobject. Indien er meerdere
         panden zijn, wordt een willekeurig pand gekozen.
         """
-        if not self.panden.count():
-            return None
-
         if not self._pand:
-            self._pand = self.panden.select_related(
-                'bouwblok',
-            )[0]
+            panden = self.panden.all()
+            # use the panden when they are prefetched
+            if 'panden' not in getattr(self, '_prefetched_objects_cache', {}):
+                panden = panden.select_related('bouwblok')[:1]
+            self._pand = next(iter(panden), None)
 
         return self._pand
 
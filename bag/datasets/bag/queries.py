@@ -49,7 +49,8 @@ def postcode_huisnummer_query(analyzer: QueryAnalyzer) -> ElasticQueryWrapper:
             },
         },
         indexes=[NUMMERAANDUIDING],
-        sort_fields=['straatnaam.raw', 'huisnummer', 'toevoeging.keyword']
+        sort_fields=['straatnaam.raw', 'huisnummer', 'toevoeging.keyword'],
+        name='postcode_huisnummer_query'
     )
 
 
@@ -71,7 +72,8 @@ def postcode_huisnummer_exact_query(analyzer: QueryAnalyzer):
         sort_fields=['straatnaam.raw', 'huisnummer', 'toevoeging.keyword'],
         indexes=[NUMMERAANDUIDING],
 
-        size=1
+        size=1,
+        name='postcode_huisnummer_exact_query'
     )
 
 
@@ -85,6 +87,7 @@ def bouwblok_query(analyzer: QueryAnalyzer) -> ElasticQueryWrapper:
         },
         sort_fields=['code.keyword'],
         indexes=[BAG_BOUWBLOK],
+        name='bouwblok_query'
     )
 
 
@@ -102,16 +105,29 @@ def postcode_query(analyzer: QueryAnalyzer) -> ElasticQueryWrapper:
             ],
         ),
         sort_fields=['naam.keyword'],
-        indexes=[BAG_GEBIED]
+        indexes=[BAG_GEBIED],
+        name='postcode_query'
     )
 
 
+def _suggest(prefix: str, field: str, subtype: str = None) -> dict:
+    """
+    Completion suggester on `field`, optionally for one subtype
+    """
+    suggest = {'prefix': prefix, 'field': field}
+    if subtype:
+        suggest['contexts'] = {'subtype': [subtype]}
+    return suggest
+
+
 def _basis_openbare_ruimte_query(
         analyzer: QueryAnalyzer,
         must: [dict] = None,
         must_not: [dict] = None,
         index: str = None,
-        useorder: [bool] = False) -> ElasticQueryWrapper:
+        useorder: [bool] = False,
+        name: str = None,
+        suggest: dict = None) -> ElasticQueryWrapper:
     """
     Basis openbare-ruimte query.
 
@@ -180,6 +196,8 @@ def _basis_openbare_ruimte_query(
         indexes=[BAG_GEBIED],
         sort_fields=sort_fields,
         size=100,
+        name=name,
+        suggest=suggest
     )
 
 
@@ -190,7 +208,9 @@ def weg_query(analyzer: QueryAnalyzer) -> ElasticQueryWrapper:
 
     return _basis_openbare_ruimte_query(
         analyzer,
-        must=[{'term': {'subtype': 'weg'}}]
+        must=[{'term': {'subtype': 'weg'}}],
+        name='weg_query',
+        suggest=_suggest(analyzer.get_straatnaam(), 'naam_suggest', 'weg')
     )
 
 
@@ -211,7 +231,15 @@ def openbare_ruimte_query(analyzer: QueryAnalyzer, subtype: str = None) -> Elast
     }
 
     _add_subtype(dq, subtype)
-    return _basis_openbare_ruimte_query(analyzer, **dq)
+
+    # a suggester context can not exclude a subtype
+    suggest = None
+    if not (subtype and subtype.startswith('not_')):
+        suggest = _suggest(
+            analyzer.get_straatnaam(), 'naam_suggest', subtype)
+
+    return _basis_openbare_ruimte_query(
+        analyzer, name='openbare_ruimte_query', suggest=suggest, **dq)
 
 
 def gebied_query(analyzer: QueryAnalyzer) -> ElasticQueryWrapper:
@@ -222,6 +250,7 @@ def gebied_query(analyzer: QueryAnalyzer) -> ElasticQueryWrapper:
         analyzer, useorder=False, must=[{
             'term': {'type': 'gebied'},
         }],
+        name='gebied_query'
     )
 
 
@@ -240,7 +269,8 @@ def straatnaam_query(analyzer: QueryAnalyzer) -> ElasticQueryWrapper:
             },
         },
         sort_fields=['straatnaam.raw', 'huisnummer', 'toevoeging.keyword'],
-        indexes=[NUMMERAANDUIDING]
+        indexes=[NUMMERAANDUIDING],
+        name='straatnaam_query'
     )
 
 
@@ -274,7 +304,8 @@ def straatnaam_huisnummer_query(
             },
         },
         sort_fields=['straatnaam.raw', 'huisnummer', 'toevoeging.keyword'],
-        indexes=[NUMMERAANDUIDING]
+        indexes=[NUMMERAANDUIDING],
+        name='straatnaam_huisnummer_query'
     )
 
 
@@ -292,7 +323,8 @@ def landelijk_id_nummeraanduiding_query(analyzer: QueryAnalyzer) -> ElasticQuery
             ],
         ),
         sort_fields=['_id'],
-        indexes=[NUMMERAANDUIDING]
+        indexes=[NUMMERAANDUIDING],
+        name='landelijk_id_nummeraanduiding_query'
     )
 
 
@@ -317,7 +349,8 @@ def landelijk_id_openbare_ruimte_query(analyzer: QueryAnalyzer, subtype: str = N
     return ElasticQueryWrapper(
         query=query,
         sort_fields=['_id'],
-        indexes=[BAG_GEBIED]
+        indexes=[BAG_GEBIED],
+        name='landelijk_id_openbare_ruimte_query'
     )
 
 
@@ -334,7 +367,8 @@ def landelijk_id_pand_query(analyzer: QueryAnalyzer) -> ElasticQueryWrapper:
             ]
         ),
         sort_fields=['_id'],
-        indexes=[BAG_PAND]
+        indexes=[BAG_PAND],
+        name='landelijk_id_pand_query'
     )
 
 
@@ -355,5 +389,7 @@ def pandnaam_query(analyzer: QueryAnalyzer) -> ElasticQueryWrapper:
             },
         },
         sort_fields=['_display'],
-        indexes=[BAG_PAND]
+        indexes=[BAG_PAND],
+        name='pandnaam_query',
+        suggest=_suggest(pandnaam, 'pandnaam_suggest')
     )
@@ -1,11 +1,10 @@
+from django.db.models import Prefetch
 from rest_framework import serializers
 
-from rest_framework_gis.fields import GeometryField
-
 from rest_framework.reverse import reverse
 
 from datasets.brk import serializers as brk_serializers
-from datasets.generic import rest
+from datasets.generic import geometry, rest
 
 from . import models
 
@@ -13,8 +12,9 @@ from . import models
 class BboxMixin():
 
     def get_bbox(self, obj):
-        if obj.geometrie:
-            return obj.geometrie.extent
+        geom = geometry.value(obj, 'geometrie')
+        if geom:
+            return geom.extent
 
 class BagMixin(rest.DataSetSerializerMixin):
     dataset = 'bag'
@@ -153,6 +153,13 @@ class OpenbareRuimte(BagMixin, rest.HALSerializer):
 
 
 class Nummeraanduiding(BagMixin, rest.HALSerializer):
+    select_related = tuple(
+        f'{adresseerbaar_object}{relation}'
+        for adresseerbaar_object in (
+            'ligplaats', 'standplaats', 'verblijfsobject')
+        for relation in ('', '__status')
+    )
+
     _display = rest.DisplayField()
     vbo_status = Status()
 
@@ -621,6 +628,24 @@ class LigplaatsDetail(BagMixin, BboxMixin, rest.HALSerializer):
 
 
 class NummeraanduidingDetail(BagMixin, rest.HALSerializer):
+    # the properties go through the adresseerbaar object
+    select_related = (
+        'status',
+        'openbare_ruimte',
+        'openbare_ruimte__woonplaats',
+    ) + tuple(
+        f'{adresseerbaar_object}{relation}'
+        for adresseerbaar_object in (
+            'ligplaats', 'standplaats', 'verblijfsobject')
+        for relation in (
+            '', '__buurt', '__buurt__buurtcombinatie', '__buurt__stadsdeel',
+            '___gebiedsgerichtwerken', '___grootstedelijkgebied')
+    )
+    prefetch_related = (
+        Prefetch('verblijfsobject__panden',
+                 queryset=models.Pand.objects.select_related('bouwblok')),
+    )
+
     _display = rest.DisplayField()
     status = Status()
     type = serializers.CharField(source='get_type_display')
@@ -645,7 +670,7 @@ class NummeraanduidingDetail(BagMixin, rest.HALSerializer):
 
     woonplaats = Woonplaats()
     bouwblok = Bouwblok()
-    _geometrie = GeometryField()
+    _geometrie = rest.GeometryField()
     afstand = rest.DistanceGeometryField()
 
     nummeraanduidingidentificatie = serializers.CharField(
@@ -659,7 +684,7 @@ class NummeraanduidingDetail(BagMixin, rest.HALSerializer):
         """
         obj = super(NummeraanduidingDetail, self)
         representation = obj.to_representation(instance)
-        if representation['afstand'] is None:
+        if representation.get('afstand', False) is None:
             try:
                 representation.pop('afstand')
             except KeyError:
@@ -911,6 +936,16 @@ class VerblijfsobjectDetail(
 
 
 class PandDetail(BagMixin, BboxMixin, rest.HALSerializer):
+    # the buurt properties go through the bouwblok
+    select_related = (
+        'status',
+        'bouwblok',
+        'bouwblok__buurt',
+        'bouwblok__buurt__buurtcombinatie',
+        'bouwblok__buurt__stadsdeel',
+        'bouwblok__buurt__stadsdeel__gemeente',
+    )
+
     _display = rest.DisplayField()
     status = Status()
     verblijfsobjecten = rest.RelatedSummaryField()
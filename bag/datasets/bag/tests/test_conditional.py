@@ -0,0 +1,60 @@
+from rest_framework.test import APITestCase
+
+from batch import generation
+from datasets.bag.tests import factories as bag_factories
+
+
+class ConditionalTest(APITestCase):
+    """
+    Responses can be revalidated until the next import
+    """
+
+    def setUp(self):
+        self.pand = bag_factories.PandFactory.create()
+        generation.bump('test')
+
+    def test_not_modified(self):
+        url = f'/bag/pand/{self.pand.landelijk_id}/'
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        last_modified = response['Last-Modified']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_new_generation(self):
+        response = self.client.get('/bag/pand/')
+        etag = response['ETag']
+
+        generation.bump('test')
+
+        response = self.client.get('/bag/pand/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_per_url(self):
+        first = self.client.get('/bag/pand/')
+        second = self.client.get('/bag/pand/?page_size=5')
+        self.assertNotEqual(first['ETag'], second['ETag'])
+
+    def test_per_host(self):
+        first = self.client.get('/bag/pand/', HTTP_HOST='api.data.amsterdam.nl')
+        second = self.client.get('/bag/pand/', HTTP_HOST='acc.api.data.amsterdam.nl')
+        self.assertNotEqual(first['ETag'], second['ETag'])
+
+    def test_per_encoding(self):
+        url = '/bag/pand/export/?bouwblok=' + str(self.pand.bouwblok.id)
+        plain = self.client.get(url)
+        compressed = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertNotEqual(plain['ETag'], compressed['ETag'])
+
+        response = self.client.get(
+            url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=plain['ETag'])
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,49 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from datasets.bag.tests import factories as bag_factories
+from datasets.generic import paginator
+
+
+@override_settings(API_COUNT_ESTIMATE_THRESHOLD=100, API_COUNT_CACHE_TTL=60)
+class CountTest(APITestCase):
+    """
+    List counts are estimated or cached unless asked for exactly
+    """
+
+    def setUp(self):
+        cache.clear()
+        bag_factories.PandFactory.create_batch(3)
+
+    def test_estimated(self):
+        with mock.patch.object(paginator, 'estimate', return_value=500):
+            response = self.client.get('/bag/pand/?page_size=2')
+            self.assertEqual(response.json()['count'], 500)
+            self.assertIsNotNone(response.json()['_links']['next']['href'])
+
+            # the estimate is too high, the last page has no next
+            response = self.client.get('/bag/pand/?page_size=2&page=2')
+            self.assertEqual(len(response.json()['results']), 1)
+            self.assertIsNone(response.json()['_links']['next']['href'])
+
+            response = self.client.get('/bag/pand/?page_size=2&page=3')
+            self.assertEqual(response.status_code, 404)
+
+            response = self.client.get('/bag/pand/?count_exact=1')
+            self.assertEqual(response.json()['count'], 3)
+
+    def test_small_table_cached(self):
+        with mock.patch.object(paginator, 'estimate', return_value=3):
+            response = self.client.get('/bag/pand/')
+            self.assertEqual(response.json()['count'], 3)
+
+            bag_factories.PandFactory.create()
+
+            response = self.client.get('/bag/pand/')
+            self.assertEqual(response.json()['count'], 3)
+
+            response = self.client.get('/bag/pand/?count_exact=1')
+            self.assertEqual(response.json()['count'], 4)
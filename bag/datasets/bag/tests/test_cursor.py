@@ -0,0 +1,34 @@
+from rest_framework.test import APITestCase
+
+from datasets.bag.tests import factories as bag_factories
+
+
+class CursorTest(APITestCase):
+    """
+    Walk a list endpoint with keyset pagination
+    """
+
+    def setUp(self):
+        self.panden = bag_factories.PandFactory.create_batch(5)
+
+    def test_walk(self):
+        url = '/bag/pand/?page_size=2&cursor='
+        seen = []
+
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+
+            self.assertEqual(data['count'], 5)
+            self.assertIsNone(data['_links']['previous']['href'])
+            seen += [pand['landelijk_id'] for pand in data['results']]
+            url = data['_links']['next']['href']
+
+        self.assertEqual(
+            seen, [pand.landelijk_id for pand in
+                   sorted(self.panden, key=lambda pand: pand.id)])
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/bag/pand/?cursor=nonsense')
+        self.assertEqual(response.status_code, 404)
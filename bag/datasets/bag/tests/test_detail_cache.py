@@ -0,0 +1,87 @@
+from django.db import connection
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from batch import generation
+from datasets.bag.tests import factories as bag_factories
+from datasets.generic.detail_cache import LRUCache
+
+
+class LRUCacheTest(SimpleTestCase):
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(20)
+        cache.set('a', (b'1' * 10, 'text/plain'))
+        cache.set('b', (b'2' * 10, 'text/plain'))
+        cache.get('a')
+        cache.set('c', (b'3' * 5, 'text/plain'))
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.used, 15)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), (b'1' * 10, 'text/plain'))
+
+    def test_too_large(self):
+        cache = LRUCache(20)
+        cache.set('a', (b'1' * 21, 'text/plain'))
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.used, 0)
+
+
+@override_settings(API_DETAIL_CACHE_BYTES=1024 * 1024)
+class DetailCacheTest(APITestCase):
+    """
+    Detail responses are served from the cache until the next import
+    """
+
+    def setUp(self):
+        self.pand = bag_factories.PandFactory.create()
+        generation.bump('test')
+
+    def test_cached(self):
+        url = f'/bag/pand/{self.pand.landelijk_id}/'
+
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['Content-Type'], first['Content-Type'])
+        self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_new_generation(self):
+        url = f'/bag/pand/{self.pand.landelijk_id}/'
+        self.client.get(url)
+
+        generation.bump('test')
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.assertGreater(len(queries), 0)
+
+    def test_per_url(self):
+        url = f'/bag/pand/{self.pand.landelijk_id}/'
+        self.client.get(url)
+
+        response = self.client.get(url + '?format=xml')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('xml', response['Content-Type'])
+
+    def test_per_host(self):
+        url = f'/bag/pand/{self.pand.landelijk_id}/'
+        self.client.get(url, HTTP_HOST='api.data.amsterdam.nl')
+
+        response = self.client.get(url, HTTP_HOST='acc.api.data.amsterdam.nl')
+        self.assertIn(
+            'http://acc.api.data.amsterdam.nl/', response.data['_links']['self']['href'])
+
+    @override_settings(API_DETAIL_CACHE_MAX_ENTRY=10)
+    def test_large_not_cached(self):
+        url = f'/bag/pand/{self.pand.landelijk_id}/'
+        self.client.get(url)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.assertGreater(len(queries), 0)
@@ -0,0 +1,109 @@
+import csv
+import gzip
+import io
+import json
+from unittest import mock
+
+from rest_framework.test import APITestCase
+
+from datasets.bag.tests import factories as bag_factories
+from datasets.generic import export
+
+
+class ExportTest(APITestCase):
+    """
+    Streaming complete datasets
+    """
+
+    def setUp(self):
+        self.panden = bag_factories.PandFactory.create_batch(3)
+        self.panden.sort(key=lambda pand: pand.id)
+
+    def _content(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_export_ndjson(self):
+        response = self.client.get('/bag/pand/export/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+
+        rows = [
+            json.loads(line)
+            for line in self._content(response).decode().splitlines()]
+        self.assertEqual(
+            [row['landelijk_id'] for row in rows],
+            [pand.landelijk_id for pand in self.panden])
+        self.assertEqual(rows[0]['bouwblok'], self.panden[0].bouwblok.code)
+
+    def test_export_csv_gzip(self):
+        response = self.client.get(
+            '/bag/pand/export/', {'output': 'csv'},
+            HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+        content = gzip.decompress(self._content(response)).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[1]['pandnaam'], self.panden[1].pandnaam)
+
+    def test_export_geojson(self):
+        response = self.client.get('/bag/pand/export/', {'output': 'geojson'})
+        self.assertEqual(response.status_code, 200)
+
+        collection = json.loads(self._content(response))
+        self.assertEqual(collection['type'], 'FeatureCollection')
+        self.assertEqual(len(collection['features']), 3)
+        self.assertEqual(
+            collection['features'][0]['properties']['id'], self.panden[0].id)
+
+    def test_export_filtered(self):
+        bouwblok = self.panden[0].bouwblok
+        response = self.client.get('/bag/pand/export/', {'bouwblok': bouwblok.id})
+
+        lines = self._content(response).decode().splitlines()
+        self.assertEqual(len(lines), 1)
+
+    def test_export_invalid_output(self):
+        response = self.client.get('/bag/pand/export/', {'output': 'xml'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_export_broken_off(self):
+        def rows(*args, **kwargs):
+            yield {'id': 1}
+            raise RuntimeError('connection lost')
+
+        with mock.patch.object(export, 'rows', rows):
+            response = self.client.get('/bag/pand/export/')
+            content = response.streaming_content
+            lines = [next(content), next(content)]
+            with self.assertRaises(RuntimeError):
+                next(content)
+
+        self.assertEqual(json.loads(lines[0]), {'id': 1})
+        self.assertIn('error', json.loads(lines[1]))
+
+    def test_export_snapshot(self):
+        with mock.patch.object(
+                export, 'snapshot', return_value='pand.csv.gz') as snapshot:
+            response = self.client.get(
+                '/bag/pand/export/', {'output': 'csv'},
+                HTTP_ACCEPT_ENCODING='gzip')
+        snapshot.assert_called_with('pand', 'csv')
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response['Location'], '/bag/snapshots/pand.csv.gz')
+
+        with mock.patch.object(
+                export, 'snapshot', return_value='pand.csv.gz'):
+            response = self.client.get(
+                '/bag/pand/export/', {'bouwblok': self.panden[0].bouwblok.id},
+                HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+
+        # the snapshot is gzipped, so not for clients without gzip
+        with mock.patch.object(
+                export, 'snapshot', return_value='pand.csv.gz') as snapshot:
+            response = self.client.get('/bag/pand/export/', {'output': 'csv'})
+        snapshot.assert_not_called()
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Content-Encoding', response)
@@ -0,0 +1,63 @@
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from datasets.bag import serializers, views
+from datasets.bag.tests import factories as bag_factories
+from datasets.generic import fieldsets
+
+
+class FieldsetsTest(APITestCase):
+    """
+    Responses can be limited to the fields a client needs
+    """
+
+    def setUp(self):
+        bag_factories.NummeraanduidingFactory.create()
+
+    def test_fields(self):
+        response = self.client.get(
+            '/bag/nummeraanduiding/?detailed=1&fields=landelijk_id,postcode')
+        self.assertEqual(response.status_code, 200)
+
+        result = response.json()['results'][0]
+        self.assertEqual(
+            set(result), {'_links', 'landelijk_id', 'postcode', 'dataset'})
+        self.assertEqual(result['postcode'], '1000AN')
+
+    def test_exclude(self):
+        response = self.client.get(
+            '/bag/nummeraanduiding/?detailed=1&exclude=buurt,_geometrie')
+        self.assertEqual(response.status_code, 200)
+
+        result = response.json()['results'][0]
+        self.assertNotIn('buurt', result)
+        self.assertNotIn('_geometrie', result)
+        self.assertIn('openbare_ruimte', result)
+
+    def test_unknown(self):
+        response = self.client.get('/bag/nummeraanduiding/?fields=bestaat_niet')
+        self.assertEqual(response.status_code, 400)
+
+    def test_project(self):
+        request = Request(APIRequestFactory().get(
+            '/bag/nummeraanduiding/?fields=landelijk_id,postcode'))
+        serializer = serializers.NummeraanduidingDetail(
+            context={'request': request})
+
+        queryset = fieldsets.project(
+            views.NummeraanduidingViewSet.queryset_detail, serializer)
+
+        self.assertNotIn('JOIN', str(queryset.query))
+        self.assertEqual(queryset._prefetch_related_lookups, ())
+        deferred, _ = queryset.query.deferred_loading
+        self.assertIn('huisnummer', deferred)
+        self.assertNotIn('postcode', deferred)
+
+        # a computed field may use anything
+        request = Request(APIRequestFactory().get(
+            '/bag/nummeraanduiding/?fields=landelijk_id,buurt'))
+        serializer = serializers.NummeraanduidingDetail(
+            context={'request': request})
+        queryset = fieldsets.project(
+            views.NummeraanduidingViewSet.queryset_detail, serializer)
+        self.assertIn('JOIN', str(queryset.query))
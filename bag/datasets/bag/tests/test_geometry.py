@@ -0,0 +1,62 @@
+from django.contrib.gis.geos import GEOSGeometry, Polygon
+from rest_framework.test import APITestCase
+
+from datasets.bag.tests import factories as bag_factories
+
+
+class GeometryOutputTest(APITestCase):
+    """
+    Geometries can be rounded, simplified, shown as WKB or left out
+    """
+
+    def setUp(self):
+        # a square with an extra point just off its bottom edge
+        self.pand = bag_factories.PandFactory.create(geometrie=Polygon([
+            (121849.123456, 487303.123456),
+            (121869.123456, 487303.173456),
+            (121889.123456, 487303.123456),
+            (121889.123456, 487343.123456),
+            (121849.123456, 487343.123456),
+            (121849.123456, 487303.123456),
+        ], srid=28992))
+        self.url = f'/bag/pand/{self.pand.landelijk_id}/'
+
+    def _coordinates(self, response):
+        return response.json()['geometrie']['coordinates'][0]
+
+    def test_default(self):
+        response = self.client.get(self.url)
+        self.assertEqual(len(self._coordinates(response)), 6)
+
+    def test_precision(self):
+        response = self.client.get(self.url + '?geometry_precision=1')
+        self.assertEqual(self._coordinates(response)[0], [121849.1, 487303.1])
+
+    def test_simplify(self):
+        response = self.client.get(self.url + '?geometry_simplify=1')
+        self.assertEqual(len(self._coordinates(response)), 5)
+
+    def test_simplify_list(self):
+        response = self.client.get(
+            '/bag/pand/?detailed=1&geometry_simplify=1')
+        self.assertEqual(response.status_code, 200)
+
+        result = response.json()['results'][0]
+        self.assertEqual(len(result['geometrie']['coordinates'][0]), 5)
+        self.assertIsNotNone(result['bbox'])
+
+    def test_wkb(self):
+        response = self.client.get(self.url + '?geometry_format=wkb')
+        geom = GEOSGeometry(response.json()['geometrie'])
+        self.assertEqual(geom.num_coords, 6)
+
+    def test_none(self):
+        response = self.client.get(self.url + '?geometry_format=none')
+        self.assertIsNone(response.json()['geometrie'])
+
+    def test_invalid(self):
+        response = self.client.get(self.url + '?geometry_precision=abc')
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.get('/bag/pand/?geometry_format=gpkg')
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,57 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from datasets.bag.tests import factories as bag_factories
+from datasets.brk.tests import factories as brk_factories
+from datasets.generic.tests.authorization import AuthorizationSetup
+
+
+class QueryCountTest(APITestCase, AuthorizationSetup):
+    """
+    The number of queries of a list page does not grow with the
+    number of objects on it
+    """
+
+    def _queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            # list responses are serialized while streaming
+            self.assertIsNotNone(self.client.get(url).json())
+        return len(queries)
+
+    def assertBoundedQueries(self, url, create):
+        create(2)
+        self._queries(url)
+        few = self._queries(url)
+
+        create(4)
+        many = self._queries(url)
+        self.assertEqual(many, few)
+
+    def _nummeraanduidingen(self, n):
+        for _ in range(n):
+            nummeraanduiding = bag_factories.NummeraanduidingFactory.create()
+            bag_factories.VerblijfsobjectPandRelatie.create(
+                verblijfsobject=nummeraanduiding.verblijfsobject)
+
+    def test_nummeraanduiding(self):
+        self.assertBoundedQueries(
+            '/bag/nummeraanduiding/', self._nummeraanduidingen)
+
+    def test_nummeraanduiding_detailed(self):
+        self.assertBoundedQueries(
+            '/bag/nummeraanduiding/?detailed=1', self._nummeraanduidingen)
+
+    def test_pand_detailed(self):
+        self.assertBoundedQueries(
+            '/bag/pand/?detailed=1',
+            bag_factories.VerblijfsobjectPandRelatie.create_batch)
+
+    def test_zakelijk_recht(self):
+        self.setUpAuthorization()
+        self.client.credentials(
+            HTTP_AUTHORIZATION='Bearer {}'.format(self.token_scope_brk_ro))
+
+        self.assertBoundedQueries(
+            '/brk/zakelijk-recht/',
+            brk_factories.ZakelijkRechtFactory.create_batch)
@@ -0,0 +1,42 @@
+from rest_framework.test import APITestCase
+
+from datasets.bag import models
+from datasets.bag.serializers import PandDetail
+from datasets.bag.tests import factories as bag_factories
+from datasets.generic import rest
+
+
+class SummaryCountsTest(APITestCase):
+    """
+    Summary counts of a page are counted at once
+    """
+
+    def setUp(self):
+        self.pand = bag_factories.PandFactory.create()
+        self.leeg = bag_factories.PandFactory.create()
+
+        for _ in range(3):
+            bag_factories.VerblijfsobjectPandRelatie.create(pand=self.pand)
+
+    def test_prefetch_summary_counts(self):
+        panden = list(models.Pand.objects.order_by('id'))
+
+        with self.assertNumQueries(1):
+            rest.prefetch_summary_counts(panden, PandDetail())
+
+        counts = {
+            pand.id: getattr(pand, rest.SUMMARY_COUNTS)['verblijfsobjecten']
+            for pand in panden
+        }
+        self.assertEqual(counts, {self.pand.id: 3, self.leeg.id: 0})
+
+    def test_detailed_list(self):
+        response = self.client.get('/bag/pand/?detailed=1')
+        self.assertEqual(response.status_code, 200)
+
+        counts = {
+            pand['pandidentificatie']: pand['verblijfsobjecten']['count']
+            for pand in response.json()['results']
+        }
+        self.assertEqual(counts[self.pand.landelijk_id], 3)
+        self.assertEqual(counts[self.leeg.landelijk_id], 0)
@@ -13,6 +13,7 @@ from rest_framework.metadata import SimpleMetadata
 from rest_framework import serializers as validation
 
 from datasets.generic import rest
+from datasets.generic.export import ExportMixin
 from . import serializers, models
 
 
@@ -62,7 +63,7 @@ class ExpansionMetadata(SimpleMetadata):
         return result
 
 
-class LigplaatsViewSet(rest.DatapuntViewSet):
+class LigplaatsViewSet(ExportMixin, rest.DatapuntViewSet):
     """
     Ligplaats
 
@@ -89,6 +90,19 @@ class LigplaatsViewSet(rest.DatapuntViewSet):
     )
     serializer_detail_class = serializers.LigplaatsDetail
     serializer_class = serializers.Ligplaats
+    export_fields = (
+        'id', 'landelijk_id',
+        ('status', 'status__omschrijving'),
+        ('openbare_ruimte_naam', '_openbare_ruimte_naam'),
+        ('huisnummer', '_huisnummer'),
+        ('huisletter', '_huisletter'),
+        ('huisnummer_toevoeging', '_huisnummer_toevoeging'),
+        ('buurt', 'buurt__vollcode'),
+        'indicatie_geconstateerd', 'indicatie_in_onderzoek',
+        'begin_geldigheid', 'einde_geldigheid',
+        'document_mutatie', 'document_nummer', 'date_modified',
+    )
+    export_geometry = 'geometrie'
     filter_fields = ('buurt', 'buurt__vollcode', 'landelijk_id')
 
     def get_object(self):
@@ -101,7 +115,7 @@ class LigplaatsViewSet(rest.DatapuntViewSet):
         return obj
 
 
-class StandplaatsViewSet(rest.DatapuntViewSet):
+class StandplaatsViewSet(ExportMixin, rest.DatapuntViewSet):
     """
     Standplaats
 
@@ -125,6 +139,19 @@ class StandplaatsViewSet(rest.DatapuntViewSet):
     )
     serializer_detail_class = serializers.StandplaatsDetail
     serializer_class = serializers.Standplaats
+    export_fields = (
+        'id', 'landelijk_id',
+        ('status', 'status__omschrijving'),
+        ('openbare_ruimte_naam', '_openbare_ruimte_naam'),
+        ('huisnummer', '_huisnummer'),
+        ('huisletter', '_huisletter'),
+        ('huisnummer_toevoeging', '_huisnummer_toevoeging'),
+        ('buurt', 'buurt__vollcode'),
+        'indicatie_geconstateerd', 'indicatie_in_onderzoek',
+        'begin_geldigheid', 'einde_geldigheid',
+        'document_mutatie', 'document_nummer', 'date_modified',
+    )
+    export_geometry = 'geometrie'
     filter_fields = (
         'buurt',
         'buurt__vollcode',
@@ -173,7 +200,7 @@ class VerblijfsobjectFilter(FilterSet):
             return queryset.filter(panden__id=value)
 
 
-class VerblijfsobjectViewSet(rest.DatapuntViewSet):
+class VerblijfsobjectViewSet(ExportMixin, rest.DatapuntViewSet):
     """
     Verblijfsobject
 
@@ -208,6 +235,29 @@ class VerblijfsobjectViewSet(rest.DatapuntViewSet):
     )
     serializer_detail_class = serializers.VerblijfsobjectDetail
     serializer_class = serializers.Verblijfsobject
+    export_fields = (
+        'id', 'landelijk_id',
+        ('status', 'status__omschrijving'),
+        ('openbare_ruimte_naam', '_openbare_ruimte_naam'),
+        ('huisnummer', '_huisnummer'),
+        ('huisletter', '_huisletter'),
+        ('huisnummer_toevoeging', '_huisnummer_toevoeging'),
+        'oppervlakte', 'bouwlaag_toegang', 'bouwlagen',
+        'verhuurbare_eenheden', 'aantal_kamers', 'woningvoorraad',
+        'type_woonobject_omschrijving', 'status_coordinaat_omschrijving',
+        ('gebruik', 'gebruik__omschrijving'),
+        ('eigendomsverhouding', 'eigendomsverhouding__omschrijving'),
+        ('financieringswijze', 'financieringswijze__omschrijving'),
+        ('ligging', 'ligging__omschrijving'),
+        ('toegang', 'toegang__omschrijving'),
+        ('reden_opvoer', 'reden_opvoer__omschrijving'),
+        ('reden_afvoer', 'reden_afvoer__omschrijving'),
+        ('buurt', 'buurt__vollcode'),
+        'indicatie_geconstateerd', 'indicatie_in_onderzoek',
+        'begin_geldigheid', 'einde_geldigheid',
+        'document_mutatie', 'document_nummer', 'date_modified',
+    )
+    export_geometry = 'geometrie'
 
     filter_class = VerblijfsobjectFilter
 
@@ -347,7 +397,7 @@ class NummeraanduidingFilter(FilterSet):
         return queryset
 
 
-class NummeraanduidingViewSet(rest.DatapuntViewSet):
+class NummeraanduidingViewSet(ExportMixin, rest.DatapuntViewSet):
     """
     Nummeraanduiding
 
@@ -391,6 +441,20 @@ class NummeraanduidingViewSet(rest.DatapuntViewSet):
     )
     serializer_detail_class = serializers.NummeraanduidingDetail
     serializer_class = serializers.Nummeraanduiding
+    export_fields = (
+        'id', 'landelijk_id',
+        ('status', 'status__omschrijving'),
+        ('openbare_ruimte', 'openbare_ruimte__landelijk_id'),
+        ('openbare_ruimte_naam', '_openbare_ruimte_naam'),
+        'huisnummer', 'huisletter', 'huisnummer_toevoeging', 'postcode',
+        'type', 'hoofdadres',
+        ('verblijfsobject', 'verblijfsobject__landelijk_id'),
+        ('ligplaats', 'ligplaats__landelijk_id'),
+        ('standplaats', 'standplaats__landelijk_id'),
+        'begin_geldigheid', 'einde_geldigheid',
+        'document_mutatie', 'document_nummer', 'date_modified',
+    )
+    export_geometry = '_geom'
     filter_class = NummeraanduidingFilter
     detailed_keyword = 'detailed'
 
@@ -474,7 +538,7 @@ class PandPager(rest.HALPagination):
     max_page_size = 100
 
 
-class PandViewSet(rest.DatapuntViewSet):
+class PandViewSet(ExportMixin, rest.DatapuntViewSet):
     """
     Pand
 
@@ -510,6 +574,16 @@ class PandViewSet(rest.DatapuntViewSet):
 
     serializer_detail_class = serializers.PandDetail
     serializer_class = serializers.Pand
+    export_fields = (
+        'id', 'landelijk_id',
+        ('status', 'status__omschrijving'),
+        'bouwjaar', 'laagste_bouwlaag', 'hoogste_bouwlaag',
+        'pandnummer', 'pandnaam',
+        ('bouwblok', 'bouwblok__code'),
+        'begin_geldigheid', 'einde_geldigheid',
+        'document_mutatie', 'document_nummer', 'date_modified',
+    )
+    export_geometry = 'geometrie'
     pagination_class = PandPager
 
     filter_class = PandenFilter
@@ -570,7 +644,7 @@ class OpenbareRuimteFilter(FilterSet):
         return opr.order_by('afstand')
 
 
-class OpenbareRuimteViewSet(rest.DatapuntViewSet):
+class OpenbareRuimteViewSet(ExportMixin, rest.DatapuntViewSet):
     """
     OpenbareRuimte
 
@@ -595,6 +669,15 @@ class OpenbareRuimteViewSet(rest.DatapuntViewSet):
     queryset = models.OpenbareRuimte.objects.distinct()
     serializer_detail_class = serializers.OpenbareRuimteDetail
     serializer_class = serializers.OpenbareRuimte
+    export_fields = (
+        'id', 'landelijk_id',
+        ('status', 'status__omschrijving'),
+        'type', 'naam', 'code', 'straat_nummer', 'naam_nen', 'naam_ptt',
+        ('woonplaats', 'woonplaats__landelijk_id'),
+        'begin_geldigheid', 'einde_geldigheid',
+        'document_mutatie', 'document_nummer', 'date_modified',
+    )
+    export_geometry = 'geometrie'
 
     filter_class = OpenbareRuimteFilter
 
@@ -641,7 +724,7 @@ class WoonplaatsViewSet(rest.DatapuntViewSet):
         return obj
 
 
-class StadsdeelViewSet(rest.DatapuntViewSet):
+class StadsdeelViewSet(ExportMixin, rest.DatapuntViewSet):
     """
     Stadsdeel
 
@@ -659,6 +742,13 @@ class StadsdeelViewSet(rest.DatapuntViewSet):
     )
     serializer_detail_class = serializers.StadsdeelDetail
     serializer_class = serializers.Stadsdeel
+    export_fields = (
+        'id', 'code', 'naam',
+        ('gemeente', 'gemeente__naam'),
+        'ingang_cyclus', 'brondocument_naam', 'brondocument_datum',
+        'begin_geldigheid', 'einde_geldigheid', 'date_modified',
+    )
+    export_geometry = 'geometrie'
 
     filter_fields = ('code',)
 
@@ -672,7 +762,7 @@ class StadsdeelViewSet(rest.DatapuntViewSet):
         return obj
 
 
-class BuurtViewSet(rest.DatapuntViewSet):
+class BuurtViewSet(ExportMixin, rest.DatapuntViewSet):
     """
     Buurt
 
@@ -693,12 +783,21 @@ class BuurtViewSet(rest.DatapuntViewSet):
     )
     serializer_detail_class = serializers.BuurtDetail
     serializer_class = serializers.Buurt
+    export_fields = (
+        'id', 'code', 'vollcode', 'naam',
+        ('stadsdeel', 'stadsdeel__code'),
+        ('buurtcombinatie', 'buurtcombinatie__vollcode'),
+        ('gebiedsgerichtwerken', 'gebiedsgerichtwerken__code'),
+        'ingang_cyclus', 'brondocument_naam', 'brondocument_datum',
+        'begin_geldigheid', 'einde_geldigheid', 'date_modified',
+    )
+    export_geometry = 'geometrie'
     filter_fields = (
         'stadsdeel', 'buurtcombinatie', 'gebiedsgerichtwerken',
         'code', 'vollcode')
 
 
-class BouwblokViewSet(rest.DatapuntViewSet):
+class BouwblokViewSet(ExportMixin, rest.DatapuntViewSet):
     """
     Bouwblok
 
@@ -721,6 +820,13 @@ class BouwblokViewSet(rest.DatapuntViewSet):
     )
     serializer_detail_class = serializers.BouwblokDetail
     serializer_class = serializers.Bouwblok
+    export_fields = (
+        'id', 'code',
+        ('buurt', 'buurt__vollcode'),
+        'ingang_cyclus', 'begin_geldigheid', 'einde_geldigheid',
+        'date_modified',
+    )
+    export_geometry = 'geometrie'
     filter_fields = ('buurt', 'code')
 
     def get_object(self):
@@ -733,7 +839,7 @@ class BouwblokViewSet(rest.DatapuntViewSet):
         return obj
 
 
-class BuurtcombinatieViewSet(rest.DatapuntViewSet):
+class BuurtcombinatieViewSet(ExportMixin, rest.DatapuntViewSet):
     """
     Buurtcombinatie
 
@@ -752,12 +858,19 @@ class BuurtcombinatieViewSet(rest.DatapuntViewSet):
     )
     serializer_detail_class = serializers.BuurtcombinatieDetail
     serializer_class = serializers.Buurtcombinatie
+    export_fields = (
+        'id', 'code', 'vollcode', 'naam',
+        ('stadsdeel', 'stadsdeel__code'),
+        'ingang_cyclus', 'brondocument_naam', 'brondocument_datum',
+        'begin_geldigheid', 'einde_geldigheid', 'date_modified',
+    )
+    export_geometry = 'geometrie'
     filter_fields = (
         'stadsdeel', 'vollcode', 'code', 'naam', 'stadsdeel',
         'buurten')
 
 
-class GebiedsgerichtwerkenViewSet(rest.DatapuntViewSet):
+class GebiedsgerichtwerkenViewSet(ExportMixin, rest.DatapuntViewSet):
     """
     Gebiedsgerichtwerken
 
@@ -774,6 +887,12 @@ class GebiedsgerichtwerkenViewSet(rest.DatapuntViewSet):
     queryset = models.Gebiedsgerichtwerken.objects.all().order_by('naam')
     serializer_detail_class = serializers.GebiedsgerichtwerkenDetail
     serializer_class = serializers.Gebiedsgerichtwerken
+    export_fields = (
+        'id', 'code', 'naam',
+        ('stadsdeel', 'stadsdeel__code'),
+        'date_modified',
+    )
+    export_geometry = 'geometrie'
 
     filter_fields = ('stadsdeel__id', 'stadsdeel')
 
@@ -797,7 +916,7 @@ class GebiedsgerichtwerkenPraktijkgebiedenViewSet(rest.DatapuntViewSet):
     serializer_class = serializers.GebiedsgerichtwerkenPraktijkgebieden
 
 
-class GrootstedelijkgebiedViewSet(rest.DatapuntViewSet):
+class GrootstedelijkgebiedViewSet(ExportMixin, rest.DatapuntViewSet):
     """
     Grootstedelijkgebied
 
@@ -812,9 +931,11 @@ class GrootstedelijkgebiedViewSet(rest.DatapuntViewSet):
     queryset = models.Grootstedelijkgebied.objects.all().order_by('naam')
     serializer_detail_class = serializers.GrootstedelijkgebiedDetail
     serializer_class = serializers.Grootstedelijkgebied
+    export_fields = ('id', 'naam', 'gsg_type', 'date_modified')
+    export_geometry = 'geometrie'
 
 
-class UnescoViewSet(rest.DatapuntViewSet):
+class UnescoViewSet(ExportMixin, rest.DatapuntViewSet):
     """
     Unseco
 
@@ -831,6 +952,8 @@ class UnescoViewSet(rest.DatapuntViewSet):
     queryset = models.Unesco.objects.all()
     serializer_detail_class = serializers.UnescoDetail
     serializer_class = serializers.Unesco
+    export_fields = ('id', 'naam', 'date_modified')
+    export_geometry = 'geometrie'
 
 
 class BouwblokCodeView(RedirectView):
@@ -466,7 +466,7 @@ class KadastraalSubjectDetail(KadastraalSubjectDetailWithPersonalData):
             return data
 
         # We are employee and should not see 'rechten' / eigendommen
-        data.pop('rechten')
+        data.pop('rechten', None)
 
         return data
 
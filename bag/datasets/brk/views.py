@@ -489,13 +489,15 @@ class ZakelijkRechtViewSet(DatapuntViewSet):
         only plus users can see natuurlijke personen
         """
 
+        queryset = super().get_queryset()
+
         # find all items but not natuurlijke personen
         if self.request.is_authorized_for(authorization_levels.SCOPE_BRK_RO) or \
                 self.request.is_authorized_for(authorization_levels.SCOPE_BRK_RS):
-            return self.queryset
+            return queryset
 
         # return empty qs
-        return self.queryset.none()
+        return queryset.none()
 
     @action(detail=True, methods=['get'])
     def subject(self, request, pk=None, *args, **kwargs):
@@ -0,0 +1,82 @@
+"""
+Conditional requests on the import generation.
+
+The data only changes with an import, so a response stays the same
+as long as the import generation, the absolute url, the media type
+and the authorization scopes of the request stay the same. The ETag
+is derived from those and the content encoding of the response,
+Last-Modified is the start of the generation. A request with a
+matching If-None-Match or If-Modified-Since is answered with 304
+before any query is done.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from batch import generation
+from search.isolation import scopes
+
+
+def validators(request, encoding: str = ''):
+    """
+    The (etag, last modified timestamp) of the response to `request`
+    in content `encoding`, (None, None) when the generation is unknown
+    """
+    generation_id = generation.current()
+    created = generation.created()
+    if not settings.API_CONDITIONAL or not generation_id or created is None:
+        return None, None
+
+    parts = [
+        str(generation_id),
+        # the links in a response are absolute
+        request.build_absolute_uri(),
+        getattr(request, 'accepted_media_type', None) or '',
+        ','.join(scopes(request)),
+        encoding,
+    ]
+    etag = hashlib.sha1('\n'.join(parts).encode()).hexdigest()
+    return quote_etag(etag), int(created.timestamp())
+
+
+def set_headers(response, etag, last_modified):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    # the response differs per media type and authorization
+    patch_vary_headers(response, ('Accept', 'Authorization'))
+
+
+def not_modified(request):
+    """
+    A 304 response when the client has the current response already.
+    Only responses without content encoding are answered here
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return None
+
+    etag, last_modified = validators(request)
+    if etag is None:
+        return None
+
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        set_headers(response, etag, last_modified)
+    return response
+
+
+def add_validators(request, response):
+    """
+    Add the ETag and Last-Modified of `request` to a successful response
+    """
+    if request.method not in ('GET', 'HEAD') or response.status_code != 200:
+        return response
+
+    etag, last_modified = validators(
+        request, response.get('Content-Encoding', ''))
+    if etag is not None:
+        set_headers(response, etag, last_modified)
+    return response
@@ -0,0 +1,169 @@
+"""
+Cache of rendered detail responses.
+
+Detail responses only change with an import. They are cached per
+import generation, absolute url (host, view, pk or landelijk id and
+parameters), media type and authorization scopes, so data behind a
+scope is never served to a request without it and links always point
+to the host that was asked.
+
+Every process keeps the most recent responses in memory, up to
+API_DETAIL_CACHE_BYTES of content. With API_DETAIL_CACHE set, the
+responses are shared through that django cache as well. Responses
+over API_DETAIL_CACHE_MAX_ENTRY bytes (large geometries) are not
+cached.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+from batch import generation
+from search.isolation import scopes
+
+# attribute on the request holding the cache key of its response
+_REQUEST_ATTR = '_detail_cache_key'
+
+
+def _content_size(value) -> int:
+    content, _content_type = value
+    return len(content)
+
+
+class LRUCache(object):
+    """
+    Keeps the most recently used entries, `size` bytes at most as
+    measured by `sizeof`
+    """
+
+    def __init__(self, size: int, sizeof=_content_size):
+        self.size = size
+        self.sizeof = sizeof
+        self.used = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, value):
+        entry_size = self.sizeof(value)
+        if entry_size > self.size:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.used -= previous[1]
+            self._entries[key] = (value, entry_size)
+            self.used += entry_size
+            while self.used > self.size:
+                _key, (_value, evicted) = self._entries.popitem(last=False)
+                self.used -= evicted
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.used = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_local = None
+_local_generation = None
+
+
+def _local_cache() -> LRUCache:
+    """
+    The in process cache, emptied when the generation changes
+    """
+    global _local, _local_generation
+
+    current = generation.current()
+    if _local is None or _local_generation != current or \
+            _local.size != settings.API_DETAIL_CACHE_BYTES:
+        _local = LRUCache(settings.API_DETAIL_CACHE_BYTES)
+        _local_generation = current
+    return _local
+
+
+def _shared_cache():
+    if not settings.API_DETAIL_CACHE:
+        return None
+    return caches[settings.API_DETAIL_CACHE]
+
+
+def enabled() -> bool:
+    return settings.API_DETAIL_CACHE_BYTES > 0 or bool(settings.API_DETAIL_CACHE)
+
+
+def cache_key(request, view_name: str) -> str:
+    parts = [
+        str(generation.current()),
+        view_name,
+        # the links in a response are absolute
+        request.build_absolute_uri(),
+        getattr(request, 'accepted_media_type', None) or '',
+        ','.join(scopes(request)),
+    ]
+    return 'detail:' + hashlib.sha1('\n'.join(parts).encode()).hexdigest()
+
+
+def get(request, view_name: str):
+    """
+    The cached response to `request`, None on a miss. On a miss the
+    response of the request is cached by `store`
+    """
+    key = cache_key(request, view_name)
+
+    local = _local_cache()
+    value = local.get(key)
+
+    shared = _shared_cache()
+    if value is None and shared is not None:
+        value = shared.get(key)
+        if value is not None:
+            local.set(key, value)
+
+    if value is None:
+        setattr(request, _REQUEST_ATTR, key)
+        return None
+
+    content, content_type = value
+    return HttpResponse(content, content_type=content_type)
+
+
+def store(request, response):
+    """
+    Cache the rendered `response` when `get` missed for `request`
+    """
+    key = getattr(request, _REQUEST_ATTR, None)
+    if key is None or response.status_code != 200 or \
+            not hasattr(response, 'render'):
+        return response
+
+    # the browsable api is rendered for the user
+    renderer = getattr(response, 'accepted_renderer', None)
+    if renderer is None or renderer.format == 'api':
+        return response
+
+    response.render()
+    if len(response.content) > settings.API_DETAIL_CACHE_MAX_ENTRY:
+        return response
+    value = (response.content, response['Content-Type'])
+
+    _local_cache().set(key, value)
+    shared = _shared_cache()
+    if shared is not None:
+        shared.set(key, value, timeout=settings.API_DETAIL_CACHE_TTL)
+
+    return response
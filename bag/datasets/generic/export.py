@@ -0,0 +1,246 @@
+"""
+Streaming exports of complete datasets.
+
+Reconstructing a dataset by paging through the HAL list endpoints costs
+thousands of requests. An export streams the whole (filtered) table in
+one response instead: flat columns, read from postgres with a server
+side cursor and written as NDJSON, CSV or GeoJSON, in constant memory.
+
+Clients that accept it get the export gzip compressed. A complete,
+unfiltered export is served from the snapshot of the current import
+generation when there is one, see `snapshots`. When reading the table
+fails halfway the export ends with an error line and is aborted, a
+compressed export then lacks its gzip trailer as well.
+
+Exports take longer than the harakiri of a normal request, uwsgi
+gives the `/export/` routes a longer one (docker-compose.yml).
+"""
+
+import json
+import zlib
+from collections import OrderedDict
+
+from django.contrib.gis.db.models.functions import AsGeoJSON
+from django.http import HttpResponseRedirect, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.cache import patch_vary_headers
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from batch import generation
+from datasets.generic import streaming
+
+GEOJSON_CONTENT_TYPE = 'application/geo+json'
+
+FORMATS = {
+    'ndjson': streaming.NDJSON_CONTENT_TYPE,
+    'csv': streaming.CSV_CONTENT_TYPE,
+    'geojson': GEOJSON_CONTENT_TYPE,
+}
+
+# column of the geometry, as geojson
+GEOMETRY = 'geometrie'
+
+# the geometries are in the dutch national grid
+CRS = {'type': 'name', 'properties': {'name': 'EPSG:28992'}}
+
+# rows fetched from the server side cursor at once
+CHUNK_SIZE = 2000
+
+# compressed output is sent in parts of at least this many bytes
+GZIP_CHUNK_SIZE = 64 * 1024
+
+# parameters of an export that do not filter it
+UNFILTERED = {'output', 'format'}
+
+
+def columns(fields) -> OrderedDict:
+    """
+    Column name -> lookup of export `fields`, given as names or as
+    (name, lookup) pairs
+    """
+    result = OrderedDict()
+    for field in fields:
+        if isinstance(field, str):
+            result[field] = field
+        else:
+            name, lookup = field
+            result[name] = lookup
+    return result
+
+
+def rows(queryset, fields, geometry: str = None, chunk_size=CHUNK_SIZE):
+    """
+    Yield the flat rows of `queryset`, in primary key order
+    """
+    lookups = columns(fields)
+    names = list(lookups)
+    values = list(lookups.values())
+
+    if geometry:
+        queryset = queryset.annotate(_export_geometrie=AsGeoJSON(geometry))
+        names.append(GEOMETRY)
+        values.append('_export_geometrie')
+
+    queryset = queryset.order_by('pk').values_list(*values)
+
+    for row in queryset.iterator(chunk_size=chunk_size):
+        yield OrderedDict(zip(names, row))
+
+
+def _parse_geometry(row: dict) -> dict:
+    if row.get(GEOMETRY):
+        row[GEOMETRY] = json.loads(row[GEOMETRY])
+    return row
+
+
+def _dumps(data) -> str:
+    return json.dumps(data, cls=JSONEncoder, ensure_ascii=False)
+
+
+def geojson_lines(rows_):
+    """
+    Yield a GeoJSON FeatureCollection, a feature per line
+    """
+    yield f'{{"type":"FeatureCollection","crs":{_dumps(CRS)},"features":[\n'
+
+    separator = ''
+    for row in rows_:
+        geometry = row.pop(GEOMETRY, None)
+        feature = OrderedDict([
+            ('type', 'Feature'),
+            ('properties', row),
+        ])
+        yield f'{separator}{_dumps(feature)[:-1]}'
+        # splice the geojson of the database in as is
+        yield f',"geometry":{geometry or "null"}}}'
+        separator = ',\n'
+
+    yield '\n]}\n'
+
+
+def lines(rows_, output: str):
+    if output == 'geojson':
+        return geojson_lines(rows_)
+    if output == 'csv':
+        return streaming.csv_lines(rows_)
+    return streaming.ndjson_lines(_parse_geometry(row) for row in rows_)
+
+
+def snapshot(dataset: str, output: str) -> str:
+    """
+    The name of the snapshot file of `dataset` in `output` format of
+    the current import generation, None when there is none
+    """
+    # imported here, snapshots are written with this module
+    from datasets.generic import snapshots
+
+    manifest = snapshots.latest()
+    if manifest is None or \
+            manifest['tag'].split('-')[-1] != str(generation.current()):
+        return None
+
+    name = f'{dataset}.{output}.gz'
+    for entry in manifest['files']:
+        if entry['name'] == name:
+            return name
+    return None
+
+
+def gzip_chunks(lines_, chunk_size=GZIP_CHUNK_SIZE):
+    """
+    Gzip compress text lines into chunks of about `chunk_size` bytes
+    """
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    buffer = []
+    size = 0
+
+    for line in lines_:
+        data = compressor.compress(line.encode())
+        if data:
+            buffer.append(data)
+            size += len(data)
+        if size >= chunk_size:
+            yield b''.join(buffer)
+            buffer = []
+            size = 0
+
+    buffer.append(compressor.flush())
+    yield b''.join(buffer)
+
+
+def accepts_gzip(request) -> bool:
+    encodings = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    return 'gzip' in [
+        encoding.split(';')[0].strip() for encoding in encodings.split(',')]
+
+
+class ExportMixin(object):
+    """
+    Adds an `export` endpoint streaming the whole, filtered, queryset
+    of the viewset with the columns in `export_fields`
+    """
+
+    # names or (name, lookup) pairs of the exported columns
+    export_fields = ()
+    # geometry field exported as geojson, if any
+    export_geometry = None
+
+    def get_export_queryset(self):
+        return self.filter_queryset(self.get_queryset())
+
+    @action(detail=False)
+    def export(self, request, *args, **kwargs):
+        """
+        Stream all objects, filtered like the list
+
+        ---
+        parameters:
+            - name: output
+              description: ndjson (default), csv or geojson
+              required: false
+        """
+        output = request.query_params.get('output', 'ndjson')
+
+        if output not in FORMATS or \
+                (output == 'geojson' and not self.export_geometry):
+            formats = [
+                name for name in FORMATS
+                if name != 'geojson' or self.export_geometry]
+            return Response(
+                f'output must be one of {", ".join(formats)}', status=400)
+
+        compress = accepts_gzip(request)
+
+        # snapshots are stored gzipped, for clients taking gzip only
+        if compress and set(request.query_params) <= UNFILTERED:
+            # the router prefix the snapshots are named after
+            dataset = request.path.rstrip('/').split('/')[-2]
+            name = snapshot(dataset, output)
+            if name is not None:
+                response = HttpResponseRedirect(
+                    reverse('snapshot-detail', kwargs={'name': name}))
+                patch_vary_headers(response, ('Accept-Encoding',))
+                return response
+
+        content = streaming.guarded(lines(
+            rows(self.get_export_queryset(), self.export_fields,
+                 self.export_geometry),
+            output), output)
+
+        if compress:
+            content = gzip_chunks(content)
+
+        response = StreamingHttpResponse(
+            content, content_type=FORMATS[output])
+
+        if compress:
+            response['Content-Encoding'] = 'gzip'
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        filename = getattr(self, 'basename', None) or 'export'
+        response['Content-Disposition'] = \
+            f'attachment; filename="{filename}.{output}"'
+
+        return response
@@ -0,0 +1,129 @@
+"""
+Sparse fieldsets.
+
+`?fields=landelijk_id,postcode` limits a response to the given fields,
+`?exclude=_geometrie` leaves fields out. Only the fields of the
+requested objects can be named, nested objects are shown or left out
+as a whole. The `_links` of an object are always shown.
+
+When all remaining fields are columns or relations of the model, the
+queryset is projected on them as well: unused columns are deferred
+and unused joins and prefetches are dropped. A field computed by the
+model (a property or method) may use anything, then the queryset is
+left as it is.
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+FIELDS_PARAM = 'fields'
+EXCLUDE_PARAM = 'exclude'
+
+
+def _names(request, param):
+    value = request.query_params.get(param, '')
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def requested(request) -> bool:
+    return request is not None and (
+        FIELDS_PARAM in request.query_params or
+        EXCLUDE_PARAM in request.query_params)
+
+
+def select(fields, request, always=()):
+    """
+    The `fields` (name -> field) of a serializer selected by the
+    `fields` and `exclude` parameters of `request`
+    """
+    only = _names(request, FIELDS_PARAM)
+    exclude = _names(request, EXCLUDE_PARAM)
+
+    unknown = [name for name in only + exclude if name not in fields]
+    if unknown:
+        raise serializers.ValidationError({
+            FIELDS_PARAM if only else EXCLUDE_PARAM:
+                f"Unknown fields: {', '.join(unknown)}"})
+
+    for name in list(fields):
+        if name in always:
+            continue
+        if (only and name not in only) or name in exclude:
+            del fields[name]
+
+    return fields
+
+
+def _used(serializer, model):
+    """
+    The (columns, relations) of `model` used by the fields of
+    `serializer`, None when a field uses something else
+    """
+    columns = {model._meta.pk.attname}
+    relations = set()
+
+    for field in serializer.fields.values():
+        if field.source == '*':
+            if isinstance(field, serializers.HyperlinkedIdentityField):
+                # links use the landelijk id when there is one
+                columns.add('landelijk_id')
+                continue
+            return None
+
+        name = field.source_attrs[0]
+        try:
+            model_field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+
+        if model_field.is_relation:
+            relations.add(name)
+        if model_field.concrete:
+            columns.add(model_field.attname)
+
+    return columns, relations
+
+
+def _paths(select_related, prefix=''):
+    for name, nested in select_related.items():
+        yield prefix + name
+        yield from _paths(nested, f'{prefix}{name}__')
+
+
+def project(queryset, serializer):
+    """
+    `queryset` without the columns, joins and prefetches the fields
+    of `serializer` do not use
+    """
+    model = queryset.model
+    used = _used(serializer, model)
+    if used is None:
+        return queryset
+    columns, relations = used
+
+    select_related = queryset.query.select_related
+    if select_related is True:
+        select_related = {name: {} for name in relations}
+    elif not select_related:
+        select_related = {}
+    joins = [path for path in _paths(select_related)
+             if path.split('__')[0] in relations and
+             model._meta.get_field(path.split('__')[0]).concrete]
+
+    prefetches = [
+        lookup for lookup in queryset._prefetch_related_lookups
+        if (lookup.prefetch_through if isinstance(lookup, Prefetch)
+            else lookup).split('__')[0] in relations]
+
+    deferred = [field.name for field in model._meta.concrete_fields
+                if field.attname not in columns]
+
+    queryset = queryset.select_related(None).prefetch_related(None)
+    if joins:
+        queryset = queryset.select_related(*joins)
+    if prefetches:
+        queryset = queryset.prefetch_related(*prefetches)
+    if deferred:
+        queryset = queryset.defer(*deferred)
+    return queryset
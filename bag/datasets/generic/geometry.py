@@ -0,0 +1,213 @@
+"""
+Geometry output controls.
+
+Large polygons (stadsdelen, openbare ruimtes) are hundreds of KB of
+GeoJSON, mostly decimals. The geometries of a response can be shrunk
+with:
+
+- `geometry_precision=<n>`: round coordinates to n decimals
+- `geometry_simplify=<meters>`: simplify with the given tolerance,
+  preserving topology
+- `geometry_format=geojson|wkb|none`: GeoJSON (default), hex encoded
+  WKB, or no geometry at all
+
+In list responses the geometries of a page are simplified by postgis
+(`ST_SimplifyPreserveTopology`) in one query, the full geometries are
+not fetched. Elsewhere they are simplified by GEOS.
+
+`exclude=geometrie` leaves the geometry out of the query as well.
+"""
+
+import json
+from collections import namedtuple
+
+from django.db.models import F, Func, Value
+from rest_framework import serializers
+
+PRECISION_PARAM = 'geometry_precision'
+SIMPLIFY_PARAM = 'geometry_simplify'
+FORMAT_PARAM = 'geometry_format'
+FORMATS = ('geojson', 'wkb', 'none')
+
+MAX_PRECISION = 15
+
+# attribute of an instance holding its simplified geometries by name
+SIMPLIFIED = '_simplified_geometries'
+# attribute on the request holding the parsed options
+_REQUEST_ATTR = '_geometry_options'
+
+Options = namedtuple('Options', ['precision', 'simplify', 'format'])
+DEFAULT = Options(None, None, 'geojson')
+
+# A geometry value and whether it is simplified already
+Geometry = namedtuple('Geometry', ['value', 'simplified'])
+
+
+def _number(request, param, convert, minimum, maximum=None):
+    value = request.query_params.get(param)
+    if value in (None, ''):
+        return None
+    try:
+        number = convert(value)
+    except ValueError:
+        number = None
+    if number is None or number < minimum or \
+            (maximum is not None and number > maximum):
+        raise serializers.ValidationError({param: f'Invalid value: {value}'})
+    return number
+
+
+def options(request) -> Options:
+    """
+    The geometry options of `request`, a ValidationError when invalid
+    """
+    if request is None:
+        return DEFAULT
+
+    parsed = getattr(request, _REQUEST_ATTR, None)
+    if parsed is not None:
+        return parsed
+
+    output = request.query_params.get(FORMAT_PARAM) or DEFAULT.format
+    if output not in FORMATS:
+        raise serializers.ValidationError(
+            {FORMAT_PARAM: f"Choose one of {', '.join(FORMATS)}"})
+
+    parsed = Options(
+        precision=_number(request, PRECISION_PARAM, int, 0, MAX_PRECISION),
+        simplify=_number(request, SIMPLIFY_PARAM, float, 0) or None,
+        format=output,
+    )
+    setattr(request, _REQUEST_ATTR, parsed)
+    return parsed
+
+
+def _round(coordinates, precision):
+    if isinstance(coordinates, (list, tuple)):
+        return [_round(c, precision) for c in coordinates]
+    return round(coordinates, precision)
+
+
+def represent(geometry: Geometry, request):
+    """
+    The representation of `geometry` asked for by `request`
+    """
+    opts = options(request)
+    geom = geometry.value
+
+    if opts.format == 'none':
+        return None
+
+    if opts.simplify and not geometry.simplified:
+        geom = geom.simplify(opts.simplify, preserve_topology=True)
+
+    if opts.format == 'wkb':
+        wkb = geom.hex
+        return wkb.decode() if isinstance(wkb, bytes) else wkb
+
+    geojson = json.loads(geom.geojson)
+    if opts.precision is not None:
+        for part in geojson.get('geometries', [geojson]):
+            part['coordinates'] = _round(part['coordinates'], opts.precision)
+    return geojson
+
+
+def value(instance, name):
+    """
+    The geometry `name` of `instance`, simplified when it is prefetched
+    """
+    simplified = getattr(instance, SIMPLIFIED, {})
+    if name in simplified:
+        return simplified[name]
+    return getattr(instance, name)
+
+
+class GeometryField(serializers.Field):
+    """
+    A geometry shown as asked for by the request
+    """
+
+    def get_attribute(self, instance):
+        if len(self.source_attrs) == 1:
+            name = self.source_attrs[0]
+            simplified = getattr(instance, SIMPLIFIED, {})
+            if name in simplified:
+                return Geometry(simplified[name], True)
+        geom = super().get_attribute(instance)
+        return None if geom is None else Geometry(geom, False)
+
+    def to_representation(self, value):
+        return represent(value, self.context.get('request'))
+
+
+def is_geometry(model_field) -> bool:
+    return getattr(model_field, 'geom_type', None) is not None and \
+        model_field.concrete
+
+
+def fields(serializer, model):
+    """
+    The names of the geometry columns of `model` shown by `serializer`
+    """
+    names = []
+    for field in serializer.fields.values():
+        if not isinstance(field, GeometryField) or \
+                len(field.source_attrs) != 1:
+            continue
+        name = field.source_attrs[0]
+        model_field = next(
+            (f for f in model._meta.concrete_fields if f.name == name), None)
+        if model_field is not None and is_geometry(model_field):
+            names.append(name)
+    return names
+
+
+def _deferred(queryset, name) -> bool:
+    names, defer = queryset.query.deferred_loading
+    return name in names if defer else bool(names) and name not in names
+
+
+def defer_simplified(queryset, serializer, request):
+    """
+    `queryset` without the geometries `prefetch_simplified` fetches
+    """
+    opts = options(request)
+    if not opts.simplify or opts.format == 'none':
+        return queryset
+
+    names = [name for name in fields(serializer, queryset.model)
+             if not _deferred(queryset, name)]
+    return queryset.defer(*names) if names else queryset
+
+
+def prefetch_simplified(instances, serializer, request):
+    """
+    Simplify the geometries of `serializer` for all `instances` at
+    once in the database
+    """
+    opts = options(request)
+    if not instances or not opts.simplify or opts.format == 'none':
+        return
+
+    model = type(instances[0])
+    names = [name for name in fields(serializer, model)
+             if name in instances[0].get_deferred_fields()]
+    if not names:
+        return
+
+    annotations = {}
+    for name in names:
+        model_field = model._meta.get_field(name)
+        annotations[f'_simplified_{name}'] = Func(
+            F(name), Value(opts.simplify),
+            function='ST_SimplifyPreserveTopology',
+            output_field=type(model_field)(srid=model_field.srid))
+
+    rows = model._default_manager.filter(
+        pk__in=[instance.pk for instance in instances]
+    ).order_by().annotate(**annotations).values_list(
+        'pk', *annotations)
+    simplified = {row[0]: dict(zip(names, row[1:])) for row in rows}
+
+    for instance in instances:
+        setattr(instance, SIMPLIFIED, simplified.get(instance.pk, {}))
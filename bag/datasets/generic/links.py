@@ -0,0 +1,103 @@
+"""
+Cached reverse url lookups for detail views.
+
+Search and typeahead build a `_links` entry for every hit. Going
+through `reverse()` for each of them means walking the url resolver
+over and over, so each detail view is resolved once per url
+configuration / script prefix and the pk is filled in afterwards.
+The result is the same url `rest.get_links` produces.
+"""
+
+import re
+from collections import OrderedDict
+from urllib.parse import quote
+
+from django.urls import get_resolver, get_script_prefix, get_urlconf
+from django.urls import reverse as django_reverse
+from django.utils.http import RFC3986_SUBDELIMS, escape_leading_slashes
+from rest_framework.reverse import preserve_builtin_query_params
+
+from . import rest
+
+# Placeholder used to resolve a detail url once, it has to match the
+# lookup regex of the viewsets ([^/.]+ by default)
+_PK_PLACEHOLDER = 'linktemplatepk'
+
+# (urlconf, script prefix, view name) -> (before pk, after pk, pattern)
+_templates = {}
+
+
+def _build_template(view_name, urlconf, prefix):
+    """
+    Find the url pattern `reverse(view_name, kwargs={'pk': ..})` uses.
+
+    Returns None when the view can not be templated and should
+    go through the regular `reverse()`.
+    """
+    possibilities = get_resolver(urlconf).reverse_dict.getlist(view_name)
+
+    for possibility, pattern, defaults, converters in possibilities:
+        for result, params in possibility:
+            if set(params) != {'pk'}:
+                continue
+            if defaults or converters:
+                return None
+
+            candidate = prefix + result % {'pk': _PK_PLACEHOLDER}
+            regex = re.compile('^%s%s' % (re.escape(prefix), pattern))
+            if not regex.search(candidate):
+                return None
+
+            before, after = candidate.split(_PK_PLACEHOLDER)
+            return before, after, regex
+
+    return None
+
+
+def _template(view_name):
+    urlconf = get_urlconf()
+    prefix = get_script_prefix()
+    key = (urlconf, prefix, view_name)
+
+    try:
+        return _templates[key]
+    except KeyError:
+        template = _build_template(view_name, urlconf, prefix)
+        _templates[key] = template
+        return template
+
+
+def detail_path(view_name, pk) -> str:
+    """
+    Url path of a detail view, equal to `reverse(view_name, kwargs={'pk': pk})`
+    """
+    template = _template(view_name)
+
+    if template is not None:
+        before, after, regex = template
+        candidate = f'{before}{pk}{after}'
+        if regex.search(candidate):
+            # same quoting as django's reverse
+            return escape_leading_slashes(
+                quote(candidate, safe=RFC3986_SUBDELIMS + '/~:@'))
+
+    # pk does not fit the pattern (or no template), let reverse decide
+    return django_reverse(view_name, kwargs={'pk': pk})
+
+
+def get_detail_links(view_name, pk, request=None):
+    """
+    Same as `rest.get_links(view_name, kwargs={'pk': pk}, request=request)`
+    """
+    if getattr(request, 'versioning_scheme', None) is not None:
+        return rest.get_links(
+            view_name=view_name, kwargs={'pk': pk}, request=request)
+
+    href = detail_path(view_name, pk)
+    if request is not None:
+        href = request.build_absolute_uri(href)
+        href = preserve_builtin_query_params(href, request)
+
+    return OrderedDict([
+        ('self', dict(href=href))
+    ])
@@ -0,0 +1,210 @@
+"""
+Minimal metrics, rendered in the prometheus text format.
+
+Every (uwsgi) worker counts in memory and writes its numbers to a file
+of its own in METRICS_DIR, at most every FLUSH_INTERVAL seconds and
+before rendering. /status/metrics adds up the files of all workers,
+also of workers that are gone, so a scrape reaching any worker sees
+the same, only rising, numbers. Without METRICS_DIR the numbers of
+the answering worker are rendered.
+"""
+
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+
+log = logging.getLogger(__name__)
+
+# milliseconds
+DEFAULT_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# seconds between writes of the numbers of a worker
+FLUSH_INTERVAL = 1.0
+
+_registry = OrderedDict()
+_lock = threading.Lock()
+_flush_lock = threading.Lock()
+
+# the file of this process, a process forked from it gets its own
+_process_file = None
+_flushed = 0.0
+
+
+def _format_labels(labels: tuple, extra: str = '') -> str:
+    parts = [f'{key}="{value}"' for key, value in labels]
+    if extra:
+        parts.append(extra)
+    if not parts:
+        return ''
+    return '{' + ','.join(parts) + '}'
+
+
+class Histogram(object):
+    """
+    Cumulative histogram with fixed buckets, one series per label set
+    """
+
+    def __init__(self, name: str, description: str, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(buckets)
+        # labels -> [bucket counts..., +Inf count, sum]
+        self._series = {}
+
+    def observe(self, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        index = bisect.bisect_left(self.buckets, value)
+
+        with _lock:
+            series = self._series.get(key)
+            if series is None:
+                series = [0] * (len(self.buckets) + 2)
+                self._series[key] = series
+            series[index] += 1
+            series[-1] += value
+
+        if time.monotonic() - _flushed >= FLUSH_INTERVAL:
+            flush()
+
+    def series(self) -> dict:
+        with _lock:
+            return {key: list(values) for key, values in self._series.items()}
+
+    def render(self, series: dict = None) -> [str]:
+        """
+        The lines of `series`, by default those of this process
+        """
+        if series is None:
+            series = self.series()
+
+        lines = [
+            f'# HELP {self.name} {self.description}',
+            f'# TYPE {self.name} histogram',
+        ]
+
+        for labels, values in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                lines.append('{}_bucket{} {}'.format(
+                    self.name, _format_labels(labels, f'le="{bound}"'),
+                    cumulative))
+            cumulative += values[-2]
+            lines.append('{}_bucket{} {}'.format(
+                self.name, _format_labels(labels, 'le="+Inf"'), cumulative))
+            lines.append('{}_sum{} {}'.format(
+                self.name, _format_labels(labels), values[-1]))
+            lines.append('{}_count{} {}'.format(
+                self.name, _format_labels(labels), cumulative))
+
+        return lines
+
+
+def histogram(name: str, description: str, buckets=DEFAULT_BUCKETS) -> Histogram:
+    """
+    Get or create the histogram `name`
+    """
+    with _lock:
+        if name not in _registry:
+            _registry[name] = Histogram(name, description, buckets=buckets)
+        return _registry[name]
+
+
+def _directory() -> str:
+    return getattr(settings, 'METRICS_DIR', None)
+
+
+def _forked():
+    # the numbers of the parent are in the file of the parent
+    global _process_file, _flushed
+    _process_file = None
+    _flushed = 0.0
+    for metric in _registry.values():
+        metric._series = {}
+
+
+os.register_at_fork(after_in_child=_forked)
+
+
+def flush():
+    """
+    Write the numbers of this process to its file in METRICS_DIR
+    """
+    global _process_file, _flushed
+
+    directory = _directory()
+    _flushed = time.monotonic()
+    if not directory:
+        return
+
+    with _flush_lock:
+        if _process_file is None:
+            _process_file = os.path.join(
+                directory, f'{os.getpid()}-{uuid.uuid4().hex[:8]}.json')
+
+        data = {
+            name: [[list(labels), values]
+                   for labels, values in metric.series().items()]
+            for name, metric in list(_registry.items())
+        }
+
+        tmp_path = f'{_process_file}.tmp'
+        try:
+            os.makedirs(directory, exist_ok=True)
+            with open(tmp_path, 'w') as metrics_file:
+                json.dump(data, metrics_file)
+            os.replace(tmp_path, _process_file)
+        except OSError:
+            log.exception('Could not write metrics to %s', _process_file)
+
+
+def _read(path: str) -> dict:
+    try:
+        with open(path) as metrics_file:
+            return json.load(metrics_file)
+    except (OSError, ValueError):
+        # written by a worker right now
+        return {}
+
+
+def collect() -> dict:
+    """
+    Metric name -> labels -> values, added up over the files of all
+    processes, or of this process without METRICS_DIR
+    """
+    directory = _directory()
+    if not directory:
+        return {
+            name: metric.series() for name, metric in _registry.items()}
+
+    flush()
+
+    totals = {}
+    for entry in os.listdir(directory):
+        if not entry.endswith('.json'):
+            continue
+        for name, series in _read(os.path.join(directory, entry)).items():
+            metric = totals.setdefault(name, {})
+            for labels, values in series:
+                key = tuple(tuple(label) for label in labels)
+                total = metric.get(key)
+                if total is None:
+                    metric[key] = list(values)
+                else:
+                    metric[key] = [a + b for a, b in zip(total, values)]
+    return totals
+
+
+def render() -> str:
+    totals = collect()
+    lines = []
+    for name, metric in list(_registry.items()):
+        lines.extend(metric.render(totals.get(name, {})))
+    return '\n'.join(lines) + '\n'
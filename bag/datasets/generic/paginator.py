@@ -0,0 +1,160 @@
+"""
+Counting the objects of a list response without counting them every time.
+
+Counting a large table takes longer than fetching a page of it. The
+count of an unfiltered large table is estimated from the statistics
+of postgres (`pg_class.reltuples`). Other counts are counted once and
+cached per query until the next import generation.
+
+`count_exact=1` asks for an exact count in any case.
+
+Deep pages of page number pagination are `OFFSET` scans. In keyset
+(cursor) pagination a page starts after the primary key of the last
+object of the previous page, which costs the same for every page. The
+cursor is the opaque encoding of that primary key.
+"""
+
+import base64
+import hashlib
+import json
+import logging
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.paginator import EmptyPage, Page, Paginator
+from django.db import DatabaseError, connections
+from django.db.models.query import QuerySet
+from django.utils.functional import cached_property
+
+from batch import generation
+
+log = logging.getLogger(__name__)
+
+
+def estimate(queryset: QuerySet) -> int:
+    """
+    The number of rows of the table of `queryset` according to the
+    postgres statistics, 0 when unknown
+    """
+    connection = connections[queryset.db]
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+    except DatabaseError:
+        log.exception('Could not estimate the count')
+        return 0
+    return max(row[0], 0) if row else 0
+
+
+def is_unfiltered(queryset: QuerySet) -> bool:
+    query = queryset.query
+    return not query.where and not query.distinct and \
+        query.low_mark == 0 and query.high_mark is None
+
+
+def cache_key(queryset: QuerySet) -> str:
+    sql, params = queryset.query.sql_with_params()
+    digest = hashlib.sha1(f'{sql}{params!r}'.encode()).hexdigest()
+    return f'count:{generation.current()}:{digest}'
+
+
+def encode_cursor(pk) -> str:
+    encoded = base64.urlsafe_b64encode(json.dumps(pk).encode())
+    return encoded.decode().rstrip('=')
+
+
+def decode_cursor(cursor: str):
+    """
+    The primary key encoded in `cursor`, None for the first page
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (TypeError, ValueError):
+        pk = None
+    if not isinstance(pk, (str, int)):
+        raise ValueError(f'Invalid cursor: {cursor}')
+    return pk
+
+
+class EstimatedPage(Page):
+    """
+    A page of an estimated count, it knows if there is a next page
+    from fetching one object more
+    """
+
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+
+class CountingPaginator(Paginator):
+    """
+    Paginator that estimates or caches its count unless `exact`
+    """
+
+    def __init__(self, object_list, per_page, exact=False, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.exact = exact
+        self.estimated = False
+
+    def _exact_count(self):
+        return Paginator.count.func(self)
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet):
+            return self._exact_count()
+
+        if not self.exact and is_unfiltered(queryset):
+            estimated = estimate(queryset)
+            if estimated >= settings.API_COUNT_ESTIMATE_THRESHOLD:
+                self.estimated = True
+                return estimated
+
+        if not settings.API_COUNT_CACHE_TTL:
+            return self._exact_count()
+
+        cache = caches[settings.API_COUNT_CACHE]
+        key = cache_key(queryset)
+
+        count = None if self.exact else cache.get(key)
+        if count is None:
+            count = self._exact_count()
+            cache.set(key, count, timeout=settings.API_COUNT_CACHE_TTL)
+        return count
+
+    def validate_number(self, number):
+        if self.count and self.estimated:
+            # the estimate may be too low, pages beyond it may exist
+            try:
+                number = int(number)
+            except (TypeError, ValueError):
+                return super().validate_number(number)
+            if number >= 1:
+                return number
+        return super().validate_number(number)
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if not self.estimated:
+            return super().page(number)
+
+        bottom = (number - 1) * self.per_page
+        object_list = list(
+            self.object_list[bottom:bottom + self.per_page + 1])
+        if not object_list and number > 1:
+            raise EmptyPage('That page contains no results')
+
+        return EstimatedPage(
+            object_list[:self.per_page], number, self,
+            len(object_list) > self.per_page)
@@ -0,0 +1,195 @@
+"""
+Per request profiling.
+
+ProfilingMiddleware records for every request the number of database
+queries, the time spent in the database, in elastic and serializing
+the response, per resolved view name, in the histograms exposed on
+/status/metrics. A request over the query or time budget is logged
+with its most repeated SQL, so N+1 queries show up in production.
+
+Serializing is the time between the view returning its response and
+the response being sent, minus the database time in between. For
+streaming responses that includes sending the response.
+"""
+
+import logging
+import re
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from datasets.generic import metrics
+from search import timing
+
+log = logging.getLogger(__name__)
+
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+REQUEST_QUERIES = metrics.histogram(
+    'api_request_queries', 'Number of database queries per view',
+    buckets=QUERY_BUCKETS)
+REQUEST_DB = metrics.histogram(
+    'api_request_db_ms', 'Time spent in the database per view')
+REQUEST_ES = metrics.histogram(
+    'api_request_es_ms', 'Time spent in elastic per view')
+REQUEST_SERIALIZE = metrics.histogram(
+    'api_request_serialize_ms', 'Time spent serializing responses per view')
+REQUEST_TOTAL = metrics.histogram(
+    'api_request_ms', 'Total time per view')
+
+# number of repeated statements logged for a request over budget
+TOP_STATEMENTS = 5
+
+# attribute on the request holding its profile
+_REQUEST_ATTR = '_profile'
+
+_NUMBER = re.compile(r'\b\d+(\.\d+)?\b')
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_IN_LIST = re.compile(r'\bIN \((?:\s*%s\s*,?)+\)', re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+
+
+def fingerprint(sql: str) -> str:
+    """
+    `sql` without its values, statements differing only in their
+    values have the same fingerprint
+    """
+    sql = _STRING.sub('%s', sql)
+    sql = _NUMBER.sub('%s', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+def view_name(request) -> str:
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    return match.view_name or match.url_name or 'unnamed'
+
+
+class Profile(object):
+    """
+    The database use of one request, installed as execute wrapper
+    on the database connections of the request thread
+    """
+
+    def __init__(self, request):
+        self.request = request
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.statements = Counter()
+        self.serialize_start = None
+        self.db_seconds_before_serialize = 0.0
+        self.finished = False
+
+        for connection in connections.all():
+            # a profile left behind by a request that was never closed
+            connection.execute_wrappers[:] = [
+                wrapper for wrapper in connection.execute_wrappers
+                if not isinstance(wrapper, Profile)]
+            connection.execute_wrappers.append(self)
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += time.perf_counter() - start
+            self.queries += 1
+            self.statements[sql] += 1
+
+    def serializing(self):
+        if self.serialize_start is None:
+            self.serialize_start = time.perf_counter()
+            self.db_seconds_before_serialize = self.db_seconds
+
+    def close(self):
+        """
+        Called when the response is sent
+        """
+        if self.finished:
+            return
+        self.finished = True
+
+        for connection in connections.all():
+            if self in connection.execute_wrappers:
+                connection.execute_wrappers.remove(self)
+
+        end = time.perf_counter()
+        name = view_name(self.request)
+
+        total_ms = (end - self.start) * 1000
+        db_ms = self.db_seconds * 1000
+        es_ms = sum(
+            t.wall or 0 for t in timing.request_timings(self.request))
+        serialize_ms = 0.0
+        if self.serialize_start is not None:
+            serialize_ms = max(0.0, (
+                end - self.serialize_start -
+                (self.db_seconds - self.db_seconds_before_serialize)
+            ) * 1000)
+
+        REQUEST_QUERIES.observe(self.queries, view=name)
+        REQUEST_DB.observe(db_ms, view=name)
+        REQUEST_ES.observe(es_ms, view=name)
+        REQUEST_SERIALIZE.observe(serialize_ms, view=name)
+        REQUEST_TOTAL.observe(total_ms, view=name)
+
+        if self.queries > settings.API_BUDGET_QUERIES or \
+                total_ms > settings.API_BUDGET_MS:
+            log.warning(
+                'Over budget: %s %s, %d queries, %.0fms total, '
+                '%.0fms database, %.0fms elastic, %.0fms serializing%s',
+                name, self.request.get_full_path(), self.queries, total_ms,
+                db_ms, es_ms, serialize_ms, self.report())
+
+    def report(self) -> str:
+        """
+        The most repeated statements, one per line
+        """
+        fingerprints = Counter()
+        for sql, count in self.statements.items():
+            fingerprints[fingerprint(sql)] += count
+
+        return ''.join(
+            f'\n{count:5d}x {statement}'
+            for statement, count in fingerprints.most_common(TOP_STATEMENTS)
+            if count > 1)
+
+
+class ProfilingMiddleware(object):
+    """
+    Profile every request, see the module documentation
+    """
+
+    def __init__(self, get_response):
+        if not settings.API_PROFILING:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        profile = Profile(request)
+        setattr(request, _REQUEST_ATTR, profile)
+
+        try:
+            response = self.get_response(request)
+        except Exception:
+            profile.close()
+            raise
+
+        # streamed responses are serialized while they are sent
+        profile.serializing()
+        # the response closes the profile after it is sent
+        response._closable_objects.append(profile)
+        return response
+
+    def process_template_response(self, request, response):
+        # rendering the response is serializing it
+        profile = getattr(request, _REQUEST_ATTR, None)
+        if profile is not None:
+            profile.serializing()
+        return response
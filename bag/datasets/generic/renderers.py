@@ -1,5 +1,14 @@
+import json
+import logging
+
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import JSONRenderer
 from rest_framework_csv.renderers import CSVRenderer
 
+from datasets.generic.streaming import INCOMPLETE
+
+log = logging.getLogger(__name__)
+
 
 class PaginatedCSVRenderer(CSVRenderer):
     results_field = 'results'
@@ -8,3 +17,119 @@ class PaginatedCSVRenderer(CSVRenderer):
         if not isinstance(data, list):
             data = data.get(self.results_field, [])
         return super(PaginatedCSVRenderer, self).render(data, *args, **kwargs)
+
+
+class LazyResults(object):
+    """
+    The results of a page, serialized one by one while they are
+    iterated instead of all at once. Indexing serializes them all.
+    """
+
+    def __init__(self, serializer):
+        self.serializer = serializer
+        self._items = None
+
+    def __iter__(self):
+        if self._items is not None:
+            return iter(self._items)
+        child = self.serializer.child
+        return (child.to_representation(item) for item in self.serializer.instance)
+
+    def _all(self) -> list:
+        if self._items is None:
+            self._items = list(iter(self))
+        return self._items
+
+    def __len__(self):
+        return len(self._all())
+
+    def __getitem__(self, index):
+        return self._all()[index]
+
+
+class StreamingJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that can also render a response in parts.
+
+    `iter_render` yields the members of the response and the items of
+    its lists one by one, the output is the same as that of `render`.
+    The response is sent before its items are serialized. When that
+    fails the json is closed with an `error` member and the error is
+    raised again to abort the response.
+    """
+
+    def can_stream(self, accepted_media_type=None, renderer_context=None):
+        # pretty printed json is rendered at once
+        return (
+            self.compact and
+            self.get_indent(accepted_media_type, renderer_context or {}) is None
+        )
+
+    def _dumps(self, data) -> bytes:
+        ret = json.dumps(
+            data, cls=self.encoder_class,
+            ensure_ascii=self.ensure_ascii, allow_nan=not self.strict,
+            separators=(',', ':'))
+        ret = ret.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
+        return ret.encode()
+
+    def _iter_list(self, items):
+        yield b'['
+        for position, item in enumerate(items):
+            # the separator is only sent with the item
+            yield (b',' if position else b'') + self._dumps(item)
+        yield b']'
+
+    def iter_render(self, data):
+        """
+        Render `data` into JSON, yielding bytestrings
+        """
+        if data is None:
+            return
+
+        if not isinstance(data, dict) or \
+                not all(isinstance(key, str) for key in data):
+            yield self._dumps(data)
+            return
+
+        yield b'{'
+        # what closes the member being rendered when it fails
+        unfinished = b''
+        try:
+            for position, (key, value) in enumerate(data.items()):
+                if position:
+                    yield b','
+                yield self._dumps(key) + b':'
+                if isinstance(value, (list, tuple, LazyResults)):
+                    unfinished = b']'
+                    yield from self._iter_list(value)
+                else:
+                    unfinished = b'null'
+                    yield self._dumps(value)
+                unfinished = b''
+        except Exception:
+            log.exception('Rendering the response broke off')
+            yield unfinished + b',"error":' + self._dumps(INCOMPLETE) + b'}'
+            raise
+        yield b'}'
+
+
+class StreamingJSONResponse(StreamingHttpResponse):
+    """
+    Streams `data` as json. Like a rest framework Response the
+    data stays available, `content` renders it at once, after that
+    the rendered content is sent.
+    """
+
+    def __init__(self, data, renderer: StreamingJSONRenderer, **kwargs):
+        kwargs.setdefault('content_type', renderer.media_type)
+        super().__init__(renderer.iter_render(data), **kwargs)
+        self.data = data
+        self._rendered = None
+
+    @property
+    def content(self):
+        if self._rendered is None:
+            self._rendered = b''.join(self.streaming_content)
+            self.streaming_content = [self._rendered]
+        return self._rendered
@@ -1,22 +1,29 @@
 # Python
 from collections import OrderedDict
-import json
+from functools import lru_cache
 # Packages
 from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Count, Model, Prefetch
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import renderers, serializers
 from rest_framework import pagination, response, viewsets
+from rest_framework.exceptions import NotFound
 from rest_framework.reverse import reverse
-from rest_framework.utils.urls import replace_query_param
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 from rest_framework_extensions.mixins import DetailSerializerMixin
 
 from rest_framework_xml.renderers import XMLRenderer
-from .renderers import PaginatedCSVRenderer
+from . import conditional, detail_cache, fieldsets, geometry
+from .geometry import GeometryField
+from .paginator import CountingPaginator, decode_cursor, encode_cursor
+from .renderers import LazyResults, PaginatedCSVRenderer
+from .renderers import StreamingJSONRenderer, StreamingJSONResponse
 
 
 DEFAULT_RENDERERS = (
-    renderers.JSONRenderer,
+    StreamingJSONRenderer,
     renderers.BrowsableAPIRenderer,
     PaginatedCSVRenderer,
     XMLRenderer,
@@ -83,11 +90,39 @@ class LinksField(serializers.HyperlinkedIdentityField):
 
 class HALSerializer(serializers.HyperlinkedModelSerializer):
     """
-    Use landelijk ids if possible
+    Use landelijk ids if possible, the fields shown can be
+    chosen with the `fields` and `exclude` parameters
     """
     url_field_name = '_links'
     serializer_url_field = LinksField
 
+    # the relations the fields traverse, joined or prefetched by
+    # DatapuntViewSet for the serializer it uses
+    select_related = ()
+    prefetch_related = ()
+
+    def build_standard_field(self, field_name, model_field):
+        field_class, field_kwargs = super().build_standard_field(
+            field_name, model_field)
+        if geometry.is_geometry(model_field):
+            # precision, simplification and format from the request
+            field_class = GeometryField
+        return field_class, field_kwargs
+
+    def get_fields(self):
+        fields = super().get_fields()
+
+        request = self.context.get('request')
+        if not fieldsets.requested(request) or not self._is_top_level():
+            return fields
+        return fieldsets.select(fields, request, always=(self.url_field_name,))
+
+    def _is_top_level(self):
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
     def get_url(self, obj, view_name, request, _format):
 
         landelijk_id = getattr(obj, 'landelijk_id', None)
@@ -106,12 +141,61 @@ class HALSerializer(serializers.HyperlinkedModelSerializer):
 
 
 class HALPagination(pagination.PageNumberPagination):
+    """
+    Page number pagination, or keyset pagination on the primary key
+    when the `cursor` parameter is given (empty for the first page)
+    """
     page_size_query_param = 'page_size'
+    count_exact_query_param = 'count_exact'
+    cursor_query_param = 'cursor'
 
-    def get_paginated_response(self, data):
-        self_link = self.request.build_absolute_uri()
-        if self_link.endswith(".api"):
-            self_link = self_link[:-4]
+    count_exact = False
+    keyset = False
+
+    def django_paginator_class(self, object_list, per_page):
+        return CountingPaginator(object_list, per_page, exact=self.count_exact)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count_exact = request.query_params.get(
+            self.count_exact_query_param, '').lower() in ('1', 'true', 'yes')
+        self.keyset = self.cursor_query_param in request.query_params
+        if self.keyset:
+            return self.paginate_keyset(queryset, request)
+        return super().paginate_queryset(queryset, request, view)
+
+    def paginate_keyset(self, queryset, request):
+        page_size = self.get_page_size(request)
+        cursor = request.query_params[self.cursor_query_param]
+
+        self.request = request
+        self.count = self.django_paginator_class(queryset, page_size).count
+
+        try:
+            last_pk = decode_cursor(cursor)
+            if last_pk is not None:
+                queryset = queryset.filter(pk__gt=last_pk)
+        except ValueError:
+            raise NotFound(f'Invalid cursor: {cursor}')
+
+        objects = list(queryset.order_by('pk')[:page_size + 1])
+
+        self.next_cursor = None
+        if len(objects) > page_size:
+            self.next_cursor = encode_cursor(objects[page_size - 1].pk)
+
+        return objects[:page_size]
+
+    def get_links(self, self_link):
+        """
+        The next and previous links of the page
+        """
+        if self.keyset:
+            if self.next_cursor is None:
+                return None, None
+            next_link = replace_query_param(
+                remove_query_param(self_link, self.page_query_param),
+                self.cursor_query_param, self.next_cursor)
+            return next_link, None
 
         if self.page.has_next():
             next_link = replace_query_param(
@@ -126,15 +210,38 @@ class HALPagination(pagination.PageNumberPagination):
         else:
             prev_link = None
 
-        return response.Response(OrderedDict([
+        return next_link, prev_link
+
+    def get_paginated_response(self, data):
+        self_link = self.request.build_absolute_uri()
+        if self_link.endswith(".api"):
+            self_link = self_link[:-4]
+
+        next_link, prev_link = self.get_links(self_link)
+        count = self.count if self.keyset else self.page.paginator.count
+
+        result = OrderedDict([
             ('_links', OrderedDict([
                 ('self', dict(href=self_link)),
                 ('next', dict(href=next_link)),
                 ('previous', dict(href=prev_link)),
             ])),
-            ('count', self.page.paginator.count),
+            ('count', count),
             ('results', data)
-        ]))
+        ])
+
+        renderer = getattr(self.request, 'accepted_renderer', None)
+        if settings.API_STREAMING_JSON and \
+                isinstance(renderer, StreamingJSONRenderer) and \
+                renderer.can_stream(
+                    self.request.accepted_media_type,
+                    {'request': self.request}):
+            return StreamingJSONResponse(result, renderer)
+
+        if isinstance(data, LazyResults):
+            result['results'] = list(data)
+
+        return response.Response(result)
 
 
 class LimitedHALPagination(HALPagination):
@@ -151,11 +258,66 @@ class DatapuntViewSet(DetailSerializerMixin, viewsets.ReadOnlyModelViewSet):
     # default ordering
     ordering = ('id',)
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        queryset = plan_related(queryset, self.get_serializer_class())
+        if fieldsets.requested(self.request):
+            # only fetch what the requested fields need
+            queryset = fieldsets.project(queryset, self.get_serializer())
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        not_modified = conditional.not_modified(request)
+        if not_modified is not None:
+            return not_modified
+
+        queryset = self.filter_queryset(self.get_queryset())
+        # simplified geometries are fetched per page
+        queryset = geometry.defer_simplified(
+            queryset, self.get_serializer(), request)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            # the items are serialized while the response is rendered
+            serializer = self.get_serializer(page, many=True)
+            prefetch_summary_counts(page, serializer.child)
+            geometry.prefetch_simplified(page, serializer.child, request)
+            return self.get_paginated_response(LazyResults(serializer))
+
+        serializer = self.get_serializer(queryset, many=True)
+        return response.Response(serializer.data)
+
+    def retrieve(self, request, *args, **kwargs):
+        not_modified = conditional.not_modified(request)
+        if not_modified is not None:
+            return not_modified
+
+        if detail_cache.enabled():
+            cached = detail_cache.get(request, type(self).__name__)
+            if cached is not None:
+                return cached
+
+        return super().retrieve(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs)
+        response = detail_cache.store(request, response)
+        # data only changes with an import, let clients revalidate
+        return conditional.add_validators(request, response)
+
+
+# attribute of an instance holding the counts of its summary fields
+SUMMARY_COUNTS = '_summary_counts'
+
 
 class RelatedSummaryField(serializers.Field):
 
     def to_representation(self, value):
-        count = value.count()
+        counts = getattr(value.instance, SUMMARY_COUNTS, {})
+        count = counts.get(self.source_attrs[-1])
+        if count is None:
+            count = value.count()
 
         model_name = value.model.__name__
         mapping = model_name.lower() + "-list"
@@ -178,6 +340,132 @@ class RelatedSummaryField(serializers.Field):
         }
 
 
+def _summary_filter(manager):
+    """
+    The filter on the related model selecting the objects of
+    related manager `manager`, and its value
+    """
+    name, value = list(manager.core_filters.items())[0]
+    if isinstance(value, Model):
+        value = getattr(value, manager.field.target_field.attname)
+    return name, value
+
+
+def related_lookups(serializer, prefix=''):
+    """
+    The (select_related, prefetch_related) lookups declared by
+    `serializer` and the serializers nested in it on a relation
+    """
+    select = [prefix + lookup
+              for lookup in getattr(serializer, 'select_related', ())]
+    prefetch = [
+        Prefetch(prefix + lookup.prefetch_through, lookup.queryset)
+        if isinstance(lookup, Prefetch) else prefix + lookup
+        for lookup in getattr(serializer, 'prefetch_related', ())]
+
+    model = getattr(getattr(serializer, 'Meta', None), 'model', None)
+    if model is None:
+        return select, prefetch
+
+    for field in serializer.fields.values():
+        nested = getattr(field, 'child', field)
+        if not isinstance(nested, serializers.BaseSerializer) or \
+                len(field.source_attrs) != 1:
+            continue
+        try:
+            relation = model._meta.get_field(field.source_attrs[0])
+        except FieldDoesNotExist:
+            # a property, the serializer declares what it traverses
+            continue
+        if not relation.is_relation:
+            continue
+
+        nested_prefix = f'{prefix}{field.source_attrs[0]}__'
+        nested_select, nested_prefetch = related_lookups(nested, nested_prefix)
+        if relation.many_to_one or relation.one_to_one:
+            select.extend(nested_select)
+        else:
+            # joins behind a to many relation are part of its prefetch
+            prefetch.extend(nested_select)
+        prefetch.extend(nested_prefetch)
+
+    return select, prefetch
+
+
+@lru_cache(maxsize=None)
+def _planned_lookups(serializer_class):
+    return related_lookups(serializer_class())
+
+
+def plan_related(queryset, serializer_class):
+    """
+    `queryset` joining and prefetching the relations the serializers
+    of `serializer_class` traverse
+    """
+    select, prefetch = _planned_lookups(serializer_class)
+
+    seen = {lookup.prefetch_to if isinstance(lookup, Prefetch) else lookup
+            for lookup in queryset._prefetch_related_lookups}
+    planned = []
+    for lookup in prefetch:
+        to = lookup.prefetch_to if isinstance(lookup, Prefetch) else lookup
+        if to not in seen:
+            seen.add(to)
+            planned.append(lookup)
+
+    if select:
+        queryset = queryset.select_related(*select)
+    if planned:
+        queryset = queryset.prefetch_related(*planned)
+    return queryset
+
+
+def prefetch_summary_counts(instances, serializer):
+    """
+    Count the related objects of the RelatedSummaryFields of
+    `serializer` for all `instances` at once, with one grouped
+    COUNT query per field instead of one per field per instance
+    """
+    if not instances:
+        return
+
+    for field in serializer.fields.values():
+        if not isinstance(field, RelatedSummaryField) or \
+                len(field.source_attrs) != 1:
+            continue
+
+        source = field.source_attrs[0]
+        by_value = {}
+        manager = None
+
+        for instance in instances:
+            # prefetched relations are counted in memory
+            if source in getattr(instance, '_prefetched_objects_cache', {}):
+                continue
+            manager = getattr(instance, source)
+            name, value = _summary_filter(manager)
+            by_value.setdefault(value, []).append(instance)
+
+        if manager is None:
+            continue
+
+        values = [value for value in by_value if value is not None]
+        counts = dict(
+            manager.model._default_manager
+            .filter(**{f'{name}__in': values})
+            .order_by()
+            .values_list(name)
+            .annotate(count=Count('pk'))
+        ) if values else {}
+
+        for value, value_instances in by_value.items():
+            for instance in value_instances:
+                if not hasattr(instance, SUMMARY_COUNTS):
+                    setattr(instance, SUMMARY_COUNTS, {})
+                getattr(instance, SUMMARY_COUNTS)[source] = \
+                    counts.get(value, 0)
+
+
 class ExternalRelationField(serializers.Field):
     def __init__(self, path, parameter_name, host=settings.DATAPUNT_API_URL):
         super().__init__()
@@ -247,7 +535,8 @@ class MultipleGeometryField(serializers.Field):
         # Point or MultiPoly
         res = ''
         if value:
-            res = json.loads(value.geojson)
+            res = geometry.represent(
+                geometry.Geometry(value, False), self.context.get('request'))
         return res
 
 
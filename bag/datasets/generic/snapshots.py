@@ -0,0 +1,308 @@
+"""
+Export snapshots of complete datasets, written after an import.
+
+Streaming exports still read and format a whole table for every
+consumer. After an import the exports are written once, gzip
+compressed, per dataset and format, to SNAPSHOT_DIR:
+
+    <SNAPSHOT_DIR>/<date>-<generation>/verblijfsobject.csv.gz
+    <SNAPSHOT_DIR>/<date>-<generation>/manifest.json
+    <SNAPSHOT_DIR>/latest.json
+
+and, when SNAPSHOT_CONTAINER is set, to the object store as well.
+The tables are exported in parallel.
+
+`manifest_view` and `file_view` serve the latest snapshot, with ETag
+and Range support.
+"""
+
+import datetime
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse
+from django.http import StreamingHttpResponse
+from django.views.decorators.http import condition, require_safe
+
+from batch.models import ImportGeneration
+from datasets.generic import export
+
+log = logging.getLogger(__name__)
+
+Snapshot = namedtuple('Snapshot', ['name', 'queryset', 'fields', 'geometry'])
+
+LATEST = 'latest.json'
+MANIFEST = 'manifest.json'
+
+# number of snapshots kept on disk
+KEEP = 2
+
+CONTENT_TYPE = 'application/gzip'
+
+READ_SIZE = 64 * 1024
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def from_viewsets(viewsets) -> [Snapshot]:
+    """
+    Snapshots of the (name, viewset) pairs that can export
+    """
+    return [
+        Snapshot(name, viewset.queryset.all(), viewset.export_fields,
+                 viewset.export_geometry)
+        for name, viewset in viewsets
+        if issubclass(viewset, export.ExportMixin) and viewset.export_fields
+    ]
+
+
+def current_tag() -> str:
+    """
+    The tag of the snapshot of the current import generation
+    """
+    generation = ImportGeneration.objects.order_by('-id').first()
+    if generation is None:
+        return f'{datetime.date.today():%Y%m%d}-0'
+    return f'{generation.date_created:%Y%m%d}-{generation.id}'
+
+
+def outputs(snapshot: Snapshot) -> [str]:
+    return [
+        output for output in export.FORMATS
+        if output != 'geojson' or snapshot.geometry]
+
+
+def write_file(snapshot: Snapshot, output: str, directory: str) -> dict:
+    """
+    Write one snapshot file, return its manifest entry
+    """
+    name = f'{snapshot.name}.{output}.gz'
+    path = os.path.join(directory, name)
+    tmp_path = f'{path}.tmp'
+
+    sha1 = hashlib.sha1()
+    lines = export.lines(
+        export.rows(snapshot.queryset, snapshot.fields, snapshot.geometry),
+        output)
+
+    try:
+        with open(tmp_path, 'wb') as raw:
+            for chunk in export.gzip_chunks(lines):
+                sha1.update(chunk)
+                raw.write(chunk)
+    finally:
+        # the connection of this worker thread
+        connections.close_all()
+
+    os.replace(tmp_path, path)
+
+    log.info('Wrote snapshot %s', path)
+
+    return OrderedDict([
+        ('name', name),
+        ('dataset', snapshot.name),
+        ('format', output),
+        ('content_type', export.FORMATS[output]),
+        ('size', os.path.getsize(path)),
+        ('sha1', sha1.hexdigest()),
+    ])
+
+
+def _write_json(path: str, data):
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def write(snapshots: [Snapshot], root: str = None, tag: str = None,
+          workers: int = None) -> dict:
+    """
+    Write all snapshot files of `snapshots` and their manifest
+    """
+    root = root or settings.SNAPSHOT_DIR
+    tag = tag or current_tag()
+    workers = workers or settings.SNAPSHOT_WORKERS
+
+    directory = os.path.join(root, tag)
+    os.makedirs(directory, exist_ok=True)
+
+    tasks = [
+        (snapshot, output)
+        for snapshot in snapshots
+        for output in outputs(snapshot)
+    ]
+
+    with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix='snapshot') as executor:
+        files = list(executor.map(
+            lambda task: write_file(task[0], task[1], directory), tasks))
+
+    manifest = OrderedDict([
+        ('tag', tag),
+        ('created', datetime.datetime.now().isoformat()),
+        ('files', files),
+    ])
+
+    _write_json(os.path.join(directory, MANIFEST), manifest)
+    _write_json(os.path.join(root, LATEST), manifest)
+
+    prune(root, tag)
+
+    return manifest
+
+
+def prune(root: str, tag: str, keep: int = KEEP):
+    """
+    Remove all but the `keep` newest snapshots
+    """
+    tags = sorted(
+        (entry for entry in os.listdir(root)
+         if os.path.isdir(os.path.join(root, entry)) and entry != tag),
+        key=lambda entry: int(entry.split('-')[-1]) if
+        entry.split('-')[-1].isdigit() else 0)
+
+    for old in tags[:max(len(tags) - keep + 1, 0)]:
+        log.info('Removing snapshot %s', old)
+        shutil.rmtree(os.path.join(root, old), ignore_errors=True)
+
+
+def upload(manifest: dict, root: str = None, container: str = None):
+    """
+    Copy the snapshot files of `manifest` to the object store
+    """
+    # imported here, it sets up logging and swift on import
+    from objectstore import objectstore
+
+    root = root or settings.SNAPSHOT_DIR
+    container = container or settings.SNAPSHOT_CONTAINER
+    prefix = f'{settings.SNAPSHOT_PREFIX}/{manifest["tag"]}'
+
+    for entry in manifest['files']:
+        with open(os.path.join(root, manifest['tag'], entry['name']), 'rb') as f:
+            objectstore.put_to_objectstore(
+                container, f'{prefix}/{entry["name"]}', f, CONTENT_TYPE)
+
+    with open(os.path.join(root, manifest['tag'], MANIFEST), 'rb') as f:
+        objectstore.put_to_objectstore(
+            container, f'{prefix}/{MANIFEST}', f, 'application/json')
+    with open(os.path.join(root, LATEST), 'rb') as f:
+        objectstore.put_to_objectstore(
+            container, f'{settings.SNAPSHOT_PREFIX}/{LATEST}', f,
+            'application/json')
+
+
+def latest(root: str = None) -> dict:
+    root = root or settings.SNAPSHOT_DIR
+    try:
+        with open(os.path.join(root, LATEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _entry(name: str) -> dict:
+    manifest = latest()
+    if manifest is None:
+        raise Http404('No snapshots')
+    for entry in manifest['files']:
+        if entry['name'] == name:
+            return dict(entry, tag=manifest['tag'])
+    raise Http404(f'No snapshot {name}')
+
+
+def _etag(request, name: str = None) -> str:
+    if name is None:
+        manifest = latest()
+        return manifest['tag'] if manifest else None
+    try:
+        return _entry(name)['sha1']
+    except Http404:
+        return None
+
+
+def byte_range(header: str, size: int):
+    """
+    The (first, last) byte of a `Range: bytes=..` header, None for the
+    whole file. Raises ValueError when it can not be satisfied
+    """
+    match = RANGE_RE.match(header or '')
+    if not match or match.groups() == ('', ''):
+        return None
+
+    first, last = match.groups()
+    if first == '':
+        length = int(last)
+        if length == 0:
+            raise ValueError('Empty suffix range')
+        return max(size - length, 0), size - 1
+
+    first = int(first)
+    last = min(int(last), size - 1) if last else size - 1
+    if first > last:
+        raise ValueError('Range not satisfiable')
+    return first, last
+
+
+def _read(path: str, first: int, length: int):
+    with open(path, 'rb') as f:
+        f.seek(first)
+        while length > 0:
+            data = f.read(min(READ_SIZE, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+
+
+@require_safe
+@condition(etag_func=_etag)
+def manifest_view(request):
+    manifest = latest()
+    if manifest is None:
+        raise Http404('No snapshots')
+    return JsonResponse(manifest)
+
+
+@require_safe
+@condition(etag_func=_etag)
+def file_view(request, name):
+    entry = _entry(name)
+    path = os.path.join(settings.SNAPSHOT_DIR, entry['tag'], entry['name'])
+    size = entry['size']
+    etag = f'"{entry["sha1"]}"'
+
+    requested = request.META.get('HTTP_RANGE')
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range and if_range != etag:
+        requested = None
+
+    try:
+        span = byte_range(requested, size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    if span is None:
+        response = FileResponse(open(path, 'rb'), content_type=CONTENT_TYPE)
+        response['Content-Length'] = size
+    else:
+        first, last = span
+        response = StreamingHttpResponse(
+            _read(path, first, last - first + 1),
+            status=206, content_type=CONTENT_TYPE)
+        response['Content-Range'] = f'bytes {first}-{last}/{size}'
+        response['Content-Length'] = last - first + 1
+
+    response['Accept-Ranges'] = 'bytes'
+    response['Content-Disposition'] = f'attachment; filename="{name}"'
+    return response
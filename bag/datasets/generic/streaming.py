@@ -0,0 +1,102 @@
+"""
+Helpers for streaming (very) large result sets as NDJSON or CSV
+with a bounded memory footprint.
+
+A streamed response is sent with status 200 before its rows are read.
+When reading them fails halfway the stream ends with an error line
+and the response is aborted, so clients can tell it is incomplete.
+"""
+
+import csv
+import json
+import logging
+
+from rest_framework.utils.encoders import JSONEncoder
+
+log = logging.getLogger(__name__)
+
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
+CSV_CONTENT_TYPE = 'text/csv; charset=utf-8'
+
+INCOMPLETE = 'incomplete, the stream broke off'
+
+
+class Echo(object):
+    """
+    File-like object that hands back what is written to it instead of
+    buffering it. Lets `csv.writer` produce one line at a time.
+    """
+
+    def write(self, value):
+        return value
+
+
+def flatten(row: dict, prefix: str = '') -> dict:
+    """
+    Flatten nested dicts into dotted keys, lists are written as json.
+
+    {'_links': {'self': {'href': 'x'}}} -> {'_links.self.href': 'x'}
+    """
+    result = {}
+
+    for key, value in row.items():
+        key = f'{prefix}{key}'
+        if isinstance(value, dict):
+            result.update(flatten(value, prefix=f'{key}.'))
+        elif isinstance(value, (list, tuple)):
+            result[key] = json.dumps(value, cls=JSONEncoder)
+        else:
+            result[key] = value
+
+    return result
+
+
+def ndjson_lines(rows):
+    """
+    Yield each row as one line of json
+    """
+    for row in rows:
+        yield json.dumps(row, cls=JSONEncoder, ensure_ascii=False) + '\n'
+
+
+def csv_lines(rows, fieldnames: [str] = None):
+    """
+    Yield rows as csv lines. When no fieldnames are given the (flattened)
+    keys of the first row are used as header.
+    """
+    writer = None
+
+    for row in rows:
+        row = flatten(row)
+
+        if writer is None:
+            writer = csv.DictWriter(
+                Echo(), fieldnames=fieldnames or list(row.keys()),
+                extrasaction='ignore')
+            yield writer.writeheader()
+
+        yield writer.writerow(row)
+
+
+def error_line(output: str, message: str = INCOMPLETE) -> str:
+    """
+    The last line of a stream in `output` format that broke off
+    """
+    if output == 'csv':
+        return f'# error: {message}\n'
+    line = json.dumps({'error': message}) + '\n'
+    # geojson features are sent in parts
+    return '\n' + line if output == 'geojson' else line
+
+
+def guarded(lines, output: str):
+    """
+    Yield `lines`, ending with an error line when producing them fails.
+    The error is raised again to abort the response.
+    """
+    try:
+        yield from lines
+    except Exception:
+        log.exception('Stream of %s broke off', output)
+        yield error_line(output)
+        raise
@@ -0,0 +1,47 @@
+from django.test import SimpleTestCase
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from datasets.generic import links, rest
+from search.views import _details
+
+
+class DetailLinksTest(SimpleTestCase):
+    """
+    Cached detail links should be equal to the ones from `reverse`
+    """
+
+    pks = ['0363010000123456', 123, 'ASD15 S 01234 A 0001', 'a b/é', '.']
+
+    def _compare(self, request):
+        for view_name in set(_details.values()):
+            for pk in self.pks:
+                try:
+                    expected = rest.get_links(
+                        view_name, kwargs={'pk': pk}, request=request)
+                except Exception as e:
+                    expected = type(e)
+
+                try:
+                    result = links.get_detail_links(
+                        view_name, pk, request=request)
+                except Exception as e:
+                    result = type(e)
+
+                self.assertEqual(expected, result, f'{view_name} {pk}')
+
+    def test_links(self):
+        factory = APIRequestFactory()
+        self._compare(Request(factory.get('/atlas/search/adres/')))
+
+    def test_links_format(self):
+        factory = APIRequestFactory()
+        self._compare(
+            Request(factory.get('/atlas/search/adres/', {'format': 'json'})))
+
+    def test_detail_path(self):
+        self.assertEqual(
+            links.detail_path('pand-detail', '0363100012345678'),
+            rest.get_links(
+                'pand-detail',
+                kwargs={'pk': '0363100012345678'})['self']['href'])
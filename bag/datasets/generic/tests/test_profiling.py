@@ -0,0 +1,48 @@
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from datasets.generic import metrics, profiling
+
+
+class ProfilingTest(SimpleTestCase):
+    """
+    Query counts and timings per request
+    """
+
+    databases = {'default'}
+
+    def test_fingerprint(self):
+        self.assertEqual(
+            profiling.fingerprint(
+                "SELECT *  FROM bag_pand\n WHERE id = 12 AND naam = 'x''y'"),
+            'SELECT * FROM bag_pand WHERE id = %s AND naam = %s')
+        self.assertEqual(
+            profiling.fingerprint('SELECT * FROM t1 WHERE id IN (%s, %s, %s)'),
+            'SELECT * FROM t1 WHERE id IN (...)')
+
+    def test_over_budget(self):
+        def view(request):
+            with connection.cursor() as cursor:
+                for i in range(3):
+                    cursor.execute('SELECT %s', [i])
+            return HttpResponse('ok')
+
+        middleware = profiling.ProfilingMiddleware(view)
+        request = RequestFactory().get('/bag/pand/')
+
+        with override_settings(API_BUDGET_QUERIES=2), \
+                self.assertLogs(profiling.__name__, 'WARNING') as logs:
+            response = middleware(request)
+            response.close()
+
+        self.assertIn('3 queries', logs.output[0])
+        self.assertIn('3x SELECT %s', logs.output[0])
+
+        # the profile is done with the connection
+        self.assertFalse(any(
+            isinstance(wrapper, profiling.Profile)
+            for wrapper in connection.execute_wrappers))
+
+        self.assertIn(
+            'api_request_queries_count{view="unresolved"}', metrics.render())
@@ -0,0 +1,97 @@
+import datetime
+import json
+from collections import OrderedDict
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+from datasets.generic.renderers import LazyResults
+from datasets.generic.renderers import StreamingJSONRenderer
+from datasets.generic.renderers import StreamingJSONResponse
+
+
+class ItemSerializer(serializers.Serializer):
+    naam = serializers.CharField()
+    oppervlakte = serializers.DecimalField(max_digits=8, decimal_places=2)
+    begin = serializers.DateField()
+
+
+class StreamingJSONTest(SimpleTestCase):
+    """
+    Streamed json should be equal to the json rendered at once
+    """
+
+    items = [
+        {'naam': 'Silodam', 'oppervlakte': Decimal('12.5'),
+         'begin': datetime.date(2010, 1, 1)},
+        {'naam': 'Rozengracht\u2028ë', 'oppervlakte': Decimal('0'),
+         'begin': datetime.date(1900, 12, 31)},
+    ]
+
+    def _page(self, results):
+        return OrderedDict([
+            ('_links', OrderedDict([
+                ('self', dict(href='https://api/bag/pand/?page=2')),
+                ('next', dict(href=None)),
+                ('previous', dict(href='https://api/bag/pand/')),
+            ])),
+            ('count', 27),
+            ('results', results),
+        ])
+
+    def test_equal_to_render(self):
+        serializer = ItemSerializer(self.items, many=True)
+        lazy = LazyResults(serializer)
+
+        streamed = b''.join(StreamingJSONRenderer().iter_render(
+            self._page(lazy)))
+        expected = JSONRenderer().render(self._page(serializer.data))
+
+        self.assertEqual(streamed, expected)
+
+    def test_empty_and_plain(self):
+        renderer = StreamingJSONRenderer()
+        for data in [self._page([]), [1, 'a'], {}, 'a', {1: 'a'}]:
+            self.assertEqual(
+                b''.join(renderer.iter_render(data)),
+                JSONRenderer().render(data))
+        self.assertEqual(b''.join(renderer.iter_render(None)), b'')
+
+    def test_indent_not_streamed(self):
+        renderer = StreamingJSONRenderer()
+        self.assertTrue(renderer.can_stream('application/json'))
+        self.assertFalse(renderer.can_stream('application/json; indent=4'))
+
+    def test_response(self):
+        serializer = ItemSerializer(self.items, many=True)
+        response = StreamingJSONResponse(
+            self._page(LazyResults(serializer)), StreamingJSONRenderer())
+
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.data['results'][1]['naam'],
+                         'Rozengracht\u2028ë')
+        self.assertEqual(
+            response.content,
+            JSONRenderer().render(self._page(serializer.data)))
+        # the content stays available
+        self.assertEqual(
+            response.content,
+            JSONRenderer().render(self._page(serializer.data)))
+        self.assertEqual(b''.join(response), response.content)
+
+    def test_broken_off(self):
+        # the second item can not be serialized
+        serializer = ItemSerializer(
+            [self.items[0], {'naam': 'Silodam'}], many=True)
+
+        parts = []
+        with self.assertRaises(KeyError):
+            for part in StreamingJSONRenderer().iter_render(
+                    self._page(LazyResults(serializer))):
+                parts.append(part)
+
+        data = json.loads(b''.join(parts))
+        self.assertEqual(len(data['results']), 1)
+        self.assertIn('error', data)
@@ -0,0 +1,78 @@
+import json
+import os
+import tempfile
+
+from django.http import Http404
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from datasets.generic import snapshots
+
+
+class SnapshotViewTest(SimpleTestCase):
+    """
+    Serving snapshot files with ETag and Range support
+    """
+
+    content = b'0123456789' * 10
+
+    def setUp(self):
+        self.root = tempfile.TemporaryDirectory()
+        os.makedirs(os.path.join(self.root.name, '20201019-7'))
+
+        with open(os.path.join(
+                self.root.name, '20201019-7', 'pand.csv.gz'), 'wb') as f:
+            f.write(self.content)
+
+        with open(os.path.join(self.root.name, snapshots.LATEST), 'w') as f:
+            json.dump({'tag': '20201019-7', 'files': [{
+                'name': 'pand.csv.gz', 'dataset': 'pand', 'format': 'csv',
+                'size': len(self.content), 'sha1': 'abc'}]}, f)
+
+        self.settings = override_settings(SNAPSHOT_DIR=self.root.name)
+        self.settings.enable()
+        self.factory = RequestFactory()
+
+    def tearDown(self):
+        self.settings.disable()
+        self.root.cleanup()
+
+    def _get(self, name, **headers):
+        request = self.factory.get(f'/bag/snapshots/{name}', **headers)
+        return snapshots.file_view(request, name=name)
+
+    def test_byte_range(self):
+        self.assertIsNone(snapshots.byte_range(None, 100))
+        self.assertEqual(snapshots.byte_range('bytes=10-19', 100), (10, 19))
+        self.assertEqual(snapshots.byte_range('bytes=90-', 100), (90, 99))
+        self.assertEqual(snapshots.byte_range('bytes=-5', 100), (95, 99))
+        self.assertEqual(snapshots.byte_range('bytes=95-200', 100), (95, 99))
+        with self.assertRaises(ValueError):
+            snapshots.byte_range('bytes=100-', 100)
+
+    def test_file(self):
+        response = self._get('pand.csv.gz')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], '"abc"')
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+
+    def test_not_modified(self):
+        response = self._get('pand.csv.gz', HTTP_IF_NONE_MATCH='"abc"')
+        self.assertEqual(response.status_code, 304)
+
+    def test_range(self):
+        response = self._get('pand.csv.gz', HTTP_RANGE='bytes=10-14')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 10-14/100')
+        self.assertEqual(b''.join(response.streaming_content), b'01234')
+
+        # a changed file is sent whole
+        response = self._get(
+            'pand.csv.gz', HTTP_RANGE='bytes=10-14', HTTP_IF_RANGE='"old"')
+        self.assertEqual(response.status_code, 200)
+
+        response = self._get('pand.csv.gz', HTTP_RANGE='bytes=200-')
+        self.assertEqual(response.status_code, 416)
+
+    def test_unknown(self):
+        with self.assertRaises(Http404):
+            self._get('../latest.json')
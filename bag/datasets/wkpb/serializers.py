@@ -162,8 +162,8 @@ class BeperkingDetail(rest.HALSerializer):
     def to_representation(self, instance):
         data = super(BeperkingDetail, self).to_representation(instance)
 
-        data['beperkingcode'] = data['beperkingtype']
-        del data['beperkingtype']
+        if 'beperkingtype' in data:
+            data['beperkingcode'] = data.pop('beperkingtype')
 
         return data
 
@@ -8,6 +8,7 @@ from elasticsearch import Elasticsearch
 from elasticsearch.exceptions import TransportError, NotFoundError
 from elasticsearch_dsl import Search
 # Project
+from datasets.generic import metrics as generic_metrics
 from datasets.bag.models import Verblijfsobject
 from datasets.wkpb.models import Beperking
 
@@ -83,3 +84,12 @@ def check_data(request):
                 content_type="text/plain", status=500)
 
     return HttpResponse("Data OK", content_type='text/plain', status=200)
+
+
+def metrics(request):
+    """
+    Metrics of all workers in the prometheus text format
+    """
+    return HttpResponse(
+        generic_metrics.render(),
+        content_type='text/plain; version=0.0.4', status=200)
@@ -97,6 +97,15 @@ def delete_from_objectstore(container, object_name):
     return get_conn().delete_object(container, object_name)
 
 
+def put_to_objectstore(container, object_name, contents, content_type):
+    """
+    Store `contents` (bytes or a file object) as `object_name` in
+    `container`
+    """
+    return get_conn().put_object(
+        container, object_name, contents=contents, content_type=content_type)
+
+
 def download_file(container_name, file_path, target_path=None, target_root=DIVA_DIR, file_last_modified=None):
     path = file_path.split('/')
 
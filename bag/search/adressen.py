@@ -0,0 +1,421 @@
+"""
+Postcode + huisnummer lookup of adressen from a compact sorted file.
+
+The typeahead is asked for "1016SZ 228" style queries all the time.
+Instead of an elastic prefix query for every keystroke the adressen
+are written to one file, sorted on a fixed width key:
+
+    postcode (6 bytes) + toevoeging (20 bytes)
+
+lowercased like the `postcode.raw` and `toevoeging` fields are. A
+postcode + huisnummer prefix is a binary search in that file. The
+file is memory mapped, so all uwsgi workers on a host share the same
+pages.
+
+File layout (little endian):
+
+    header   magic, generation (uint64), generation created (int64,
+             microseconds since the epoch), count (uint64)
+    keys     count * KEY_SIZE bytes, sorted
+    offsets  (count + 1) * uint64, start of every payload
+    payload  json of each adres: [id, _source]
+
+The file is built from the nummeraanduiding index by the
+`build_adres_index` command, or in the background by the first worker
+that finds it missing or of another import generation. Until then
+elastic is asked. A file is only used for the generation it is built
+for, the id and the creation time of the generation identify it, so
+a file left behind by another database is never used.
+
+The adressen are sorted in runs of RUN_SIZE spilled to disk and
+merged, the build does not hold the whole index in memory.
+"""
+
+import bisect
+import fcntl
+import heapq
+import json
+import logging
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from elasticsearch.exceptions import TransportError
+from elasticsearch_dsl import Search
+from elasticsearch_dsl.response import Hit
+
+from batch import generation
+from search.queries import TYPEAHEAD_SOURCE
+from search.query_analyzer import QueryAnalyzer
+
+log = logging.getLogger(__name__)
+
+NUMMERAANDUIDING = settings.ELASTIC_INDICES['NUMMERAANDUIDING']
+
+MAGIC = b'BAGADR02'
+HEADER = struct.Struct('<8sQqQ')
+OFFSET = struct.Struct('<Q')
+
+# adressen sorted in memory at once while building
+RUN_SIZE = 50000
+
+POSTCODE_SIZE = 6
+# max_gram of the edge_ngram_filter of the toevoeging analyzer
+TOEVOEGING_SIZE = 20
+KEY_SIZE = POSTCODE_SIZE + TOEVOEGING_SIZE
+
+SOURCE_FIELDS = TYPEAHEAD_SOURCE['includes'] + [
+    'postcode', 'straatnaam', 'huisnummer', 'toevoeging']
+
+# the naam_stripper char filter of the toevoeging analyzer
+_STRIP = str.maketrans('-./', '   ')
+
+
+def postcode_key(postcode: str) -> bytes:
+    return postcode.lower().encode('utf-8')
+
+
+def toevoeging_key(toevoeging: str) -> bytes:
+    """
+    The longest edge ngram of the `toevoeging` analyzer
+    """
+    return toevoeging.translate(_STRIP).lower().encode('utf-8')[
+        :TOEVOEGING_SIZE]
+
+
+def record_key(source: dict) -> bytes:
+    """
+    Key of an adres, None when it has no (valid) postcode
+    """
+    postcode = postcode_key(source.get('postcode') or '')
+    if len(postcode) != POSTCODE_SIZE:
+        return None
+
+    toevoeging = toevoeging_key(source.get('toevoeging') or '')
+    return (postcode + toevoeging).ljust(KEY_SIZE, b'\0')
+
+
+def sort_key(hit):
+    """
+    sort_fields of `postcode_huisnummer_query`
+    """
+    return (
+        (hit.straatnaam or '').lower(),
+        hit.huisnummer or 0,
+        hit.toevoeging or '',
+        hit.meta.id,
+    )
+
+
+class _Keys(object):
+    """
+    The sorted keys in the file as a sequence, for bisect
+    """
+
+    def __init__(self, buffer, start: int, count: int):
+        self._buffer = buffer
+        self._start = start
+        self._count = count
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, i: int) -> bytes:
+        start = self._start + i * KEY_SIZE
+        return self._buffer[start:start + KEY_SIZE]
+
+
+class AdresIndex(object):
+    """
+    Adressen of one import generation in a sorted, mapped file
+    """
+
+    def __init__(self, buffer, path: str = None):
+        self.path = path
+        self._buffer = buffer
+
+        magic, self.generation, self.created, count = \
+            HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError(f'{path} is not an adres index')
+
+        self._keys = _Keys(buffer, HEADER.size, count)
+        self._offsets = HEADER.size + count * KEY_SIZE
+        self._payload = self._offsets + (count + 1) * OFFSET.size
+
+    @classmethod
+    def open(cls, path: str):
+        with open(path, 'rb') as index_file:
+            buffer = mmap.mmap(
+                index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(buffer, path)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _offset(self, i: int) -> int:
+        return self._payload + OFFSET.unpack_from(
+            self._buffer, self._offsets + i * OFFSET.size)[0]
+
+    def _hit(self, i: int) -> Hit:
+        payload = self._buffer[self._offset(i):self._offset(i + 1)]
+        _id, source = json.loads(payload.decode('utf-8'))
+        return Hit({
+            '_index': NUMMERAANDUIDING,
+            '_type': 'doc',
+            '_id': _id,
+            '_score': None,
+            '_source': source,
+        })
+
+    def prefix_hits(self, postcode: str, toevoeging: str) -> list:
+        """
+        Adressen with `postcode` of which the toevoeging starts with
+        `toevoeging`, ordered like `postcode_huisnummer_query`
+        """
+        postcode = postcode_key(postcode)
+        toevoeging = toevoeging.lower().encode('utf-8')
+
+        if len(postcode) != POSTCODE_SIZE or len(toevoeging) > TOEVOEGING_SIZE:
+            return []
+
+        prefix = postcode + toevoeging
+
+        hits = []
+        i = bisect.bisect_left(self._keys, prefix)
+        while i < len(self._keys) and self._keys[i].startswith(prefix):
+            hits.append(self._hit(i))
+            i += 1
+
+        hits.sort(key=sort_key)
+        return hits
+
+    def postcode_huisnummer_hits(self, analyzer: QueryAnalyzer) -> list:
+        postcode, _, toevoeging = analyzer.get_postcode_huisnummer_toevoeging()
+        return self.prefix_hits(postcode, toevoeging)
+
+    def postcode_huisnummer_exact_hits(self, analyzer: QueryAnalyzer) -> list:
+        postcode, huisnummer, toevoeging = \
+            analyzer.get_postcode_huisnummer_toevoeging()
+        return [
+            hit for hit in self.prefix_hits(postcode, toevoeging)
+            if hit.huisnummer == huisnummer
+        ]
+
+    # query builder name -> lookup
+    lookups = {
+        'postcode_huisnummer_query': postcode_huisnummer_hits,
+        'postcode_huisnummer_exact_query': postcode_huisnummer_exact_hits,
+    }
+
+    def hits(self, name: str, analyzer: QueryAnalyzer):
+        """
+        Hits of the query builder `name`, None if it is not in the file
+        """
+        lookup = self.lookups.get(name)
+        if lookup is None:
+            return None
+        return lookup(self, analyzer)
+
+
+def _spill(records: list, directory: str):
+    """
+    The `records` sorted in a temporary file
+    """
+    records.sort()
+    run = tempfile.TemporaryFile(dir=directory)
+    for key, payload in records:
+        run.write(key)
+        run.write(OFFSET.pack(len(payload)))
+        run.write(payload)
+    run.seek(0)
+    return run
+
+
+def _read(run):
+    while True:
+        key = run.read(KEY_SIZE)
+        if not key:
+            return
+        size = OFFSET.unpack(run.read(OFFSET.size))[0]
+        yield key, run.read(size)
+
+
+def write(path: str, documents, generation_id: int = 0,
+          created: int = 0) -> int:
+    """
+    Write (id, _source) documents to an adres index file at `path`
+
+    The file is written next to `path` and moved in place, mapped
+    files of workers stay valid.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    runs = []
+    records = []
+
+    try:
+        for _id, source in documents:
+            key = record_key(source)
+            if key is None:
+                continue
+            payload = json.dumps(
+                [_id, source], separators=(',', ':')).encode('utf-8')
+            records.append((key, payload))
+            if len(records) >= RUN_SIZE:
+                runs.append(_spill(records, directory))
+                records = []
+        if records:
+            runs.append(_spill(records, directory))
+        records = None
+
+        count = 0
+        with tempfile.TemporaryFile(dir=directory) as keys, \
+                tempfile.TemporaryFile(dir=directory) as offsets, \
+                tempfile.TemporaryFile(dir=directory) as payloads:
+            offset = 0
+            for key, payload in heapq.merge(*[_read(run) for run in runs]):
+                keys.write(key)
+                offsets.write(OFFSET.pack(offset))
+                payloads.write(payload)
+                offset += len(payload)
+                count += 1
+            offsets.write(OFFSET.pack(offset))
+
+            tmp_path = f'{path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'wb') as index_file:
+                index_file.write(
+                    HEADER.pack(MAGIC, generation_id, created, count))
+                for section in (keys, offsets, payloads):
+                    section.seek(0)
+                    shutil.copyfileobj(section, index_file)
+    finally:
+        for run in runs:
+            run.close()
+
+    os.replace(tmp_path, path)
+    return count
+
+
+def scan(client):
+    """
+    The (id, _source) of all adressen in elastic
+    """
+    search = (
+        Search()
+        .using(client)
+        .index(NUMMERAANDUIDING)
+        .source(SOURCE_FIELDS)
+        .params(size=5000)
+    )
+
+    for hit in search.scan():
+        yield hit.meta.id, hit.to_dict()
+
+
+def identity() -> (int, int):
+    """
+    The (id, creation time in microseconds) of the current generation
+    """
+    created = generation.created()
+    if created is None:
+        return generation.current(), 0
+    return generation.current(), int(created.timestamp() * 1000000)
+
+
+def build(client, path: str = None) -> int:
+    """
+    Build the adres index file of the current generation from the
+    nummeraanduiding index
+    """
+    path = path or settings.SEARCH_ADRES_INDEX
+    generation_id, created = identity()
+    return write(path, scan(client), generation_id, created)
+
+
+def _build_in_background(client, path: str):
+    # only one worker per host builds the file, the others keep
+    # asking elastic until it is there
+    with open(f'{path}.lock', 'w') as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return
+
+        try:
+            count = build(client, path)
+        except (TransportError, OSError):
+            log.exception('Could not build adres index %s', path)
+            return
+
+    log.info('Built adres index %s with %d adressen', path, count)
+
+
+# query builders answered by the index
+QUERIES = frozenset(AdresIndex.lookups)
+
+_lock = threading.Lock()
+_index = None
+_checked = None
+_builder = None
+
+
+def _open(path: str):
+    try:
+        return AdresIndex.open(path)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, struct.error):
+        log.exception('Could not open adres index %s', path)
+        return None
+
+
+def _current(index, wanted) -> bool:
+    return index is not None and \
+        (index.generation, index.created) == wanted
+
+
+def get_index(client):
+    """
+    The adres index of the current generation, None when it is
+    switched off or not (yet) built
+    """
+    global _index, _checked, _builder
+
+    if not settings.SEARCH_LOCAL_ADRESSEN:
+        return None
+
+    wanted = identity()
+    if _current(_index, wanted):
+        return _index
+
+    now = time.monotonic()
+    if _checked is not None and now - _checked < generation.CHECK_INTERVAL:
+        return None
+
+    with _lock:
+        if _current(_index, wanted):
+            return _index
+
+        _checked = now
+        path = settings.SEARCH_ADRES_INDEX
+
+        index = _open(path)
+        if _current(index, wanted):
+            _index = index
+            log.info(
+                'Opened adres index %s with %d adressen for generation %d',
+                path, len(index), index.generation)
+            return _index
+
+        if _builder is None or not _builder.is_alive():
+            _builder = threading.Thread(
+                target=_build_in_background, args=(client, path),
+                name='adres-index', daemon=True)
+            _builder.start()
+
+    return None
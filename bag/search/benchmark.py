@@ -0,0 +1,190 @@
+"""
+Replay a corpus of typeahead / search queries and measure them.
+
+A corpus is a json list of queries:
+
+    [
+        {"kind": "postcode", "url": "/atlas/typeahead/bag/", "q": "1016SZ"},
+        ...
+    ]
+
+For every kind the latency percentiles, the time spent in elastic
+(`took`) and the overlap of the results with a stored baseline are
+reported. The baseline is a json dict of "url?q" -> result uris.
+
+The queries are measured without the caches that answer a repeated
+query from an earlier one (`UNCACHED`), every run hits elastic.
+"""
+
+import json
+import math
+import time
+from collections import OrderedDict, defaultdict, namedtuple
+from urllib.parse import urlparse
+
+from search import timing
+
+# the test fixture is only loaded into indices with this suffix
+INDEX_SUFFIX = '_benchmark'
+
+# settings without the caches of repeated queries: the kadastraal
+# subject results and the shared results of identical requests
+UNCACHED = {
+    'SEARCH_SUBJECT_CACHE_TTL': 0,
+    'SEARCH_SINGLEFLIGHT': False,
+}
+
+CorpusQuery = namedtuple('CorpusQuery', ['kind', 'url', 'q'])
+
+Measurement = namedtuple(
+    'Measurement', ['query', 'status', 'wall', 'took', 'results'])
+
+
+def dedicated_indices(indices: dict) -> bool:
+    """
+    Are all elastic `indices` (settings.ELASTIC_INDICES) benchmark
+    indices
+    """
+    return all(name.endswith(INDEX_SUFFIX) for name in indices.values())
+
+
+def load_corpus(path: str) -> [CorpusQuery]:
+    with open(path) as corpus_file:
+        entries = json.load(corpus_file)
+
+    return [
+        CorpusQuery(entry['kind'], entry['url'], entry['q'])
+        for entry in entries
+    ]
+
+
+def query_key(query: CorpusQuery) -> str:
+    return f'{query.url}?q={query.q}'
+
+
+def percentile(values: [float], pct: float) -> float:
+    """
+    Nearest rank percentile
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(int(math.ceil(pct / 100.0 * len(ordered))), 1)
+    return ordered[rank - 1]
+
+
+def _uri(href: str) -> str:
+    return urlparse(href).path.lstrip('/')
+
+
+def result_keys(data) -> [str]:
+    """
+    The uris of the results of a typeahead or search response
+    in order of appearance
+    """
+    keys = []
+
+    if isinstance(data, dict):
+        # search response
+        for hit in data.get('results', []):
+            href = hit.get('_links', {}).get('self', {}).get('href')
+            if href:
+                keys.append(_uri(href))
+    elif isinstance(data, list):
+        # typeahead response
+        for group in data:
+            for item in group.get('content', []):
+                keys.append(item['uri'])
+
+    return keys
+
+
+def overlap(results: [str], baseline: [str]) -> float:
+    """
+    Jaccard overlap of two result lists, 1.0 when both are empty
+    """
+    results, baseline = set(results), set(baseline)
+    if not results and not baseline:
+        return 1.0
+    return len(results & baseline) / len(results | baseline)
+
+
+def measure(client, query: CorpusQuery, **headers) -> Measurement:
+    """
+    Execute one query using a django test client
+    """
+    start = time.perf_counter()
+    response = client.get(query.url, {'q': query.q}, **headers)
+    wall = (time.perf_counter() - start) * 1000
+
+    took = sum(
+        t.took for t in timing.request_timings(response.wsgi_request)
+        if t.took is not None)
+
+    results = []
+    if response.status_code == 200:
+        results = result_keys(json.loads(response.content.decode('utf-8')))
+
+    return Measurement(query, response.status_code, wall, took, results)
+
+
+def run(client, corpus: [CorpusQuery], repeat: int = 1, warmup: int = 0,
+        **headers) -> [Measurement]:
+    for _ in range(warmup):
+        for query in corpus:
+            measure(client, query, **headers)
+
+    measurements = []
+    for _ in range(repeat):
+        for query in corpus:
+            measurements.append(measure(client, query, **headers))
+
+    return measurements
+
+
+def baseline_from(measurements: [Measurement]) -> dict:
+    baseline = OrderedDict()
+    for measurement in measurements:
+        baseline[query_key(measurement.query)] = measurement.results
+    return baseline
+
+
+def summarize(measurements: [Measurement], baseline: dict = None) -> OrderedDict:
+    """
+    Per kind: count, errors, p50/p95/p99 latency, p50/p95 took and
+    the mean overlap with the baseline
+    """
+    per_kind = defaultdict(list)
+    for measurement in measurements:
+        per_kind[measurement.query.kind].append(measurement)
+
+    summary = OrderedDict()
+
+    for kind in sorted(per_kind):
+        kind_measurements = per_kind[kind]
+        walls = [m.wall for m in kind_measurements]
+        tooks = [m.took for m in kind_measurements]
+
+        row = OrderedDict([
+            ('count', len(kind_measurements)),
+            ('errors', sum(1 for m in kind_measurements if m.status != 200)),
+            ('p50', percentile(walls, 50)),
+            ('p95', percentile(walls, 95)),
+            ('p99', percentile(walls, 99)),
+            ('took_p50', percentile(tooks, 50)),
+            ('took_p95', percentile(tooks, 95)),
+            ('overlap', None),
+        ])
+
+        if baseline is not None:
+            overlaps = [
+                overlap(m.results, baseline[query_key(m.query)])
+                for m in kind_measurements
+                if query_key(m.query) in baseline
+            ]
+            if overlaps:
+                row['overlap'] = sum(overlaps) / len(overlaps)
+
+        summary[kind] = row
+
+    return summary
@@ -0,0 +1,231 @@
+"""
+In memory lookup of gebieden and bouwblokken for the typeahead.
+
+There are only a few thousand gebieden (stadsdelen, buurten, wijken,
+..) and bouwblokken, and they only change with an import. Instead of
+asking elastic on every keystroke they are loaded once from the
+elastic indexes, so hits and uri's are the same, and matched in
+memory like `gebied_query` and `bouwblok_query` do. The lookup is
+reloaded when the import generation changes. When loading fails
+elastic is asked, loading is tried again after RETRY_INTERVAL.
+"""
+
+import logging
+import re
+import threading
+import time
+import unicodedata
+
+from django.conf import settings
+from elasticsearch.exceptions import TransportError
+from elasticsearch_dsl import Search
+
+from batch import generation
+from search.queries import TYPEAHEAD_SOURCE
+from search.query_analyzer import QueryAnalyzer
+
+log = logging.getLogger(__name__)
+
+BAG_GEBIED = settings.ELASTIC_INDICES['BAG_GEBIED']
+BAG_BOUWBLOK = settings.ELASTIC_INDICES['BAG_BOUWBLOK']
+
+# seconds before loading is tried again after a failure
+RETRY_INTERVAL = 60
+
+# scores of _basis_openbare_ruimte_query: must + prefix + phrase_prefix
+_PREFIX_SCORE = 1 + 10 + 5
+_PHRASE_SCORE = 1 + 5
+
+# the naam_stripper char filter and synonym filter of the adres analyzer
+_STRIP = str.maketrans('-./', '   ')
+_SYNONYMS = {
+    'eerste': '1e',
+    'tweede': '2e',
+    'derde': '3e',
+    'vierde': '4e',
+}
+
+
+def _fold(text: str) -> str:
+    text = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(c for c in text if not unicodedata.combining(c))
+
+
+def adres_tokens(text: str) -> [str]:
+    """
+    Tokens like the `adres` analyzer makes them
+    """
+    tokens = re.findall(r'\w+', _fold(text.translate(_STRIP)))
+    return [_SYNONYMS.get(token, token) for token in tokens]
+
+
+def phrase_prefix_match(tokens: [str], query: [str]) -> bool:
+    """
+    The query tokens are a phrase in tokens, the last one a prefix
+    """
+    if not query:
+        return False
+
+    *phrase, prefix = query
+
+    for start in range(len(tokens) - len(phrase)):
+        if tokens[start:start + len(phrase)] != phrase:
+            continue
+        if tokens[start + len(phrase)].startswith(prefix):
+            return True
+
+    return False
+
+
+def bouwblok_tokens(code: str) -> [str]:
+    """
+    The longest edge ngrams of the `bouwblokid` analyzer
+    """
+    return [token[:4] for token in re.findall('[a-z0-9]+', code.lower())]
+
+
+class GebiedenIndex(object):
+    """
+    Gebieden and bouwblokken of one import generation
+    """
+
+    def __init__(self, gebieden, bouwblokken, generation_id: int = 0):
+        self.generation = generation_id
+
+        # (hit, naam, naam.keyword, tokens)
+        self._gebieden = [
+            (hit, hit.naam, hit.naam.lower(), adres_tokens(hit.naam))
+            for hit in gebieden if getattr(hit, 'naam', None)
+        ]
+
+        # (hit, code, tokens)
+        self._bouwblokken = [
+            (hit, hit.code, bouwblok_tokens(hit.code))
+            for hit in bouwblokken if getattr(hit, 'code', None)
+        ]
+
+    def __len__(self):
+        return len(self._gebieden) + len(self._bouwblokken)
+
+    def gebied_hits(self, analyzer: QueryAnalyzer) -> list:
+        """
+        Hits of `gebied_query`, best matches first
+        """
+        naam = analyzer.get_straatnaam()
+        query = adres_tokens(naam)
+
+        matches = []
+
+        for hit, _, keyword, tokens in self._gebieden:
+            if keyword.startswith(naam):
+                score = _PREFIX_SCORE
+            elif phrase_prefix_match(tokens, query):
+                score = _PHRASE_SCORE
+            else:
+                continue
+            matches.append((-score, keyword, hit.meta.id, hit))
+
+        matches.sort(key=lambda match: match[:3])
+        return [match[-1] for match in matches]
+
+    def bouwblok_hits(self, analyzer: QueryAnalyzer) -> list:
+        """
+        Hits of `bouwblok_query`, ordered by code
+        """
+        code = analyzer.get_bouwblok()
+
+        matches = [
+            (bouwblok_code, hit.meta.id, hit)
+            for hit, bouwblok_code, tokens in self._bouwblokken
+            if any(token.startswith(code) for token in tokens)
+        ]
+
+        matches.sort(key=lambda match: match[:2])
+        return [match[-1] for match in matches]
+
+    # query builder name -> lookup
+    lookups = {
+        'gebied_query': gebied_hits,
+        'bouwblok_query': bouwblok_hits,
+    }
+
+    def hits(self, name: str, analyzer: QueryAnalyzer):
+        """
+        Hits of the query builder `name`, None if it is not in memory
+        """
+        lookup = self.lookups.get(name)
+        if lookup is None:
+            return None
+        return lookup(self, analyzer)
+
+
+def load(client, generation_id: int = 0) -> GebiedenIndex:
+    """
+    Load gebieden and bouwblokken from elastic
+    """
+    gebieden = (
+        Search()
+        .using(client)
+        .index(BAG_GEBIED)
+        .filter('term', type='gebied')
+        .source(TYPEAHEAD_SOURCE['includes'] + ['naam'])
+        .params(size=1000)
+        .scan()
+    )
+
+    bouwblokken = (
+        Search()
+        .using(client)
+        .index(BAG_BOUWBLOK)
+        .source(TYPEAHEAD_SOURCE['includes'] + ['code'])
+        .params(size=1000)
+        .scan()
+    )
+
+    return GebiedenIndex(gebieden, bouwblokken, generation_id)
+
+
+# query builders answered by the index
+QUERIES = frozenset(GebiedenIndex.lookups)
+
+_lock = threading.Lock()
+_index = None
+_failed = None
+
+
+def get_index(client):
+    """
+    The in memory index of the current generation, None when it
+    is switched off or could not be loaded
+    """
+    global _index, _failed
+
+    if not settings.SEARCH_LOCAL_GEBIEDEN:
+        return None
+
+    current = generation.current()
+    index = _index
+
+    if index is not None and index.generation == current:
+        return index
+
+    if _failed is not None and time.monotonic() - _failed < RETRY_INTERVAL:
+        return None
+
+    with _lock:
+        if _failed is not None and \
+                time.monotonic() - _failed < RETRY_INTERVAL:
+            return None
+
+        if _index is None or _index.generation != current:
+            try:
+                _index = load(client, current)
+            except TransportError:
+                log.exception('Could not load gebieden from elastic')
+                _failed = time.monotonic()
+                return None
+            _failed = None
+            log.info(
+                'Loaded %d gebieden for generation %d', len(_index), current)
+
+    return _index
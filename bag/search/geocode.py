@@ -0,0 +1,157 @@
+"""
+Bulk geocoding of adressen.
+
+Input is a list of adressen, as json:
+
+    ["silodam 340", {"id": "a1", "q": "Rozengracht 228a"},
+     {"id": 2, "postcode": "1016SZ", "huisnummer": 228, "toevoeging": "a"}]
+
+or as csv with a `q` column, or `postcode`, `huisnummer` and optional
+`toevoeging` columns, and an optional `id` column.
+
+Every row is analyzed like a `search/adres` query and answered with
+its best match, in the order of the input. Rows that could not be
+searched are answered with an `error`.
+"""
+
+import csv
+import io
+from collections import OrderedDict, namedtuple
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+GeocodeRow = namedtuple('GeocodeRow', ['id', 'q'])
+
+# _source fields of a geocoded adres
+SOURCE = [
+    '_display',
+    'landelijk_id',
+    'adresseerbaar_object_id',
+    'postcode',
+    'huisnummer',
+    'toevoeging',
+    'centroid',
+]
+
+FIELDS = [
+    'id',
+    'q',
+    'found',
+    '_display',
+    'landelijk_id',
+    'adresseerbaar_object_id',
+    'postcode',
+    'huisnummer',
+    'toevoeging',
+    'lon',
+    'lat',
+    'error',
+]
+
+# error of the rows that could not be searched
+SEARCH_FAILED = 'search failed'
+
+
+class CSVTextParser(BaseParser):
+    """
+    Hands a text/csv request body over as text
+    """
+    media_type = 'text/csv'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return stream.read().decode('utf-8-sig')
+        except UnicodeDecodeError as exc:
+            raise ParseError(f'CSV must be utf-8: {exc}')
+
+
+def query_text(entry: dict) -> str:
+    """
+    The search text of a json object or csv row
+    """
+    if entry.get('q'):
+        return str(entry['q'])
+
+    parts = [entry.get(key) for key in ('postcode', 'huisnummer', 'toevoeging')]
+    return ' '.join(str(part) for part in parts if part not in (None, ''))
+
+
+def _too_many(max_rows: int):
+    return ParseError(f'At most {max_rows} adressen per request')
+
+
+def rows_from_json(data, max_rows: int = None) -> [GeocodeRow]:
+    if isinstance(data, dict):
+        data = data.get('adressen')
+
+    if not isinstance(data, list):
+        raise ParseError('Expected a list of adressen')
+
+    if max_rows is not None and len(data) > max_rows:
+        raise _too_many(max_rows)
+
+    rows = []
+    for number, entry in enumerate(data):
+        if isinstance(entry, str):
+            rows.append(GeocodeRow(number, entry))
+        elif isinstance(entry, dict):
+            rows.append(GeocodeRow(entry.get('id', number), query_text(entry)))
+        else:
+            raise ParseError(f'Adres {number} is not a text or an object')
+
+    return rows
+
+
+def rows_from_csv(lines, max_rows: int = None) -> [GeocodeRow]:
+    """
+    The rows of a csv text or text file, read until there are more
+    than `max_rows`
+    """
+    if isinstance(lines, str):
+        lines = io.StringIO(lines)
+
+    try:
+        reader = csv.DictReader(lines)
+
+        fieldnames = set(reader.fieldnames or [])
+        if 'q' not in fieldnames and \
+                not {'postcode', 'huisnummer'} <= fieldnames:
+            raise ParseError(
+                'CSV needs a q column or postcode and huisnummer columns')
+
+        rows = []
+        for number, row in enumerate(reader):
+            if max_rows is not None and number >= max_rows:
+                raise _too_many(max_rows)
+            rows.append(GeocodeRow(row.get('id') or number, query_text(row)))
+    except UnicodeDecodeError as exc:
+        raise ParseError(f'CSV must be utf-8: {exc}')
+
+    return rows
+
+
+def result_row(row: GeocodeRow, hit=None, error: str = None) -> OrderedDict:
+    """
+    The output row of an input row and its best hit, or the error
+    searching it
+    """
+    result = OrderedDict((field, None) for field in FIELDS)
+    result['id'] = row.id
+    result['q'] = row.q
+    result['found'] = hit is not None
+    result['error'] = error
+
+    if hit is None:
+        return result
+
+    source = hit.to_dict()
+    for field in SOURCE:
+        if field in result:
+            result[field] = source.get(field)
+
+    centroid = source.get('centroid')
+    if centroid:
+        result['lon'], result['lat'] = centroid
+
+    return result
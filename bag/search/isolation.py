@@ -0,0 +1,103 @@
+"""
+Keep slow queries from stalling the others.
+
+The kadastraal subject queries (fuzzy phrase prefix on a large index)
+are the slowest. In the typeahead they run in a thread of their own
+next to the other queries, with their own time budget. When the
+budget is spent the response is sent without them and marked partial
+with the `X-Search-Partial` header.
+
+Their results are cached for a short time per authorization scope:
+the same text gives other results for other scopes.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import caches
+
+from bag import authorization_levels
+from search import singleflight
+from search import timing
+
+log = logging.getLogger(__name__)
+
+PARTIAL_HEADER = 'X-Search-Partial'
+
+# attribute on the request holding the names of the left out queries
+_REQUEST_ATTR = '_search_partial'
+
+_executor = None
+
+
+def executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.SEARCH_SUBJECT_THREADS,
+            thread_name_prefix='search-subject')
+    return _executor
+
+
+def timeout() -> float:
+    """
+    Time budget of the subject queries in seconds
+    """
+    return settings.SEARCH_SUBJECT_TIMEOUT
+
+
+def elastic_timeout() -> str:
+    """
+    The time budget as elastic `timeout`, elastic then returns the
+    hits found so far instead of going on
+    """
+    return f'{int(timeout() * 1000)}ms'
+
+
+def scopes(request) -> [str]:
+    """
+    The scopes of the request, authorized queries depend on them
+    """
+    is_authorized_for = getattr(request, 'is_authorized_for', None)
+    if is_authorized_for is None:
+        return []
+    return [
+        scope for scope in sorted(authorization_levels.all_options)
+        if is_authorized_for(scope)
+    ]
+
+
+def cache_key(request_scopes: [str], *parts) -> str:
+    return 'search-subject:' + singleflight.make_key(
+        tuple(request_scopes), *parts)
+
+
+def cache_get(key: str):
+    if not settings.SEARCH_SUBJECT_CACHE_TTL:
+        return None
+    return caches[settings.SEARCH_SUBJECT_CACHE].get(key)
+
+
+def cache_set(key: str, value):
+    if not settings.SEARCH_SUBJECT_CACHE_TTL:
+        return
+    caches[settings.SEARCH_SUBJECT_CACHE].set(
+        key, value, timeout=settings.SEARCH_SUBJECT_CACHE_TTL)
+
+
+def mark_partial(request, name: str):
+    """
+    The results of query `name` are left out or incomplete
+    """
+    request = timing._http_request(request)
+    partial = getattr(request, _REQUEST_ATTR, None)
+    if partial is None:
+        partial = []
+        setattr(request, _REQUEST_ATTR, partial)
+    if name not in partial:
+        partial.append(name)
+
+
+def partial(request) -> [str]:
+    return getattr(timing._http_request(request), _REQUEST_ATTR, [])
@@ -18,6 +18,24 @@ from elasticsearch_dsl import Search
 
 log = logging.getLogger(__name__)
 
+# _source fields needed to show a typeahead hit and build its uri
+TYPEAHEAD_SOURCE = {
+    'includes': [
+        '_display',
+        'type',
+        'subtype',
+        'subtype_id',
+        'landelijk_id',
+        'adresseerbaar_object_id',
+    ],
+}
+
+# name of the completion suggestion in a suggest search
+SUGGEST_NAME = 'typeahead'
+
+# options asked from a completion suggester, enough to fill the groups
+SUGGEST_SIZE = 50
+
 
 class ElasticQueryWrapper(object):
     """
@@ -29,7 +47,9 @@ class ElasticQueryWrapper(object):
                  sort_fields: [str] = None,
                  indexes: [str] = None,
                  size: int = None,
-                 custom_sort_function: typing.Callable = None
+                 custom_sort_function: typing.Callable = None,
+                 name: str = None,
+                 suggest: dict = None
                  ):
         """
         :param query: an elastic search query
@@ -38,14 +58,25 @@ class ElasticQueryWrapper(object):
 
         :param size: an optional limit on size of the result set
         :param custom_sort_function: an optional function to use for client-side sorting
+        :param name: an optional name of the query builder, used in
+            elastic search statistics and timings
+        :param suggest: an optional completion suggester for the same
+            matches: the `prefix`, the completion `field` and `contexts`
         """
         self.query = query
         self.sort_fields = sort_fields
         self.indexes = indexes
         self.size = size
         self.custom_sort_function = custom_sort_function
+        self.name = name
+        self.suggest = suggest
 
-    def to_elasticsearch_object(self, client) -> Search:
+    def to_elasticsearch_object(self, client, source: dict = None) -> Search:
+        """
+        :param client: the elastic search client
+        :param source: an optional _source projection, a dict with
+            `includes` and / or `excludes` field patterns
+        """
         assert self.indexes
 
         search = (
@@ -63,4 +94,39 @@ class ElasticQueryWrapper(object):
 
         search = search[0:size]
 
+        if source:
+            search = search.source(**source)
+
+        if self.name:
+            search = search.extra(stats=[self.name])
+
+        return search
+
+    def to_suggest_object(self, client, source: dict = None,
+                          size: int = SUGGEST_SIZE) -> Search:
+        """
+        A search asking only the completion suggester, no hits
+
+        :param client: the elastic search client
+        :param source: an optional _source projection of the options
+        :param size: the number of options
+        """
+        assert self.indexes and self.suggest
+
+        completion = dict(self.suggest, size=size)
+        prefix = completion.pop('prefix')
+
+        search = (
+            Search()
+            .using(client)
+            .index(*self.indexes)
+            .suggest(SUGGEST_NAME, prefix, completion=completion)
+        )[0:0]
+
+        if source:
+            search = search.source(**source)
+
+        if self.name:
+            search = search.extra(stats=[self.name])
+
         return search
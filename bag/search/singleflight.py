@@ -0,0 +1,139 @@
+"""
+Coalesce identical in-flight requests.
+
+When many clients ask the same typeahead at the same moment, only the
+first one (the leader) asks elastic. The others wait for its result
+and share it.
+
+Within a process this is done with a dict of calls in flight. With
+SEARCH_SINGLEFLIGHT_CACHE set to the alias of a cache shared by the
+processes (memcached, redis, database) the leader also takes a lock
+in that cache and leaves its result there for a moment, so workers in
+other processes wait for it too. A follower that waits too long, or
+of which the leader failed, executes the call itself.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+log = logging.getLogger(__name__)
+
+# seconds a follower waits for the leader
+WAIT = 5.0
+
+# seconds a result stays in the shared cache for late followers
+SHARE_TTL = 1
+
+# seconds between looks in the shared cache
+POLL_INTERVAL = 0.01
+
+_MISSING = object()
+
+
+def make_key(*parts) -> str:
+    """
+    Key of a call from its parts, usable as cache key
+    """
+    text = '\x1f'.join(repr(part) for part in parts)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class _Call(object):
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = _MISSING
+
+
+class SingleFlight(object):
+    """
+    Calls with the same key in flight share one execution
+    """
+
+    def __init__(self, cache_alias: str = None, wait: float = WAIT):
+        self.cache_alias = cache_alias
+        self.wait = wait
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key: str, fn) -> (object, bool):
+        """
+        Execute `fn` once for all concurrent callers with `key`
+
+        Returns the value and whether it was shared by another call.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait(self.wait)
+            if call.value is not _MISSING:
+                return call.value, True
+            return fn(), False
+
+        try:
+            value, shared = self._do_shared(key, fn)
+            call.value = value
+            return value, shared
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def _do_shared(self, key: str, fn) -> (object, bool):
+        if not self.cache_alias:
+            return fn(), False
+
+        cache = caches[self.cache_alias]
+        lock_key = f'singleflight:{key}:lock'
+        value_key = f'singleflight:{key}:value'
+
+        value = cache.get(value_key, _MISSING)
+        if value is not _MISSING:
+            return value, True
+
+        if not cache.add(lock_key, 1, timeout=int(self.wait) + 1):
+            # another process is the leader
+            deadline = time.monotonic() + self.wait
+            while time.monotonic() < deadline:
+                time.sleep(POLL_INTERVAL)
+                value = cache.get(value_key, _MISSING)
+                if value is not _MISSING:
+                    return value, True
+                if cache.get(lock_key) is None:
+                    # the leader failed
+                    break
+            return fn(), False
+
+        try:
+            value = fn()
+            cache.set(value_key, value, timeout=SHARE_TTL)
+            return value, False
+        finally:
+            cache.delete(lock_key)
+
+
+_flight = None
+
+
+def get_flight() -> SingleFlight:
+    """
+    The SingleFlight of this process, None when switched off
+    """
+    global _flight
+
+    if not settings.SEARCH_SINGLEFLIGHT:
+        return None
+
+    if _flight is None:
+        _flight = SingleFlight(settings.SEARCH_SINGLEFLIGHT_CACHE)
+
+    return _flight
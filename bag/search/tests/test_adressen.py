@@ -0,0 +1,100 @@
+import os
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from search import adressen
+from search.query_analyzer import QueryAnalyzer
+
+
+def _adres(_id, straat, huisnummer, toevoeging, postcode='1016SZ'):
+    return _id, {
+        '_display': f'{straat} {toevoeging}',
+        'subtype': 'verblijfsobject',
+        'landelijk_id': f'0363200000{_id}',
+        'adresseerbaar_object_id': f'0363010000{_id}',
+        'postcode': postcode,
+        'straatnaam': straat,
+        'huisnummer': huisnummer,
+        'toevoeging': toevoeging,
+    }
+
+
+class AdresIndexTest(SimpleTestCase):
+    """
+    Postcode + huisnummer lookup in a sorted file
+    """
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.path = os.path.join(directory, 'adressen.idx')
+
+        count = adressen.write(self.path, [
+            _adres('1', 'Rozengracht', 228, '228 A 1'),
+            _adres('2', 'Rozengracht', 228, '228 A 2'),
+            _adres('3', 'Rozengracht', 228, '228'),
+            _adres('4', 'Rozengracht', 22, '22'),
+            _adres('5', 'Bloemgracht', 2, '2'),
+            _adres('6', 'Marnixstraat', 228, '228', postcode='1015CX'),
+            _adres('7', 'Zonder postcode', 1, '1', postcode=None),
+        ], generation_id=3, created=1600000000000000)
+
+        self.assertEqual(count, 6)
+        self.index = adressen.AdresIndex.open(self.path)
+
+    def tearDown(self):
+        os.remove(self.path)
+        os.rmdir(os.path.dirname(self.path))
+
+    def _ids(self, query, name='postcode_huisnummer_query'):
+        return [
+            hit.meta.id for hit in
+            self.index.hits(name, QueryAnalyzer(query))]
+
+    def test_header(self):
+        self.assertEqual(len(self.index), 6)
+        self.assertEqual(self.index.generation, 3)
+        self.assertEqual(self.index.created, 1600000000000000)
+
+    def test_prefix(self):
+        self.assertEqual(self._ids('1016SZ 2'), ['5', '4', '3', '1', '2'])
+        self.assertEqual(self._ids('1016 sz 228'), ['3', '1', '2'])
+        self.assertEqual(self._ids('1016SZ 228a'), ['1', '2'])
+        self.assertEqual(self._ids('1016SZ 228-a-2'), ['2'])
+        self.assertEqual(self._ids('1015CX 228'), ['6'])
+        self.assertEqual(self._ids('1016SZ 3'), [])
+        self.assertEqual(self._ids('1234AB 228'), [])
+
+    def test_exact(self):
+        self.assertEqual(
+            self._ids('1016SZ 22', 'postcode_huisnummer_exact_query'), ['4'])
+
+    def test_hit(self):
+        hit = self.index.hits(
+            'postcode_huisnummer_query', QueryAnalyzer('1016SZ 228a1'))[0]
+
+        self.assertEqual(hit.meta.index, adressen.NUMMERAANDUIDING)
+        self.assertEqual(hit._display, 'Rozengracht 228 A 1')
+        self.assertEqual(hit.adresseerbaar_object_id, '03630100001')
+
+    def test_runs(self):
+        # sorted in runs on disk, merged into the same file
+        path = self.path + '.runs'
+        with mock.patch.object(adressen, 'RUN_SIZE', 2):
+            adressen.write(path, [
+                _adres(str(i), 'Rozengracht', i, str(i))
+                for i in range(9, 0, -1)
+            ])
+        index = adressen.AdresIndex.open(path)
+        os.remove(path)
+
+        self.assertEqual(len(index), 9)
+        self.assertEqual(
+            [hit.meta.id for hit in index.hits(
+                'postcode_huisnummer_query', QueryAnalyzer('1016SZ 1'))],
+            ['1'])
+
+    def test_not_in_file(self):
+        self.assertIsNone(
+            self.index.hits('gebied_query', QueryAnalyzer('1016SZ 228')))
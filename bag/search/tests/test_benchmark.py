@@ -0,0 +1,54 @@
+from unittest import TestCase
+
+from search import benchmark
+
+
+class BenchmarkTest(TestCase):
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(benchmark.percentile(values, 50), 50)
+        self.assertEqual(benchmark.percentile(values, 95), 95)
+        self.assertEqual(benchmark.percentile(values, 99), 99)
+        self.assertEqual(benchmark.percentile([7], 99), 7)
+        self.assertEqual(benchmark.percentile([], 50), 0.0)
+
+    def test_dedicated_indices(self):
+        self.assertTrue(benchmark.dedicated_indices(
+            {'BAG_PAND': 'bag_pand_benchmark'}))
+        self.assertFalse(benchmark.dedicated_indices(
+            {'BAG_PAND': 'bag_pand_benchmark', 'BRK_OBJECT': 'brk_object'}))
+
+    def test_overlap(self):
+        self.assertEqual(benchmark.overlap([], []), 1.0)
+        self.assertEqual(benchmark.overlap(['a', 'b'], ['a', 'b']), 1.0)
+        self.assertEqual(benchmark.overlap(['a', 'b'], ['b', 'c']), 1 / 3)
+        self.assertEqual(benchmark.overlap(['a'], []), 0.0)
+
+    def test_result_keys(self):
+        typeahead = [
+            {'label': 'Straatnamen', 'content': [
+                {'_display': 'Anjeliersstraat', 'uri': 'bag/openbareruimte/1/'},
+            ]},
+        ]
+        self.assertEqual(
+            benchmark.result_keys(typeahead), ['bag/openbareruimte/1/'])
+
+        search = {'results': [
+            {'_links': {'self': {'href': 'http://localhost/bag/pand/2/'}}},
+        ]}
+        self.assertEqual(benchmark.result_keys(search), ['bag/pand/2/'])
+
+    def test_summarize(self):
+        query = benchmark.CorpusQuery('straat', '/atlas/typeahead/bag/', 'anjel')
+        measurements = [
+            benchmark.Measurement(query, 200, 10.0, 2, ['a', 'b']),
+            benchmark.Measurement(query, 200, 20.0, 4, ['a', 'b']),
+        ]
+        summary = benchmark.summarize(
+            measurements, {'/atlas/typeahead/bag/?q=anjel': ['a']})
+
+        self.assertEqual(summary['straat']['count'], 2)
+        self.assertEqual(summary['straat']['p50'], 10.0)
+        self.assertEqual(summary['straat']['p99'], 20.0)
+        self.assertEqual(summary['straat']['overlap'], 0.5)
@@ -0,0 +1,74 @@
+import json
+
+from django.test import SimpleTestCase
+from rest_framework.test import APITransactionTestCase
+
+from search.tests.fill_elastic import load_docs
+from search.views import mapped_fields
+
+
+class ExportTest(APITransactionTestCase):
+    """
+    Streaming all search results
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        load_docs(cls)
+
+    def _content(self, response):
+        return b''.join(response.streaming_content).decode('utf-8')
+
+    def _count(self):
+        response = self.client.get('/atlas/search/adres/', {'q': 'anjel'})
+        return response.data['count']
+
+    def test_export_ndjson(self):
+        response = self.client.get(
+            '/atlas/search/adres/export/', {'q': 'anjel'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+
+        lines = self._content(response).splitlines()
+        self.assertEqual(len(lines), self._count())
+
+        first = json.loads(lines[0])
+        self.assertEqual(first['straatnaam'], 'Anjeliersstraat')
+        self.assertIn('_links', first)
+
+    def test_export_csv(self):
+        response = self.client.get(
+            '/atlas/search/adres/export/', {'q': 'anjel', 'output': 'csv'})
+        self.assertEqual(response.status_code, 200)
+
+        lines = self._content(response).splitlines()
+        # header + adressen
+        self.assertEqual(len(lines), self._count() + 1)
+        self.assertIn('_links.self.href', lines[0])
+        # the columns of all adres types, not only of the first hit
+        self.assertIn('huisnummer', lines[0])
+        self.assertIn('postcode', lines[0])
+
+    def test_export_invalid_output(self):
+        response = self.client.get(
+            '/atlas/search/adres/export/', {'q': 'anjel', 'output': 'xls'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_export_subject_not_authorized(self):
+        response = self.client.get(
+            '/atlas/search/kadastraalsubject/export/', {'q': 'kikker'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, [])
+
+
+class MappedFieldsTest(SimpleTestCase):
+
+    def test_mapped_fields(self):
+        self.assertEqual(mapped_fields({
+            'naam': {'type': 'text', 'fields': {'raw': {'type': 'keyword'}}},
+            'centroid': {'properties': {
+                'x': {'type': 'float'}, 'y': {'type': 'float'}}},
+            'rechten': {'type': 'nested', 'properties': {
+                'aard': {'type': 'keyword'}}},
+        }), ['naam', 'centroid.x', 'centroid.y', 'rechten'])
@@ -0,0 +1,103 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+from elasticsearch.exceptions import ConnectionError
+from elasticsearch_dsl.response import Hit
+
+from search import gebieden
+from search.query_analyzer import QueryAnalyzer
+
+
+def _gebied(_id, naam, subtype):
+    return Hit({
+        '_index': 'bag_gebied', '_type': 'doc', '_id': _id,
+        '_source': {
+            'naam': naam, 'subtype': subtype, 'type': 'gebied',
+            'subtype_id': _id, '_display': f'{naam} ({subtype})'},
+    })
+
+
+def _bouwblok(_id, code):
+    return Hit({
+        '_index': 'bag_bouwblok', '_type': 'doc', '_id': _id,
+        '_source': {
+            'code': code, 'subtype': 'bouwblok',
+            '_display': f'{code} (bouwblok)'},
+    })
+
+
+class GebiedenIndexTest(SimpleTestCase):
+    """
+    In memory lookup of gebieden and bouwblokken
+    """
+
+    def setUp(self):
+        self.index = gebieden.GebiedenIndex(
+            [
+                _gebied('1', 'Centrum', 'stadsdeel'),
+                _gebied('2', 'Burgwallen-Oude Zijde', 'buurtcombinatie'),
+                _gebied('3', 'Oude Pijp', 'buurt'),
+                _gebied('4', 'Centrum-Oost', 'gebiedsgerichtwerken'),
+                _gebied('5', '1e Helmersbuurt', 'buurt'),
+            ],
+            [
+                _bouwblok('b1', 'RN35'),
+                _bouwblok('b2', 'RN36'),
+                _bouwblok('b3', 'AB01'),
+            ],
+        )
+
+    def _names(self, query):
+        return [
+            hit.naam for hit in
+            self.index.hits('gebied_query', QueryAnalyzer(query))]
+
+    def test_prefix_before_phrase_prefix(self):
+        self.assertEqual(self._names('oude'), ['Oude Pijp', 'Burgwallen-Oude Zijde'])
+        self.assertEqual(self._names('centrum'), ['Centrum', 'Centrum-Oost'])
+
+    def test_phrase_prefix(self):
+        self.assertEqual(self._names('oude z'), ['Burgwallen-Oude Zijde'])
+        self.assertEqual(self._names('oost'), ['Centrum-Oost'])
+        self.assertEqual(self._names('zijde oude'), [])
+
+    def test_synonyms(self):
+        self.assertEqual(self._names('eerste helmers'), ['1e Helmersbuurt'])
+
+    def test_bouwblok(self):
+        hits = self.index.hits('bouwblok_query', QueryAnalyzer('rn3'))
+        self.assertEqual([hit.code for hit in hits], ['RN35', 'RN36'])
+
+    def test_not_in_memory(self):
+        self.assertIsNone(
+            self.index.hits('straatnaam_query', QueryAnalyzer('centrum')))
+
+
+@override_settings(SEARCH_LOCAL_GEBIEDEN=True)
+class GetIndexTest(SimpleTestCase):
+    """
+    A failed load is not tried again on every request
+    """
+
+    def setUp(self):
+        gebieden._index = None
+        gebieden._failed = None
+
+    tearDown = setUp
+
+    @mock.patch.object(gebieden.generation, 'current', return_value=1)
+    def test_retry_after_failure(self, _current):
+        failing = mock.patch.object(
+            gebieden, 'load', side_effect=ConnectionError('down'))
+
+        with failing as load:
+            self.assertIsNone(gebieden.get_index(None))
+            self.assertIsNone(gebieden.get_index(None))
+        self.assertEqual(load.call_count, 1)
+
+        gebieden._failed -= gebieden.RETRY_INTERVAL
+        with mock.patch.object(
+                gebieden, 'load', return_value=gebieden.GebiedenIndex(
+                    [], [], 1)) as load:
+            self.assertIsNotNone(gebieden.get_index(None))
+        self.assertIsNone(gebieden._failed)
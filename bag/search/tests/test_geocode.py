@@ -0,0 +1,89 @@
+from django.test import RequestFactory, SimpleTestCase
+from elasticsearch_dsl.response import Hit
+from rest_framework.exceptions import ParseError
+
+from search import geocode
+from search.query_analyzer import QueryAnalyzer
+from search.views import SearchNummeraanduidingViewSet, get_elastic_client
+
+
+class GeocodeTest(SimpleTestCase):
+    """
+    Bulk geocoding of adressen
+    """
+
+    def test_rows_from_json(self):
+        rows = geocode.rows_from_json([
+            'silodam 340',
+            {'id': 'a1', 'q': 'Rozengracht 228a'},
+            {'postcode': '1016SZ', 'huisnummer': 228, 'toevoeging': 'a'},
+        ])
+
+        self.assertEqual(rows, [
+            geocode.GeocodeRow(0, 'silodam 340'),
+            geocode.GeocodeRow('a1', 'Rozengracht 228a'),
+            geocode.GeocodeRow(2, '1016SZ 228 a'),
+        ])
+
+        self.assertEqual(
+            geocode.rows_from_json({'adressen': ['silodam 340']}),
+            [geocode.GeocodeRow(0, 'silodam 340')])
+
+        with self.assertRaises(ParseError):
+            geocode.rows_from_json({'q': 'silodam 340'})
+
+        with self.assertRaises(ParseError):
+            geocode.rows_from_json(['silodam 340', 'silodam 342'], 1)
+
+    def test_rows_from_csv(self):
+        rows = geocode.rows_from_csv(
+            'id,postcode,huisnummer,toevoeging\n'
+            'x,1016SZ,228,a\n'
+            ',1013AW,2,\n')
+
+        self.assertEqual(rows, [
+            geocode.GeocodeRow('x', '1016SZ 228 a'),
+            geocode.GeocodeRow(1, '1013AW 2'),
+        ])
+
+        with self.assertRaises(ParseError):
+            geocode.rows_from_csv('straat,nummer\nsilodam,340\n')
+
+        with self.assertRaises(ParseError):
+            geocode.rows_from_csv('q\nsilodam 340\nsilodam 342\n', 1)
+
+    def test_result_row(self):
+        row = geocode.GeocodeRow('x', '1016SZ 228 a')
+        hit = Hit({
+            '_index': 'nummeraanduiding', '_type': 'doc', '_id': '1',
+            '_source': {
+                '_display': 'Rozengracht 228A',
+                'landelijk_id': '0363200000123456',
+                'centroid': [4.88, 52.37],
+            },
+        })
+
+        result = geocode.result_row(row, hit)
+        self.assertEqual(list(result), geocode.FIELDS)
+        self.assertTrue(result['found'])
+        self.assertEqual(result['landelijk_id'], '0363200000123456')
+        self.assertEqual((result['lon'], result['lat']), (4.88, 52.37))
+
+        self.assertIsNone(result['error'])
+
+        self.assertFalse(geocode.result_row(row)['found'])
+        self.assertEqual(
+            geocode.result_row(row, error=geocode.SEARCH_FAILED)['error'],
+            geocode.SEARCH_FAILED)
+
+    def test_postcode_huisnummer_is_exact(self):
+        view = SearchNummeraanduidingViewSet()
+        search = view.geocode_query(
+            RequestFactory().post('/atlas/search/adres/geocode/'),
+            get_elastic_client(), QueryAnalyzer('1016SZ 228a'))
+        body = search.to_dict()
+
+        self.assertEqual(body['size'], 1)
+        self.assertEqual(body['_source'], geocode.SOURCE)
+        self.assertIn(
+            {'term': {'huisnummer': 228}}, body['query']['bool']['must'])
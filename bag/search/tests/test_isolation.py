@@ -0,0 +1,82 @@
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from django.test import RequestFactory, SimpleTestCase
+from elasticsearch_dsl.response import Hit
+from rest_framework.response import Response
+
+from search import isolation
+from search.views import GroupResult, IsolatedSearch, TypeaheadViewSet
+
+
+def _subject(_id, naam):
+    return Hit({
+        '_index': 'brk_subject', '_type': 'doc', '_id': _id,
+        '_source': {
+            '_display': naam, 'subtype': 'kadastraal_subject',
+            'subtype_id': _id},
+    })
+
+
+class IsolationTest(SimpleTestCase):
+    """
+    Subject queries have their own time budget and scoped cache
+    """
+
+    def setUp(self):
+        self.view = TypeaheadViewSet()
+        self.request = RequestFactory().get('/typeahead/brk/?q=stephan')
+        self.grouped = [OrderedDict([
+            ('Kadastrale subjecten', GroupResult(
+                [_subject('1', 'Stephan Preeker')], 1)),
+        ])]
+
+    def test_budget_spent(self):
+        isolated = IsolatedSearch(
+            ['kadastraal_subject_query'], 'k', None, Future(),
+            time.perf_counter())
+
+        self.assertEqual(self.view._finish_isolated(self.request, isolated), [])
+        self.assertEqual(
+            isolation.partial(self.request), ['kadastraal_subject_query'])
+
+    def test_finished_in_time(self):
+        future = Future()
+        future.set_result(
+            (self.grouped, [('kadastraal_subject_query', 3, 1)], [], 4.0))
+        isolated = IsolatedSearch(
+            ['kadastraal_subject_query'], 'k', None, future,
+            time.perf_counter() + 1)
+
+        self.assertEqual(
+            self.view._finish_isolated(self.request, isolated), self.grouped)
+        self.assertEqual(isolation.partial(self.request), [])
+
+    def test_freeze_thaw(self):
+        frozen = self.view._freeze_groups(self.grouped)
+        grouped = self.view._thaw_groups(frozen)
+
+        hits, total = grouped[0]['Kadastrale subjecten']
+        self.assertEqual(total, 1)
+        self.assertEqual(hits[0]._display, 'Stephan Preeker')
+        self.assertEqual(hits[0].meta.id, '1')
+
+    def test_cache_per_scope(self):
+        self.assertNotEqual(
+            isolation.cache_key(['BRK/RS'], 'stephan'),
+            isolation.cache_key(['BRK/RS', 'BRK/RSN'], 'stephan'))
+
+    def test_partial_header(self):
+        view = PartialViewSet.as_view({'get': 'list'})
+        response = view(self.request)
+
+        self.assertEqual(
+            response[isolation.PARTIAL_HEADER], 'kadastraal_subject_query')
+
+
+class PartialViewSet(TypeaheadViewSet):
+
+    def list(self, request):
+        isolation.mark_partial(request, 'kadastraal_subject_query')
+        return Response([])
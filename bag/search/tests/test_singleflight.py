@@ -0,0 +1,90 @@
+import threading
+import time
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from search import singleflight
+
+
+class SingleFlightTest(SimpleTestCase):
+    """
+    Concurrent identical calls share one execution
+    """
+
+    def test_concurrent_calls_share(self):
+        flight = singleflight.SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+        results = []
+
+        def slow():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return ['Anjeliersstraat']
+
+        def follow():
+            results.append(flight.do('anjel', lambda: ['other']))
+
+        leader = threading.Thread(
+            target=lambda: results.append(flight.do('anjel', slow)))
+        leader.start()
+        started.wait(5)
+
+        followers = [threading.Thread(target=follow) for _ in range(3)]
+        for follower in followers:
+            follower.start()
+
+        # let the followers find the call in flight
+        time.sleep(0.1)
+        release.set()
+        for thread in [leader] + followers:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(results), 4)
+        self.assertEqual(
+            sorted(shared for _, shared in results), [False, True, True, True])
+        for value, _ in results:
+            self.assertEqual(value, ['Anjeliersstraat'])
+
+    def test_failed_leader(self):
+        flight = singleflight.SingleFlight()
+
+        def fail():
+            raise ValueError('elastic is down')
+
+        with self.assertRaises(ValueError):
+            flight.do('anjel', fail)
+
+        self.assertEqual(flight.do('anjel', lambda: 1), (1, False))
+
+    @override_settings(CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    })
+    def test_shared_cache(self):
+        cache = caches['default']
+        flight = singleflight.SingleFlight('default', wait=0.2)
+
+        # a leader in another process left its result
+        cache.set('singleflight:k1:value', ['shared'])
+        self.assertEqual(flight.do('k1', lambda: ['own']), (['shared'], True))
+
+        # a leader in another process that does not finish in time
+        cache.add('singleflight:k2:lock', 1)
+        self.assertEqual(flight.do('k2', lambda: ['own']), (['own'], False))
+
+        # the leader leaves the result for late followers
+        flight.do('k3', lambda: ['first'])
+        self.assertEqual(cache.get('singleflight:k3:value'), ['first'])
+        self.assertIsNone(cache.get('singleflight:k3:lock'))
+
+    def test_key(self):
+        self.assertEqual(
+            singleflight.make_key('bag', 'anjel', ['bag']),
+            singleflight.make_key('bag', 'anjel', ['bag']))
+        self.assertNotEqual(
+            singleflight.make_key('brk', 'anjel', []),
+            singleflight.make_key('brk', 'anjel', ['BRK/RS']))
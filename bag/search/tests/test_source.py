@@ -0,0 +1,25 @@
+from unittest import TestCase
+
+from search.queries import ElasticQueryWrapper, TYPEAHEAD_SOURCE
+
+
+class SourceProjectionTest(TestCase):
+
+    def _wrapper(self):
+        return ElasticQueryWrapper(
+            query={'prefix': {'code': 'rn'}},
+            sort_fields=['code.keyword'],
+            indexes=['bag_bouwblok'],
+            name='bouwblok_query')
+
+    def test_full_source(self):
+        body = self._wrapper().to_elasticsearch_object(None).to_dict()
+        self.assertNotIn('_source', body)
+        self.assertEqual(body['stats'], ['bouwblok_query'])
+
+    def test_typeahead_source(self):
+        body = self._wrapper().to_elasticsearch_object(
+            None, source=TYPEAHEAD_SOURCE).to_dict()
+        self.assertEqual(
+            body['_source']['includes'], TYPEAHEAD_SOURCE['includes'])
+        self.assertEqual(body['size'], 15)
@@ -0,0 +1,80 @@
+import json
+import os
+import re
+import tempfile
+from unittest import TestCase
+
+from django.test import override_settings
+
+from datasets.generic import metrics
+from search import timing
+
+
+class Request(object):
+    pass
+
+
+class TimingTest(TestCase):
+
+    def test_server_timing(self):
+        request = Request()
+        timing.record(request, 'weg_query', took=3, hits=8)
+        timing.record(request, 'msearch', wall=12.345)
+
+        self.assertEqual(
+            timing.server_timing(request),
+            'weg_query;desc="took 3ms, 8 hits", msearch;dur=12.3')
+
+    def test_server_timing_tokens(self):
+        request = Request()
+        timing.record(request, 'gebied_query.local', hits=2)
+        timing.record(request, 'weird name (x)', wall=1)
+
+        # RFC 7230 token, optional ;dur= and ;desc= parameters
+        entry = re.compile(
+            r"^[!#$%&'*+\-.^_`|~0-9A-Za-z]+"
+            r'(;dur=[0-9.]+)?(;desc="[^"]*")?$')
+        header = timing.server_timing(request)
+        for part in header.split(', '):
+            self.assertRegex(part, entry)
+        self.assertTrue(header.startswith('gebied_query.local;'))
+        self.assertIn('weird_name__x_;dur=1.0', header)
+
+    def test_no_timings(self):
+        self.assertEqual(timing.server_timing(Request()), '')
+
+    def test_histogram(self):
+        histogram = metrics.Histogram('test_ms', 'test', buckets=(1, 10))
+        histogram.observe(1, query='a')
+        histogram.observe(5, query='a')
+        histogram.observe(50, query='a')
+
+        lines = histogram.render()
+        self.assertIn('test_ms_bucket{query="a",le="1"} 1', lines)
+        self.assertIn('test_ms_bucket{query="a",le="10"} 2', lines)
+        self.assertIn('test_ms_bucket{query="a",le="+Inf"} 3', lines)
+        self.assertIn('test_ms_sum{query="a"} 56', lines)
+        self.assertIn('test_ms_count{query="a"} 3', lines)
+
+    def test_render_registry(self):
+        timing.record(None, 'pandnaam_query', took=2, wall=4, hits=1)
+        text = metrics.render()
+        self.assertIn('search_query_took_ms_count{query="pandnaam_query"}', text)
+
+    def test_render_all_workers(self):
+        histogram = metrics.histogram('test_workers_ms', 'test', buckets=(10,))
+        histogram.observe(5, query='a')
+
+        with tempfile.TemporaryDirectory() as directory, \
+                override_settings(METRICS_DIR=directory):
+            # the file of another worker
+            with open(os.path.join(directory, '1-other.json'), 'w') as f:
+                json.dump({'test_workers_ms': [
+                    [[['query', 'a']], [2, 1, 100]]]}, f)
+
+            text = metrics.render()
+            own = [name for name in os.listdir(directory) if name != '1-other.json']
+
+        self.assertEqual(len(own), 1)
+        self.assertIn('test_workers_ms_count{query="a"} 4', text)
+        self.assertIn('test_workers_ms_sum{query="a"} 105', text)
@@ -0,0 +1,104 @@
+from django.test import SimpleTestCase
+from elasticsearch_dsl.response import Hit, Response
+
+from search.queries import ElasticQueryWrapper
+from search.views import (
+    GroupResult, TypeaheadViewSet, _autocomplete_group_order)
+
+
+def _hit(_id, display, subtype):
+    return {
+        '_index': 'bag_gebied', '_type': 'doc', '_id': _id, '_score': 1,
+        '_source': {
+            '_display': display, 'subtype': subtype,
+            'type': 'openbare_ruimte', 'landelijk_id': _id},
+    }
+
+
+class TypeaheadGroupsTest(SimpleTestCase):
+    """
+    Typeahead groups are aggregated in elastic
+    """
+
+    def setUp(self):
+        self.view = TypeaheadViewSet()
+        self.query = ElasticQueryWrapper(
+            query={'match_all': {}},
+            sort_fields=['_score', 'naam.keyword'],
+            indexes=['bag_gebied'],
+            size=100,
+            name='openbare_ruimte_query')
+
+    def _index(self, group):
+        return _autocomplete_group_order.index(group)
+
+    def test_grouped_search(self):
+        body = self.view._grouped_search(self.query).to_dict()
+
+        self.assertEqual(body['size'], 0)
+        self.assertNotIn('sort', body)
+
+        straten = body['aggs'][f'group_{self._index("Straatnamen")}']
+        self.assertEqual(straten['filter'], {'terms': {'subtype': ['weg']}})
+        self.assertEqual(straten['aggs']['top']['top_hits']['size'], 8)
+        self.assertEqual(
+            straten['aggs']['top']['top_hits']['sort'],
+            ['_score', 'naam.keyword'])
+
+        ruimtes = body['aggs'][f'group_{self._index("Openbare ruimtes")}']
+        top_hits = ruimtes['aggs']['top']['top_hits']
+        self.assertEqual(top_hits['size'], 5)
+        self.assertIn('_script', top_hits['sort'][0])
+
+    def test_group_size_limited_by_query_size(self):
+        self.query.size = 1
+        body = self.view._grouped_search(self.query).to_dict()
+
+        for agg in body['aggs'].values():
+            self.assertEqual(agg['aggs']['top']['top_hits']['size'], 1)
+
+    def test_total_results(self):
+        search = self.view._grouped_search(self.query)
+        group = f'group_{self._index("Straatnamen")}'
+        aggregations = {
+            f'group_{i}': {'doc_count': 0, 'top': {'hits': {'total': 0, 'hits': []}}}
+            for i in range(len(_autocomplete_group_order))
+        }
+        aggregations[group] = {
+            'doc_count': 12,
+            'top': {'hits': {'total': 12, 'hits': [
+                _hit('1', 'Anjeliersstraat', 'weg'),
+                _hit('2', 'Anjelierspad', 'weg'),
+            ]}},
+        }
+        response = Response(search, {
+            'took': 1, 'hits': {'total': 12, 'hits': []},
+            'aggregations': aggregations})
+
+        grouped = self.view._group_result(response)
+
+        self.assertEqual(list(grouped), ['Straatnamen'])
+        self.assertEqual(grouped['Straatnamen'].total, 12)
+        self.assertEqual(
+            [hit._display for hit in grouped['Straatnamen'].hits],
+            ['Anjeliersstraat', 'Anjelierspad'])
+
+    def test_total_results_of_queries(self):
+        # two queries finding the same street are not counted twice
+        straat = Hit(_hit('1', 'Anjeliersstraat', 'weg'))
+        pad = Hit(_hit('2', 'Anjelierspad', 'weg'))
+        results = [
+            {'Straatnamen': GroupResult([straat], 1)},
+            {'Straatnamen': GroupResult([straat, pad], 2)},
+        ]
+
+        _, totals = self.view._group_elk_results(None, results)
+        self.assertEqual(totals['Straatnamen'], 2)
+
+        results = [
+            {'Straatnamen': GroupResult([straat], 1)},
+            {'Straatnamen': GroupResult([pad], 1)},
+        ]
+
+        _, totals = self.view._group_elk_results(None, results)
+        self.assertEqual(totals['Straatnamen'], 2)
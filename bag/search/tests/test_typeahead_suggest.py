@@ -0,0 +1,74 @@
+from django.test import SimpleTestCase, override_settings
+from elasticsearch_dsl.response import Response
+
+from datasets.bag import queries as bag_qs
+from search.query_analyzer import QueryAnalyzer
+from search.views import TypeaheadViewSet
+
+
+def _option(_id, display, subtype, score):
+    return {
+        'text': display, '_index': 'bag_gebied', '_type': 'doc',
+        '_id': _id, '_score': score,
+        '_source': {
+            '_display': display, 'subtype': subtype,
+            'type': 'openbare_ruimte', 'landelijk_id': _id},
+    }
+
+
+@override_settings(SEARCH_TYPEAHEAD_SUGGEST=True)
+class TypeaheadSuggestTest(SimpleTestCase):
+    """
+    Straatnamen and pandnamen from the completion suggester
+    """
+
+    def setUp(self):
+        self.view = TypeaheadViewSet()
+
+    def test_suggest_search(self):
+        q = bag_qs.weg_query(QueryAnalyzer('Prinsen'))
+        body = self.view._remote_search(q).to_dict()
+
+        self.assertEqual(body['size'], 0)
+        self.assertNotIn('aggs', body)
+
+        completion = body['suggest']['typeahead']['completion']
+        self.assertEqual(body['suggest']['typeahead']['text'], 'prinsen')
+        self.assertEqual(completion['field'], 'naam_suggest')
+        self.assertEqual(completion['contexts'], {'subtype': ['weg']})
+
+    def test_not_subtype_uses_elastic_query(self):
+        q = bag_qs.openbare_ruimte_query(QueryAnalyzer('Prinsen'), 'not_weg')
+        self.assertFalse(self.view._use_suggester(q))
+
+        with self.settings(SEARCH_TYPEAHEAD_SUGGEST=False):
+            q = bag_qs.openbare_ruimte_query(QueryAnalyzer('Prinsen'))
+            self.assertFalse(self.view._use_suggester(q))
+
+    def test_suggest_group_result(self):
+        q = bag_qs.openbare_ruimte_query(QueryAnalyzer('Prinsen'))
+        search = self.view._remote_search(q)
+
+        response = Response(search, {
+            'took': 1, 'hits': {'total': 0, 'hits': []},
+            'suggest': {'typeahead': [{
+                'text': 'prinsen', 'offset': 0, 'length': 7,
+                'options': [
+                    _option('1', 'Prinsengracht', 'weg', 10),
+                    _option('2', 'Prinseneiland', 'weg', 10),
+                    _option('3', 'Korte Prinsengracht', 'weg', 5),
+                    _option('1', 'Prinsengracht', 'weg', 5),
+                    _option('4', 'Prinsenbrug', 'kunstwerk', 5),
+                ],
+            }]},
+        })
+
+        grouped = self.view._suggest_group_result(q, response)
+
+        self.assertEqual(grouped['Straatnamen'].total, 3)
+        self.assertEqual(
+            [hit._display for hit in grouped['Straatnamen'].hits],
+            ['Prinseneiland', 'Prinsengracht', 'Korte Prinsengracht'])
+        self.assertEqual(
+            [hit._display for hit in grouped['Openbare ruimtes'].hits],
+            ['Prinsenbrug'])
@@ -0,0 +1,106 @@
+"""
+Timing of elastic queries per query builder.
+
+Each executed query is recorded in the histograms exposed on
+/status/metrics and on the current request, from which a
+`Server-Timing` header can be made.
+"""
+
+import re
+from collections import namedtuple
+
+from datasets.generic import metrics
+
+QueryTiming = namedtuple('QueryTiming', ['name', 'took', 'wall', 'hits'])
+
+QUERY_TOOK = metrics.histogram(
+    'search_query_took_ms', 'Time spent in elastic (took) per query builder')
+QUERY_WALL = metrics.histogram(
+    'search_query_wall_ms', 'Round trip time to elastic per query builder')
+QUERY_HITS = metrics.histogram(
+    'search_query_hits', 'Number of hits per query builder',
+    buckets=(0, 1, 5, 10, 50, 100, 1000, 10000, 100000))
+
+# attribute on the request holding the timings
+_REQUEST_ATTR = '_search_timings'
+
+# characters not allowed in a Server-Timing metric name (a token)
+_NOT_TOKEN = re.compile(r"[^!#$%&'*+\-.^_`|~0-9A-Za-z]")
+
+
+def _http_request(request):
+    # store the timings on the django request, also when given the
+    # rest framework request wrapping it, so they stay reachable from
+    # middleware and test client responses (response.wsgi_request)
+    return getattr(request, '_request', request)
+
+
+def query_name(search, default: str = 'search') -> str:
+    """
+    Name of the query builder of an elastic_dsl Search, it is set
+    as `stats` group by ElasticQueryWrapper
+    """
+    stats = search._extra.get('stats')
+    if stats:
+        return stats[0]
+    return default
+
+
+def record(request, name: str, took: float = None, wall: float = None,
+           hits: int = None):
+    """
+    Record a query, times in milliseconds
+    """
+    if took is not None:
+        QUERY_TOOK.observe(took, query=name)
+    if wall is not None:
+        QUERY_WALL.observe(wall, query=name)
+    if hits is not None:
+        QUERY_HITS.observe(hits, query=name)
+
+    if request is None:
+        return
+
+    request = _http_request(request)
+    timings = getattr(request, _REQUEST_ATTR, None)
+    if timings is None:
+        timings = []
+        setattr(request, _REQUEST_ATTR, timings)
+    timings.append(QueryTiming(name, took, wall, hits))
+
+
+def request_timings(request) -> [QueryTiming]:
+    return getattr(_http_request(request), _REQUEST_ATTR, [])
+
+
+def token(name: str) -> str:
+    """
+    `name` as Server-Timing metric name, a token
+    """
+    return _NOT_TOKEN.sub('_', name) or 'query'
+
+
+def server_timing(request) -> str:
+    """
+    Timings of the request as `Server-Timing` header value
+
+    postcode_query;dur=12.1;desc="took 4ms, 8 hits"
+
+    Qualified names read like `gebied_query.local`.
+    """
+    entries = []
+
+    for timing in request_timings(request):
+        entry = token(timing.name)
+        if timing.wall is not None:
+            entry += f';dur={timing.wall:.1f}'
+        desc = []
+        if timing.took is not None:
+            desc.append(f'took {timing.took:g}ms')
+        if timing.hits is not None:
+            desc.append(f'{timing.hits} hits')
+        if desc:
+            entry += ';desc="{}"'.format(', '.join(desc))
+        entries.append(entry)
+
+    return ', '.join(entries)
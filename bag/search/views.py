@@ -4,21 +4,29 @@ Typeahead bag, brk
 Search    bag, brk
 """
 
+import io
 import json
 import logging
 import re
+import time
+from fnmatch import fnmatch
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from collections import OrderedDict
-from collections import defaultdict
+from collections import defaultdict, namedtuple
 from typing import AbstractSet, List
-from urllib.parse import quote, urlparse
+from urllib.parse import quote
 
 from django.conf import settings
+from django.http import StreamingHttpResponse
 from django.utils.encoding import force_text
 
 from elasticsearch import Elasticsearch
 from elasticsearch.exceptions import TransportError
-from elasticsearch_dsl import Search
+from elasticsearch_dsl import MultiSearch, Q, Search
+from elasticsearch_dsl.response import Hit
 from rest_framework import viewsets, metadata
+from rest_framework.decorators import action
+from rest_framework.parsers import JSONParser, MultiPartParser
 from rest_framework.response import Response
 from rest_framework.reverse import reverse
 from rest_framework.compat import coreapi, coreschema
@@ -27,13 +35,33 @@ from bag import authorization_levels
 
 from datasets.bag import queries as bag_qs  # noqa
 from datasets.brk import queries as brk_qs  # noqa
+from datasets.generic import links
 from datasets.generic import rest
-from search.queries import ElasticQueryWrapper
+from datasets.generic import streaming
+from search import adressen
+from search import gebieden
+from search import geocode
+from search import isolation
+from search import singleflight
+from search import timing
+from search.queries import ElasticQueryWrapper, SUGGEST_NAME, TYPEAHEAD_SOURCE
 from search.query_analyzer import QueryAnalyzer
 
 
 log = logging.getLogger(__name__)
 
+# One elastic client (and connection pool) per process, the client
+# is thread safe and keeps its http connections alive between requests
+_elastic_client = None
+
+
+def get_elastic_client() -> Elasticsearch:
+    global _elastic_client
+    if _elastic_client is None:
+        _elastic_client = Elasticsearch(settings.ELASTIC_SEARCH_HOSTS)
+    return _elastic_client
+
+
 # Mapping of subtypes with detail views
 _details = {
     'ligplaats': 'ligplaats-detail',
@@ -122,6 +150,33 @@ _add_subtype_display = {
     'landschappelijk gebied',
 }
 
+# subtypes per autocomplete group
+_group_subtypes = OrderedDict(
+    (group, sorted(
+        subtype for subtype, subtype_group in _subtype_mapping.items()
+        if subtype_group == group))
+    for group in _autocomplete_group_order
+)
+
+# sort kunstwerken on top of the 'Openbare ruimtes' group
+_kunstwerk_first = {
+    '_script': {
+        'type': 'number',
+        'script': {
+            'lang': 'painless',
+            'source': "doc['subtype'].value == 'kunstwerk' ? 0 : 1",
+        },
+        'order': 'asc',
+    }
+}
+
+# The hits to show in an autocomplete group and the number of matches
+GroupResult = namedtuple('GroupResult', ['hits', 'total'])
+
+# authorized queries running apart from the others, see search.isolation
+IsolatedSearch = namedtuple(
+    'IsolatedSearch', ['names', 'key', 'cached', 'future', 'deadline'])
+
 
 # A collection of regex and the query they generate
 # IMPORTANT : if items are added to all_query_selectors it can have the negative  side effect
@@ -302,9 +357,9 @@ def _get_doc_attr(hit, attribute, default):
     return default
 
 
-def _get_url(request, hit):
+def _get_detail(hit):
     """
-    Given an elk hit determine the uri for each hit
+    Given an elk hit determine the detail view name and pk
     """
     doc_type = _get_doc_attr(hit, 'type',  default=hit.meta.doc_type)
     detail_type = _get_doc_attr(hit, 'subtype', doc_type)
@@ -327,9 +382,29 @@ def _get_url(request, hit):
     if pk is None:
         pk = _get_doc_attr(hit, 'subtype_id', default=hit.meta.id)
 
-    return rest.get_links(
-        view_name=_details[detail_type],
-        kwargs={'pk': pk}, request=request)
+    return _details[detail_type], pk
+
+
+def _get_url(request, hit):
+    """
+    Given an elk hit determine the uri for each hit
+    """
+    view_name, pk = _get_detail(hit)
+    return links.get_detail_links(view_name, pk, request=request)
+
+
+def mapped_fields(properties: dict, prefix: str = '') -> [str]:
+    """
+    The dotted names of the fields in the `properties` of an elastic
+    mapping, like `streaming.flatten` names the fields of a hit
+    """
+    names = []
+    for name, field in properties.items():
+        if 'properties' in field and field.get('type') != 'nested':
+            names.extend(mapped_fields(field['properties'], f'{prefix}{name}.'))
+        else:
+            names.append(f'{prefix}{name}')
+    return names
 
 
 class QueryMetadata(metadata.SimpleMetadata):
@@ -385,7 +460,30 @@ class QFilter(object):
         ]
 
 
-class TypeaheadViewSet(viewsets.ViewSet):
+class ServerTimingMixin(object):
+    """
+    Add the elastic query timings as `Server-Timing` header
+    when SEARCH_SERVER_TIMING is enabled, and the queries left
+    out of the response as `X-Search-Partial` header
+    """
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs)
+
+        if settings.SEARCH_SERVER_TIMING:
+            value = timing.server_timing(request)
+            if value:
+                response['Server-Timing'] = value
+
+        partial = isolation.partial(request)
+        if partial:
+            response[isolation.PARTIAL_HEADER] = ', '.join(partial)
+
+        return response
+
+
+class TypeaheadViewSet(ServerTimingMixin, viewsets.ViewSet):
     """
     Given a query parameter `q`, this function returns a
     subset of all objects
@@ -405,7 +503,7 @@ class TypeaheadViewSet(viewsets.ViewSet):
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.client = Elasticsearch(settings.ELASTIC_SEARCH_HOSTS)
+        self.client = get_elastic_client()
 
     def authorized_queries(self, request, analyzer):
         """
@@ -424,87 +522,409 @@ class TypeaheadViewSet(viewsets.ViewSet):
 
         query_components = select_queries(query, analyzer, q_select)
 
+        # if you are authorized to look for names, these (slow)
+        # queries run apart with their own time budget
         authorized_queries = self.authorized_queries(request, analyzer)
-        # if you are authorized to look for names
-        # add the query
-        if authorized_queries:
-            query_components.extend(authorized_queries)
 
+        if not query_components and not authorized_queries:
+            return []
+
+        isolated = self._start_isolated(request, query, authorized_queries)
+
+        # gebieden, bouwblokken and postcode + huisnummer can be
+        # looked up locally, an index is only loaded for its queries
+        names = {q.name for q in query_components}
+        local_indexes = [
+            index for index in (
+                local.get_index(self.client)
+                for local in (gebieden, adressen)
+                if names & local.QUERIES
+            ) if index is not None
+        ]
+
+        # the GroupResult of each query, None when it is done by elastic
         result_data = []
 
-        # Ignoring cache in case debug is on
-        ignore_cache = settings.DEBUG
+        # create elk queries, all of them are send to elastic in one
+        # multi search request instead of a round trip per query
+        multi_search = MultiSearch(using=self.client)
+        remote = []
 
-        # create elk queries
         for q in query_components:  # type: ElasticQueryWrapper
+            hits = self._local_hits(local_indexes, q, analyzer)
+
+            if hits is None:
+                multi_search = multi_search.add(self._remote_search(q))
+                remote.append((len(result_data), q))
+                result_data.append(None)
+            else:
+                timing.record(request, f'{q.name}.local', hits=len(hits))
+                result_data.append(self._local_group_result(q, hits))
 
-            search = q.to_elasticsearch_object(self.client)
+        if remote:
+            self._execute_grouped_searches(
+                request, multi_search, remote, result_data)
 
-            log.debug(json.dumps(search.to_dict(), indent=4))
+        result_data.extend(self._finish_isolated(request, isolated))
+
+        # leave out the failed queries
+        return [grouped for grouped in result_data if grouped is not None]
+
+    def _start_isolated(self, request, query, queries) -> IsolatedSearch:
+        """
+        Start the authorized queries in a thread of their own,
+        or take their results from the cache of the scopes
+        """
+        if not queries:
+            return None
+
+        names = [q.name for q in queries]
+        key = isolation.cache_key(
+            isolation.scopes(request), type(self).__name__, query.lower(), names)
+
+        cached = isolation.cache_get(key)
+        if cached is not None:
+            for name in names:
+                timing.record(request, f'{name}.cached')
+            return IsolatedSearch(names, key, cached, None, None)
+
+        budget = isolation.timeout()
+        # elastic stops searching and the client stops waiting when
+        # the budget is spent
+        multi_search = MultiSearch(using=self.client).params(
+            request_timeout=budget)
+        for q in queries:
+            multi_search = multi_search.add(
+                self._grouped_search(q).extra(
+                    timeout=isolation.elastic_timeout()))
+
+        future = isolation.executor().submit(
+            self._run_isolated, multi_search, queries)
+
+        return IsolatedSearch(
+            names, key, None, future, time.perf_counter() + budget)
+
+    def _run_isolated(self, multi_search, queries):
+        """
+        Execute the isolated queries, in a thread of the executor.
+        Timings are recorded on the request by the caller.
+        """
+        start = time.perf_counter()
+        results = multi_search.execute(
+            ignore_cache=settings.DEBUG, raise_on_error=False)
+        wall = (time.perf_counter() - start) * 1000
+
+        grouped = []
+        timings = []
+        timed_out = []
+
+        for q, result in zip(queries, results):
+            if result is None:
+                log.error('FAILED ELK SEARCH: %s', q.name)
+                timed_out.append(q.name)
+                grouped.append(None)
+                continue
+            if result.timed_out:
+                timed_out.append(q.name)
+            timings.append((q.name, result.took, result.hits.total))
+            grouped.append(self._group_result(result))
+
+        return grouped, timings, timed_out, wall
+
+    def _finish_isolated(self, request, isolated: IsolatedSearch) -> list:
+        """
+        The GroupResults of the isolated queries that made it within
+        their time budget. Left out queries mark the response partial.
+        """
+        if isolated is None:
+            return []
+
+        if isolated.cached is not None:
+            return self._thaw_groups(isolated.cached)
 
-            # get the result from elastic
-            try:
-                result = search.execute(ignore_cache=ignore_cache)
-            except TransportError:
-                log.exception(
+        remaining = max(isolated.deadline - time.perf_counter(), 0)
+        try:
+            grouped, timings, timed_out, wall = \
+                isolated.future.result(timeout=remaining)
+        except FutureTimeoutError:
+            log.warning('Search budget spent on %s', ', '.join(isolated.names))
+            # not started yet when the executor is busy, the client
+            # request_timeout ends it otherwise
+            isolated.future.cancel()
+            grouped, timings, timed_out, wall = [], [], isolated.names, None
+        except TransportError:
+            log.exception('FAILED ELK SEARCH: %s', ', '.join(isolated.names))
+            grouped, timings, timed_out, wall = [], [], isolated.names, None
+
+        for name, took, hits in timings:
+            timing.record(request, name, took=took, hits=hits)
+        if wall is not None:
+            timing.record(request, 'msearch.isolated', wall=wall)
+
+        for name in timed_out:
+            isolation.mark_partial(request, name)
+
+        # only complete results are cached
+        if not timed_out:
+            isolation.cache_set(isolated.key, self._freeze_groups(grouped))
+
+        return grouped
+
+    @staticmethod
+    def _freeze_groups(grouped: list) -> list:
+        """
+        GroupResults as plain data, hits do not pickle
+        """
+        return [
+            [
+                (group, [
+                    {
+                        '_index': hit.meta.index,
+                        '_type': hit.meta.doc_type,
+                        '_id': hit.meta.id,
+                        '_source': hit.to_dict(),
+                    } for hit in hits
+                ], total)
+                for group, (hits, total) in groups.items()
+            ]
+            for groups in grouped
+        ]
+
+    @staticmethod
+    def _thaw_groups(frozen: list) -> list:
+        return [
+            OrderedDict(
+                (group, GroupResult([Hit(hit) for hit in hits], total))
+                for group, hits, total in groups
+            )
+            for groups in frozen
+        ]
+
+    @staticmethod
+    def _local_hits(local_indexes, q: ElasticQueryWrapper, analyzer):
+        """
+        Hits of the first local index that knows the query,
+        None when elastic has to be asked
+        """
+        for index in local_indexes:
+            hits = index.hits(q.name, analyzer)
+            if hits is not None:
+                return hits
+        return None
+
+    def _execute_grouped_searches(
+            self, request, multi_search, remote, result_data):
+        """
+        Execute the multi search and put the results of
+        the queries in `remote` at their place in `result_data`
+        """
+
+        # Ignoring cache in case debug is on
+        ignore_cache = settings.DEBUG
+
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug(json.dumps(multi_search.to_dict(), indent=4))
+
+        # get the result from elastic
+        start = time.perf_counter()
+        try:
+            results = multi_search.execute(
+                ignore_cache=ignore_cache, raise_on_error=False)
+        except TransportError:
+            log.exception(
+                'FAILED ELK SEARCH: %s',
+                json.dumps(multi_search.to_dict(), indent=4))
+            return
+        wall = (time.perf_counter() - start) * 1000
+
+        for (position, q), search, result in zip(remote, multi_search, results):
+            # a failing query does not fail the others
+            if result is None:
+                log.error(
                     'FAILED ELK SEARCH: %s',
                     json.dumps(search.to_dict(), indent=4))
                 continue
 
             # Get the datas!
-            result_data.append(result)
+            if self._use_suggester(q):
+                grouped = self._suggest_group_result(q, result)
+                hits = sum(group.total for group in grouped.values())
+            else:
+                grouped = self._group_result(result)
+                hits = result.hits.total
+            result_data[position] = grouped
 
-        return result_data
+            # all queries share one round trip, only took is per query
+            timing.record(
+                request, q.name or 'typeahead', took=result.took, hits=hits)
+
+        timing.record(request, 'msearch', wall=wall)
+
+    @staticmethod
+    def _use_suggester(q: ElasticQueryWrapper) -> bool:
+        return settings.SEARCH_TYPEAHEAD_SUGGEST and q.suggest is not None
+
+    def _remote_search(self, q: ElasticQueryWrapper) -> Search:
+        if self._use_suggester(q):
+            return q.to_suggest_object(self.client, TYPEAHEAD_SOURCE)
+        return self._grouped_search(q)
+
+    @staticmethod
+    def _group_size(group: str, q: ElasticQueryWrapper) -> int:
+        size = _autocomplete_group_sizes[group]
+        if q.size:
+            size = min(size, q.size)
+        return size
+
+    @staticmethod
+    def _group_agg(index: int) -> str:
+        return f'group_{index}'
+
+    def _grouped_search(self, q: ElasticQueryWrapper) -> Search:
+        """
+        Search for the hits to show per autocomplete group
+
+        Instead of fetching hits and grouping them afterwards, every
+        group is a filter aggregation with the top hits, sorted like
+        the query, limited to the group size. Its doc_count is the
+        number of matches in the group.
+        """
+        search = q.to_elasticsearch_object(self.client)[0:0].sort()
+
+        sort = list(q.sort_fields or ['_score'])
+
+        for index, group in enumerate(_autocomplete_group_order):
+            size = self._group_size(group, q)
+
+            group_sort = sort
+            if group == 'Openbare ruimtes':
+                group_sort = [_kunstwerk_first] + sort
+
+            search.aggs.bucket(
+                self._group_agg(index), 'filter',
+                Q('terms', subtype=_group_subtypes[group]),
+            ).metric(
+                'top', 'top_hits',
+                size=size, sort=group_sort, _source=TYPEAHEAD_SOURCE)
+
+        return search
+
+    def _group_result(self, result) -> OrderedDict:
+        """
+        The GroupResult of each group of a grouped search
+        """
+        groups = OrderedDict()
+
+        for index, group in enumerate(_autocomplete_group_order):
+            bucket = result.aggregations[self._group_agg(index)]
+            if bucket.doc_count:
+                groups[group] = GroupResult(list(bucket.top), bucket.doc_count)
+
+        return groups
+
+    def _suggest_group_result(self, q: ElasticQueryWrapper, result) -> OrderedDict:
+        """
+        The GroupResult of each group for the options of a completion
+        suggester, best (prefix) matches first
+
+        A document can match with more than one of its inputs, only
+        its best option is used. Totals are at most SUGGEST_SIZE.
+        """
+        hits = []
+        seen = set()
+
+        for suggestion in result.suggest[SUGGEST_NAME]:
+            for option in suggestion.options:
+                if option._id in seen:
+                    continue
+                seen.add(option._id)
+                hits.append(Hit(option.to_dict()))
+
+        hits.sort(key=lambda hit: (-hit.meta.score, hit._display.lower()))
+        return self._local_group_result(q, hits)
+
+    def _local_group_result(self, q: ElasticQueryWrapper, hits) -> OrderedDict:
+        """
+        The GroupResult of each group for hits found in memory,
+        the same as `_group_result` for a grouped search
+        """
+        group_hits = defaultdict(list)
+        for hit in hits:
+            group_hits[_subtype_mapping[hit.subtype]].append(hit)
+
+        groups = OrderedDict()
+
+        for group in _autocomplete_group_order:
+            if group not in group_hits:
+                continue
+            matches = group_hits[group]
+            if group == 'Openbare ruimtes':
+                matches.sort(key=lambda hit: hit.subtype != 'kunstwerk')
+            groups[group] = GroupResult(
+                matches[:self._group_size(group, q)], len(matches))
+
+        return groups
 
     def _get_uri(self, request, hit):
         # Retrieves the uri part for an item
-        url = _get_url(request, hit)['self']['href']
-        uri = urlparse(url).path[1:]
-        return uri
+        view_name, pk = _get_detail(hit)
+        return links.detail_path(view_name, pk)[1:]
 
     def _group_elk_results(self, request, results):
         """
         Group the elk results in their pretty name groups
-        """
-        flat_results = (hit for r in results for hit in r)
-        result_groups = defaultdict(list)
-
-        for hit in flat_results:
-            group = _subtype_mapping[hit.subtype]
-            display = hit._display
-            if hit.subtype in _add_subtype_display:
-                display += f' ({hit.subtype})'
-            result_groups[group].append({
-                '_display': display,
-                'uri': self._get_uri(request, hit)
-            })
 
-        return result_groups
+        Results are a GroupResult per group for every query, in
+        query order. Returns the items and total per group.
 
-    @staticmethod
-    def _kunstwerk_on_top(old_list: List) -> List:
-        kunstwerk_index = 0
-        new_list = []
-        for item in old_list:
-            if item['_display'].endswith('(kunstwerk)'):
-                new_list.insert(kunstwerk_index, item)
-                kunstwerk_index += 1
-            else:
-                new_list.append(item)
-        return new_list
+        The groups of one query do not overlap, but queries can find
+        the same documents, so their totals are not added up. The
+        total of a group is the largest total of a query or the number
+        of distinct items found, whichever is more. It is exact when
+        one query fills the group or all its matches are returned.
+        """
+        result_groups = defaultdict(list)
+        totals = defaultdict(int)
+        sources = defaultdict(int)
+        uris = defaultdict(set)
+
+        for grouped in results:
+            for group, (hits, total) in grouped.items():
+                totals[group] = max(totals[group], total)
+                sources[group] += 1
+                for hit in hits:
+                    display = hit._display
+                    if hit.subtype in _add_subtype_display:
+                        display += f' ({hit.subtype})'
+                    uri = self._get_uri(request, hit)
+                    uris[group].add(uri)
+                    result_groups[group].append({
+                        '_display': display,
+                        'uri': uri
+                    })
+
+        for group, found in uris.items():
+            totals[group] = max(totals[group], len(found))
+
+        # elastic puts kunstwerken on top for each query,
+        # only hits of more queries need to be merged here
+        kunstwerken = 'Openbare ruimtes'
+        if sources[kunstwerken] > 1:
+            result_groups[kunstwerken].sort(
+                key=lambda item: not item['_display'].endswith('(kunstwerk)'))
+
+        return result_groups, totals
 
     def _order_results(self, results, request):
         """
         Group the elastic search results and order these groups
 
         @Params
-        result - the elastic search result object
-        query_string - the query string used to search for. This is for exact
-                       match recognition
+        results - a GroupResult per group for each query
         """
 
         # put the elk results in subtype groups
-        result_groups = self._group_elk_results(request, results)
+        result_groups, totals = self._group_elk_results(request, results)
 
         ordered_results = []
 
@@ -512,15 +932,12 @@ class TypeaheadViewSet(viewsets.ViewSet):
             if group not in result_groups:
                 continue
 
-            if group == 'Openbare ruimtes':
-                result_groups[group] = self._kunstwerk_on_top(result_groups[group])
-
             size = _autocomplete_group_sizes[group]
 
             ordered_results.append({
                 'label': group,
                 'content': result_groups[group][:size],
-                'total_results': len(result_groups[group])
+                'total_results': totals[group]
             })
 
         return ordered_results
@@ -545,8 +962,29 @@ class TypeaheadViewSet(viewsets.ViewSet):
         if not query:
             return Response([])
 
-        results = self.autocomplete_queries(request, query, q_select)
-        response = self._order_results(results, request)
+        def typeahead():
+            results = self.autocomplete_queries(request, query, q_select)
+            return (
+                self._order_results(results, request),
+                isolation.partial(request))
+
+        flight = singleflight.get_flight()
+        if flight is None:
+            response, _ = typeahead()
+            return Response(response)
+
+        # identical requests in flight ask elastic once
+        key = singleflight.make_key(
+            type(self).__name__, query.lower(), sorted(q_select),
+            isolation.scopes(request))
+
+        start = time.perf_counter()
+        (response, partial), shared = flight.do(key, typeahead)
+        if shared:
+            wall = (time.perf_counter() - start) * 1000
+            timing.record(request, 'singleflight.shared', wall=wall)
+            for name in partial:
+                isolation.mark_partial(request, name)
 
         return Response(response)
 
@@ -661,7 +1099,7 @@ class TypeAheadLegacyViewSet(TypeaheadViewSet):
         return self._abstr_list(request, set())
 
 
-class SearchViewSet(viewsets.ViewSet):
+class SearchViewSet(ServerTimingMixin, viewsets.ViewSet):
     """
     Base class for ViewSets implementing search.
     """
@@ -671,9 +1109,23 @@ class SearchViewSet(viewsets.ViewSet):
     url_name = 'search-list'
     page_limit = 10
 
+    # _source fields that are never returned to the user
+    source_excludes = ['order']
+
+    # export streams all hits using the elastic scroll api
+    export_batch_size = 1000
+    export_formats = {
+        'ndjson': streaming.NDJSON_CONTENT_TYPE,
+        'csv': streaming.CSV_CONTENT_TYPE,
+    }
+
     renderer_classes = rest.DEFAULT_RENDERERS
     filter_backends = [QFilter]
 
+    # slow, authorized searches get a time budget and a cache per
+    # authorization scope, see search.isolation
+    isolated = False
+
     def search_query(self, request,
                      elk_client, analyzer: QueryAnalyzer) -> Search:
         """
@@ -738,10 +1190,7 @@ class SearchViewSet(viewsets.ViewSet):
         query = request.query_params['q']
         analyzer = QueryAnalyzer(query)
 
-        elk_client = Elasticsearch(
-            settings.ELASTIC_SEARCH_HOSTS,
-            raise_on_error=True
-        )
+        elk_client = get_elastic_client()
 
         # get the result from elastic
         elk_query = self.search_query(request, elk_client, analyzer)
@@ -752,19 +1201,43 @@ class SearchViewSet(viewsets.ViewSet):
             log.debug('no elk query')
             return Response([])
 
+        search = search.source(excludes=self.source_excludes)
+
+        cache_key = None
+        if self.isolated:
+            # elastic returns what it found within the budget
+            search = search.extra(timeout=isolation.elastic_timeout())
+
+            # the exact query, the paging links hold it as given
+            cache_key = isolation.cache_key(
+                isolation.scopes(request), self.url_name,
+                request.get_host(), query, page)
+            cached = isolation.cache_get(cache_key)
+            if cached is not None:
+                timing.record(request, f'{timing.query_name(search)}.cached')
+                return Response(cached)
+
         ignore_cache = settings.DEBUG
 
-        log.debug(json.dumps(search.to_dict(), indent=4))
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug(json.dumps(search.to_dict(), indent=4))
 
+        start = time.perf_counter()
         try:
             result = search.execute(ignore_cache=ignore_cache)
         except TransportError:
             log.exception("Could not execute search query " + query)
-            log.debug(json.dumps(search.to_dict(), indent=4))
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug(json.dumps(search.to_dict(), indent=4))
             # Todo fix this
             # https://github.com/elastic/elasticsearch/issues/11340#issuecomment-105433439
             return Response([], 500)
 
+        timing.record(
+            request, timing.query_name(search),
+            took=result.took, hits=result.hits.total,
+            wall=(time.perf_counter() - start) * 1000)
+
         response = OrderedDict()
 
         # log.exception(json.dumps(result.to_dict(), indent=4))
@@ -778,11 +1251,108 @@ class SearchViewSet(viewsets.ViewSet):
         results = [self.normalize_hit(h, request) for h in result.hits]
         response['results'] = self.list_results(results)
 
+        if result.timed_out:
+            isolation.mark_partial(request, timing.query_name(search))
+        elif cache_key:
+            isolation.cache_set(cache_key, response)
+
         return Response(response)
 
     def list_results(self, results):
         return results
 
+    def _scan_hits(self, request, search):
+        """
+        Scroll through all hits of search, normalizing them one by one
+        """
+        try:
+            for hit in search.scan():
+                yield self.normalize_hit(hit, request)
+        except TransportError:
+            log.exception('FAILED ELK EXPORT: %s', search.to_dict())
+            raise
+
+    def export_fieldnames(self, elk_client, search) -> [str]:
+        """
+        The csv columns of an export: the fields of every document type
+        in the searched indices, the first hit may lack some of them
+        """
+        mappings = elk_client.indices.get_mapping(
+            index=','.join(search._index or ['_all']))
+
+        names = set()
+        for index in mappings.values():
+            for mapping in index['mappings'].values():
+                names.update(mapped_fields(mapping.get('properties', {})))
+
+        return ['_links.self.href', 'type', 'dataset'] + sorted(
+            name for name in names
+            if name not in ('type', 'dataset') and not any(
+                fnmatch(name.split('.')[0], pattern)
+                for pattern in self.source_excludes))
+
+    @action(detail=False)
+    def export(self, request, *args, **kwargs):
+        """
+        Stream all search items for query `q`
+
+        Unlike the paged list this is not limited to `page_limit` pages.
+        Results are in elastic order, no client side reordering is done.
+
+        ---
+        parameters:
+            - name: q
+              description: Zoek object
+              required: true
+            - name: output
+              description: ndjson (default) or csv
+              required: false
+        """
+        query = request.query_params.get('q')
+
+        if not query:
+            return Response([])
+
+        output = request.query_params.get('output', 'ndjson')
+
+        if output not in self.export_formats:
+            return Response(
+                f'output must be one of {", ".join(self.export_formats)}',
+                status=400)
+
+        analyzer = QueryAnalyzer(query)
+
+        elk_client = get_elastic_client()
+
+        elk_query = self.search_query(request, elk_client, analyzer)
+
+        if not elk_query:
+            return Response([])
+
+        search = elk_query[0:self.export_batch_size].params(
+            scroll='2m',
+            size=self.export_batch_size,
+            preserve_order=True,
+        ).source(excludes=self.source_excludes)
+
+        hits = self._scan_hits(request, search)
+
+        if output == 'csv':
+            lines = streaming.csv_lines(
+                hits, self.export_fieldnames(elk_client, search))
+        else:
+            lines = streaming.ndjson_lines(hits)
+
+        response = StreamingHttpResponse(
+            streaming.guarded(lines, output),
+            content_type=self.export_formats[output])
+
+        filename = self.url_name.split('/')[-1].replace('-list', '')
+        response['Content-Disposition'] = \
+            f'attachment; filename="{filename}.{output}"'
+
+        return response
+
     def get_url(self, request, hit):
         """
         For each hit determine its resource url
@@ -832,6 +1402,7 @@ class SearchSubjectViewSet(SearchViewSet):
 
     url_name = 'search/kadastraalsubject-list'
     filter_backends = [KadastraalSubjectQ]
+    isolated = True
 
     def search_query(self, request, elk_client,
                      analyzer: QueryAnalyzer) -> Search:
@@ -1089,6 +1660,13 @@ class SearchNummeraanduidingViewSet(SearchViewSet):
     filter_backends = [NummeraanduidingQ]
     custom_sort = True
 
+    # fields only used for searching, see get_hit_data
+    source_excludes = ['order', 'comp_*', '*_keyword', '*_nen', '*_ptt']
+
+    # adressen per multi search and per geocode request
+    geocode_batch_size = 250
+    geocode_max_rows = 50000
+
     def search_query(self, request, elk_client,
                      analyzer: QueryAnalyzer) -> Search:
         """
@@ -1111,6 +1689,113 @@ class SearchNummeraanduidingViewSet(SearchViewSet):
         # default response search roads
         return q.to_elasticsearch_object(elk_client)
 
+    def geocode_query(self, request, elk_client,
+                      analyzer: QueryAnalyzer) -> Search:
+        """
+        The search for the best match of one adres
+        """
+        if analyzer.is_postcode_huisnummer_prefix():
+            q = bag_qs.postcode_huisnummer_exact_query(analyzer)
+            search = q.to_elasticsearch_object(elk_client)
+        else:
+            search = self.search_query(request, elk_client, analyzer)
+
+        return search[0:1].source(geocode.SOURCE)
+
+    def _geocode_rows(self, request, rows):
+        """
+        The best match of every row, asked in multi search batches.
+        When elastic fails the rows of the batch and all rows after it
+        are answered with an error.
+        """
+        elk_client = get_elastic_client()
+
+        for start in range(0, len(rows), self.geocode_batch_size):
+            batch = rows[start:start + self.geocode_batch_size]
+
+            multi_search = MultiSearch(using=elk_client)
+            searched = []
+            for position, row in enumerate(batch):
+                if row.q.strip():
+                    multi_search = multi_search.add(self.geocode_query(
+                        request, elk_client, QueryAnalyzer(row.q)))
+                    searched.append(position)
+
+            results = []
+            if searched:
+                try:
+                    results = multi_search.execute(raise_on_error=False)
+                except TransportError:
+                    log.exception('FAILED ELK GEOCODE of %d adressen', len(batch))
+                    for row in rows[start:]:
+                        yield geocode.result_row(
+                            row, error=geocode.SEARCH_FAILED)
+                    return
+
+            best = {}
+            failed = set()
+            for position, result in zip(searched, results):
+                if result is None:
+                    # the search of this adres failed
+                    failed.add(position)
+                elif result.hits:
+                    best[position] = result.hits[0]
+
+            for position, row in enumerate(batch):
+                yield geocode.result_row(
+                    row, best.get(position),
+                    geocode.SEARCH_FAILED if position in failed else None)
+
+    @action(
+        detail=False, methods=['post'],
+        parser_classes=[JSONParser, MultiPartParser, geocode.CSVTextParser])
+    def geocode(self, request, *args, **kwargs):
+        """
+        Geocode a list of adressen at once
+
+        Post a json list of adressen (texts, or objects with `q` or
+        `postcode`, `huisnummer` and `toevoeging`, and an optional `id`),
+        or a csv with those columns as `text/csv` or as `file` upload.
+        Streams the best match of every adres in input order.
+
+        ---
+        parameters:
+            - name: output
+              description: ndjson (default) or csv
+              required: false
+        """
+        output = request.query_params.get('output', 'ndjson')
+
+        if output not in self.export_formats:
+            return Response(
+                f'output must be one of {", ".join(self.export_formats)}',
+                status=400)
+
+        max_rows = self.geocode_max_rows
+        if 'file' in request.FILES:
+            upload = io.TextIOWrapper(
+                request.FILES['file'].file, encoding='utf-8-sig')
+            rows = geocode.rows_from_csv(upload, max_rows)
+        elif isinstance(request.data, str):
+            rows = geocode.rows_from_csv(request.data, max_rows)
+        else:
+            rows = geocode.rows_from_json(request.data, max_rows)
+
+        results = self._geocode_rows(request, rows)
+
+        if output == 'csv':
+            lines = streaming.csv_lines(results, geocode.FIELDS)
+        else:
+            lines = streaming.ndjson_lines(results)
+
+        response = StreamingHttpResponse(
+            streaming.guarded(lines, output),
+            content_type=self.export_formats[output])
+        response['Content-Disposition'] = \
+            f'attachment; filename="geocode.{output}"'
+
+        return response
+
     def get_hit_data(self, result, hit):
         """
         Remove attribute fields not needed for enduser